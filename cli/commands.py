@@ -1,5 +1,6 @@
+import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Literal
 import click
 import premia
@@ -22,6 +23,7 @@ FEATURE_NAME_CHOICES = list(premia.db.features())
 
 PROVIDER_CHOICES: list[premia.data.ProviderType] = ["csv"]
 AI_MODEL_CHOICES: list[premia.ModelType] = ["local", "remote"]
+ON_CONFLICT_CHOICES: list[premia.db.OnConflict] = ["error", "ignore", "update"]
 
 
 @click.version_option("0.0.2", prog_name="premia")
@@ -152,6 +154,31 @@ def config_set_provider(
         sys.exit(1)
 
 
+@config_set_group.command("rate-limit")
+@click.argument("provider", type=click.Choice(["polygon", "twelvedata"]))
+@click.argument("requests", type=int)
+@click.option(
+    "-s",
+    "--seconds",
+    type=float,
+    default=60.0,
+    help="Length of the window the requests are allowed in. Defaults to 60.",
+)
+def config_set_rate_limit(
+    provider: Literal["polygon", "twelvedata"], requests: int, seconds: float
+):
+    """Allow at most REQUESTS requests to a data provider per window, shared by all premia processes."""
+    try:
+        premia.config.set_provider_rate_limit(provider, requests, seconds)
+        click.secho(
+            f"Successfully limited {provider} to {requests} requests per {seconds:g}s.",
+            fg="green",
+        )
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
 @config_set_group.group("ai")
 def config_set_ai_group():
     """Set the AI model you want to use with Premia."""
@@ -236,6 +263,18 @@ def config_remove_ai(model_type: premia.ModelType):
         sys.exit(1)
 
 
+@config_remove_group.command("rate-limit")
+@click.argument("provider", type=click.Choice(["polygon", "twelvedata"]))
+def config_remove_rate_limit(provider: Literal["polygon", "twelvedata"]):
+    """Remove the rate limit of a data provider."""
+    try:
+        premia.config.remove_provider_rate_limit(provider)
+        click.secho(f"Successfully removed {provider} rate limit.", fg="green")
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
 @premia_cli.group("ai")
 def ai_group():
     """Use an AI model to interact with your data infrastructure."""
@@ -539,6 +578,28 @@ def db_remove_instrument(
         sys.exit(1)
 
 
+@db_group.command("index")
+@click.argument("table_name")
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    default=False,
+    help="Remove rows with a duplicate (symbol, time) key, keeping the first stored row.",
+)
+def db_index(table_name: str, dedupe: bool):
+    """Rebuild the (symbol, time) index of a candle table, e.g. after a bulk load found duplicate keys."""
+    try:
+        removed = premia.db.rebuild_index(table_name, dedupe=dedupe)
+        if removed:
+            click.echo(f"Removed {removed} duplicate rows.")
+        click.secho(
+            f"Successfully rebuilt the index of '{table_name}'.", fg="green"
+        )
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
 @db_group.command("reset")
 @click.option(
     "-y",
@@ -570,23 +631,70 @@ def db_purge():
 
 
 @premia_cli.group("data")
-def data_group():
+@click.option(
+    "--record",
+    "record_dir",
+    type=click.Path(file_okay=False),
+    help="Save the provider responses to this directory, so they can be replayed.",
+)
+@click.option(
+    "--replay",
+    "replay_dir",
+    type=click.Path(file_okay=False),
+    help="Serve provider requests from the responses recorded in this directory instead of the network.",
+)
+@click.option(
+    "--synthetic",
+    is_flag=True,
+    default=False,
+    help="When replaying, answer requests without a recording with generated candles.",
+)
+@click.option(
+    "--latency",
+    type=float,
+    default=0.0,
+    help="When replaying, seconds every response is delayed by. Defaults to 0.",
+)
+@click.option(
+    "--cache",
+    "use_cache",
+    is_flag=True,
+    default=False,
+    help="Cache provider responses on disk, so repeated requests are answered locally.",
+)
+def data_group(
+    record_dir: str | None,
+    replay_dir: str | None,
+    synthetic: bool,
+    latency: float,
+    use_cache: bool,
+):
     """Download and import market data"""
-    pass
+    if record_dir and replay_dir:
+        raise click.UsageError("--record and --replay can't be combined.")
 
-
-@data_group.group("yfinance")
-def data_yfinance_group():
-    """Download market data from yfinance"""
-    pass
+    premia.data.cache.configure(enabled=use_cache)
+    if record_dir:
+        premia.data.replay.start_recording(record_dir)
+    elif replay_dir:
+        premia.data.replay.start_replaying(replay_dir, synthetic, latency)
 
 
-@data_yfinance_group.command("stocks")
-@click.argument("symbol")
+@data_group.command("sync")
+@click.argument("instrument", type=click.Choice(INSTRUMENT_CHOICES))
+@click.argument("symbols", nargs=-1, required=True)
+@click.option(
+    "-p",
+    "--provider",
+    type=click.Choice(["polygon", "yfinance", "twelvedata"]),
+    default="polygon",
+    help="Provider the missing data is fetched from. Defaults to polygon.",
+)
 @click.option(
     "-s",
     "--start",
     type=click.DateTime(),
+    required=True,
     help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
 )
 @click.option(
@@ -597,18 +705,134 @@ def data_yfinance_group():
     help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
 )
 @click.option(
-    "-p",
-    "--persist",
+    "--dry-run",
     is_flag=True,
     default=False,
-    help="Persist the result to your DB.",
+    help="Only print the ranges that would be fetched.",
 )
 @click.option(
-    "-r",
-    "--rows",
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="ignore",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'ignore'.",
+)
+@click.option(
+    "--queue-depth",
     type=int,
-    help="Maximal number of rows displayed. Defaults to 10. For all rows use -1",
-    default=10,
+    default=premia.data.DEFAULT_QUEUE_DEPTH,
+    help="Maximal number of fetched results waiting to be written.",
+)
+@click.option(
+    "--batch-rows",
+    type=int,
+    default=premia.data.DEFAULT_BATCH_SIZE,
+    help="Number of rows that are combined into one write.",
+)
+def data_sync(
+    instrument: premia.InstrumentType,
+    symbols: tuple[str, ...],
+    provider: premia.data.SyncProvider,
+    start: datetime,
+    end: datetime,
+    dry_run: bool,
+    on_conflict: premia.db.OnConflict,
+    queue_depth: int,
+    batch_rows: int,
+):
+    """Import only the candles of SYMBOLS that are missing from the base table of an INSTRUMENT."""
+    try:
+        if dry_run:
+            ranges, _, _ = premia.data.plan_sync(
+                instrument, list(symbols), start, end
+            )
+            utils.echo_list(
+                [str(sync_range) for sync_range in ranges], name="ranges"
+            )
+            return
+
+        report = premia.data.sync(
+            instrument,
+            list(symbols),
+            start,
+            end,
+            provider=provider,
+            on_progress=utils.echo_progress,
+            on_conflict=on_conflict,
+            queue_depth=queue_depth,
+            batch_size=batch_rows,
+        )
+        click.echo()
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.command("run")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--restart",
+    is_flag=True,
+    default=False,
+    help="Clear the checkpoints of the manifest and run all of its chunks again.",
+)
+def data_run(manifest: str, restart: bool):
+    """Run the ingestion jobs of a MANIFEST, resuming from its last checkpoints."""
+    try:
+        reports = premia.data.run_manifest(
+            manifest, on_progress=utils.echo_progress, restart=restart
+        )
+        click.echo()
+        for provider, report in reports.items():
+            click.echo(f"{provider}:")
+            utils.echo_report(report)
+        if any(report.failures for report in reports.values()):
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.command("contracts")
+@click.argument(
+    "files",
+    nargs=-1,
+    type=click.Path(exists=True, dir_okay=False),
+)
+def data_contracts(files: tuple[str, ...]):
+    """
+    Add the contracts of OCC option symbols to the contracts table. The symbols are read from FILES (Parquet, CSV with a symbol column or one symbol per line) or, without FILES, from the options candle tables.
+    """
+    try:
+        report = premia.data.contracts.import_contracts(list(files) or None)
+        utils.echo_report(report)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.command("calendar")
+@click.option(
+    "-s",
+    "--start-year",
+    type=int,
+    default=datetime.now().year,
+    help="First year of the calendar. Defaults to the current year.",
+)
+@click.option(
+    "-e",
+    "--end-year",
+    type=int,
+    default=datetime.now().year,
+    help="Last year of the calendar. Defaults to the current year.",
+)
+@click.option(
+    "--store",
+    is_flag=True,
+    default=False,
+    help="Write the sessions and holidays to the tables premia.trading_sessions and premia.market_holidays.",
 )
 @click.option(
     "-j",
@@ -626,58 +850,205 @@ def data_yfinance_group():
     default=False,
     help="Print result as CSV.",
 )
-def data_yfinance_stocks(
-    symbol: str,
-    start: datetime,
-    end: datetime,
-    persist: bool,
-    rows: int,
-    as_json: bool,
-    as_csv: bool,
+def data_calendar(
+    start_year: int, end_year: int, store: bool, as_json: bool, as_csv: bool
 ):
+    """Print the exchange holidays between two years and optionally store the trading calendar in your DB."""
     try:
-        df = premia.data.yfinance.stocks(symbol, start, end, persist)
-        utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        if store:
+            sessions = premia.data.calendar.store(start_year, end_year)
+            click.secho(
+                f"Successfully stored {sessions} trading sessions.", fg="green"
+            )
+            return
+
+        df = premia.data.calendar.holidays_df(start_year, end_year)
+        utils.echo_df(df, rows=-1, as_json=as_json, as_csv=as_csv)
     except Exception as e:
         click.secho(e, fg="red", err=True)
         sys.exit(1)
 
 
-@data_group.group("twelvedata")
-def data_twelvedata_group():
-    """Download market data from twelvedata"""
-    pass
-
-
-@data_twelvedata_group.command("stocks")
-@click.argument("symbol")
+@data_group.command("synth")
+@click.option(
+    "-n",
+    "--symbols",
+    type=int,
+    default=100,
+    help="Number of synthetic companies. Defaults to 100.",
+)
 @click.option(
     "-s",
     "--start",
     type=click.DateTime(),
+    required=True,
     help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
 )
 @click.option(
     "-e",
     "--end",
     type=click.DateTime(),
-    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-    help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+    default=datetime.now().strftime("%Y-%m-%d"),
+    help="End date (in UTC) of the data. Defaults to the current day. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
 )
 @click.option(
-    "-p",
-    "--persist",
+    "-i",
+    "--instrument",
+    "instruments",
+    type=click.Choice(INSTRUMENT_CHOICES),
+    multiple=True,
+    help="Instrument to generate candles for. Can be repeated, defaults to all instruments.",
+)
+@click.option(
+    "--contracts",
+    "contracts_per_symbol",
+    type=int,
+    default=20,
+    help="Number of option contracts per company. Defaults to 20.",
+)
+@click.option(
+    "--parquet",
+    "directory",
+    type=click.Path(file_okay=False),
+    help="Write Parquet files to this directory instead of the base tables.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    help="Seed of the random generator. The same seed generates the same data.",
+)
+@click.option(
+    "--gap-rate",
+    type=float,
+    default=0.001,
+    help="Share of stock bars that are left out. Defaults to 0.001.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of threads generating candles. Defaults to 4.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with candles that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--bulk",
     is_flag=True,
     default=False,
-    help="Persist the result to your DB.",
+    help="Rebuild the (symbol, time) index of the table once after the import instead of updating it with every write. Suited for large initial loads.",
 )
+def data_synth(
+    symbols: int,
+    start: datetime,
+    end: datetime,
+    instruments: tuple[premia.InstrumentType, ...],
+    contracts_per_symbol: int,
+    directory: str | None,
+    seed: int,
+    gap_rate: float,
+    workers: int,
+    on_conflict: premia.db.OnConflict,
+    bulk: bool,
+):
+    """Generate synthetic companies, contracts and candles for scale tests."""
+    try:
+        reports = premia.data.synth.synth(
+            symbols,
+            start,
+            end,
+            instruments=list(instruments) or None,
+            contracts_per_symbol=contracts_per_symbol,
+            output="parquet" if directory else "tables",
+            directory=directory or "",
+            seed=seed,
+            gap_rate=gap_rate,
+            workers=workers,
+            on_conflict=on_conflict,
+            on_progress=utils.echo_progress,
+            bulk=bulk,
+        )
+        click.echo()
+        for instrument, report in reports.items():
+            click.echo(f"{instrument}:")
+            utils.echo_report(report)
+        if any(report.failures for report in reports.values()):
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.command("watch")
 @click.option(
-    "-r",
-    "--rows",
-    type=int,
-    help="Maximal number of rows displayed. Defaults to 10. For all rows use -1",
-    default=10,
+    "--stocks",
+    "stock_symbols",
+    multiple=True,
+    help="Stock symbol that should be kept up to date. Can be used multiple times.",
+)
+@click.option(
+    "--options",
+    "option_symbols",
+    multiple=True,
+    help="Option contract that should be kept up to date. Can be used multiple times.",
+)
+@click.option(
+    "-p",
+    "--provider",
+    type=click.Choice(["polygon", "yfinance", "twelvedata"]),
+    default="polygon",
+    help="Provider the bars are fetched from. Defaults to polygon.",
+)
+@click.option(
+    "-d",
+    "--delay",
+    type=float,
+    default=2.0,
+    help="Seconds to wait after a bar closed before fetching it. Defaults to 2.",
 )
+def data_watch(
+    stock_symbols: tuple[str, ...],
+    option_symbols: tuple[str, ...],
+    provider: premia.data.SyncProvider,
+    delay: float,
+):
+    """Keep appending new bars of the symbols to their base tables until stopped."""
+    symbols: dict[premia.InstrumentType, list[str]] = {}
+    if stock_symbols:
+        symbols["stocks"] = list(stock_symbols)
+    if option_symbols:
+        symbols["options"] = list(option_symbols)
+
+    try:
+        if not symbols:
+            raise click.UsageError(
+                "Pass at least one symbol with --stocks or --options."
+            )
+
+        report = premia.data.watch(
+            symbols,
+            provider=provider,
+            delay=timedelta(seconds=delay),
+            on_poll=utils.echo_progress,
+        )
+        click.echo()
+        utils.echo_report(report)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.group("cache")
+def data_cache_group():
+    """Inspect and clear the cache of provider responses"""
+    pass
+
+
+@data_cache_group.command("stats")
 @click.option(
     "-j",
     "--json",
@@ -694,31 +1065,47 @@ def data_twelvedata_group():
     default=False,
     help="Print result as CSV.",
 )
-def data_twelvedata_stocks(
-    symbol: str,
-    start: datetime,
-    end: datetime,
-    persist: bool,
-    rows: int,
-    as_json: bool,
-    as_csv: bool,
-):
+def data_cache_stats(as_json: bool, as_csv: bool):
+    """Show the number of entries and the size of the cache per provider."""
     try:
-        df = premia.data.twelvedata.stocks(symbol, start, end, persist)
-        utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        df = premia.data.cache.stats()
+        utils.echo_df(df, rows=-1, as_json=as_json, as_csv=as_csv)
     except Exception as e:
         click.secho(e, fg="red", err=True)
         sys.exit(1)
 
 
-@data_group.group("polygon")
-def data_polygon_group():
-    """Download market data from polygon"""
+@data_cache_group.command("clear")
+@click.option(
+    "-p",
+    "--provider",
+    type=click.Choice(["polygon", "yfinance", "twelvedata"]),
+    help="Only remove the responses of this provider.",
+)
+@click.option(
+    "--expired",
+    is_flag=True,
+    default=False,
+    help="Only remove responses that have expired.",
+)
+def data_cache_clear(provider: str | None, expired: bool):
+    """Remove cached provider responses."""
+    try:
+        removed = premia.data.cache.clear(provider, expired_only=expired)
+        click.secho(f"Removed {removed} cached responses.", fg="green")
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.group("yfinance")
+def data_yfinance_group():
+    """Download market data from yfinance"""
     pass
 
 
-@data_polygon_group.command("stocks")
-@click.argument("symbol")
+@data_yfinance_group.command("stocks")
+@click.argument("symbols", nargs=-1, required=True)
 @click.option(
     "-s",
     "--start",
@@ -762,8 +1149,8 @@ def data_polygon_group():
     default=False,
     help="Print result as CSV.",
 )
-def data_polygon_stocks(
-    symbol: str,
+def data_yfinance_stocks(
+    symbols: tuple[str, ...],
     start: datetime,
     end: datetime,
     persist: bool,
@@ -772,14 +1159,21 @@ def data_polygon_stocks(
     as_csv: bool,
 ):
     try:
-        df = premia.data.polygon.stocks(symbol, start, end, persist)
+        df = premia.data.yfinance.stocks(list(symbols), start, end, persist)
         utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
     except Exception as e:
         click.secho(e, fg="red", err=True)
         sys.exit(1)
 
 
-@data_polygon_group.command("options")
+@data_group.group("twelvedata")
+def data_twelvedata_group():
+    """Download market data from twelvedata"""
+    pass
+
+
+@data_twelvedata_group.command("stocks")
+@click.argument("symbols", nargs=-1, required=True)
 @click.option(
     "-s",
     "--start",
@@ -823,8 +1217,8 @@ def data_polygon_stocks(
     default=False,
     help="Print result as CSV.",
 )
-def polygon_options(
-    symbol: str,
+def data_twelvedata_stocks(
+    symbols: tuple[str, ...],
     start: datetime,
     end: datetime,
     persist: bool,
@@ -833,26 +1227,614 @@ def polygon_options(
     as_csv: bool,
 ):
     try:
-        df = premia.data.polygon.options(symbol, start, end, persist)
+        df = premia.data.twelvedata.stocks(list(symbols), start, end, persist)
         utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
     except Exception as e:
         click.secho(e, fg="red", err=True)
         sys.exit(1)
 
 
-@data_group.group("csv")
-def data_csv_group():
-    """Import data using CSV files"""
+@data_group.group("polygon")
+def data_polygon_group():
+    """Download market data from polygon"""
+    pass
 
 
-@data_csv_group.command("copy")
-@click.argument("file_path")
+@data_polygon_group.command("stocks")
+@click.argument("symbol")
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-p",
+    "--persist",
+    is_flag=True,
+    default=False,
+    help="Persist the result to your DB.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=premia.data.polygon.DEFAULT_CHUNK_SIZE,
+    help="Number of candles that are fetched and persisted at once.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Continue after the latest candle that has already been persisted in the range.",
+)
+@click.option(
+    "--no-preview",
+    is_flag=True,
+    default=False,
+    help="Only persist the data without printing a preview.",
+)
+@click.option(
+    "-r",
+    "--rows",
+    type=int,
+    help="Maximal number of rows displayed. Defaults to 10. For all rows use -1",
+    default=10,
+)
+@click.option(
+    "-j",
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print result as JSON.",
+)
+@click.option(
+    "-c",
+    "--csv",
+    "as_csv",
+    is_flag=True,
+    default=False,
+    help="Print result as CSV.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+def data_polygon_stocks(
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    persist: bool,
+    chunk_size: int,
+    resume: bool,
+    no_preview: bool,
+    rows: int,
+    as_json: bool,
+    as_csv: bool,
+    on_conflict: premia.db.OnConflict,
+):
+    try:
+        df = premia.data.polygon.stocks(
+            symbol,
+            start,
+            end,
+            persist,
+            chunk_size=chunk_size,
+            resume=resume,
+            preview=not no_preview,
+            on_conflict=on_conflict,
+        )
+        if df is not None:
+            utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        else:
+            click.secho(f"Successfully imported {symbol}.", fg="green")
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("options")
+@click.argument("symbol")
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-p",
+    "--persist",
+    is_flag=True,
+    default=False,
+    help="Persist the result to your DB.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=premia.data.polygon.DEFAULT_CHUNK_SIZE,
+    help="Number of candles that are fetched and persisted at once.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Continue after the latest candle that has already been persisted in the range.",
+)
+@click.option(
+    "--no-preview",
+    is_flag=True,
+    default=False,
+    help="Only persist the data without printing a preview.",
+)
+@click.option(
+    "-r",
+    "--rows",
+    type=int,
+    help="Maximal number of rows displayed. Defaults to 10. For all rows use -1",
+    default=10,
+)
+@click.option(
+    "-j",
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print result as JSON.",
+)
+@click.option(
+    "-c",
+    "--csv",
+    "as_csv",
+    is_flag=True,
+    default=False,
+    help="Print result as CSV.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+def polygon_options(
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    persist: bool,
+    chunk_size: int,
+    resume: bool,
+    no_preview: bool,
+    rows: int,
+    as_json: bool,
+    as_csv: bool,
+    on_conflict: premia.db.OnConflict,
+):
+    try:
+        df = premia.data.polygon.options(
+            symbol,
+            start,
+            end,
+            persist,
+            chunk_size=chunk_size,
+            resume=resume,
+            preview=not no_preview,
+            on_conflict=on_conflict,
+        )
+        if df is not None:
+            utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        else:
+            click.secho(f"Successfully imported {symbol}.", fg="green")
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("backfill")
+@click.argument("instrument", type=click.Choice(INSTRUMENT_CHOICES))
+@click.argument("symbols", nargs=-1, required=True)
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    required=True,
+    help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of windows that are fetched concurrently. Defaults to 4.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--queue-depth",
+    type=int,
+    default=premia.data.DEFAULT_QUEUE_DEPTH,
+    help="Maximal number of fetched results waiting to be written.",
+)
+@click.option(
+    "--batch-rows",
+    type=int,
+    default=premia.data.DEFAULT_BATCH_SIZE,
+    help="Number of rows that are combined into one write.",
+)
+@click.option(
+    "--bulk",
+    is_flag=True,
+    default=False,
+    help="Rebuild the (symbol, time) index of the table once after the import instead of updating it with every write. Suited for large initial loads.",
+)
+def data_polygon_backfill(
+    instrument: premia.InstrumentType,
+    symbols: tuple[str, ...],
+    start: datetime,
+    end: datetime,
+    workers: int,
+    on_conflict: premia.db.OnConflict,
+    queue_depth: int,
+    batch_rows: int,
+    bulk: bool,
+):
+    """Import the candles of many SYMBOLS into the base table of an INSTRUMENT."""
+    try:
+        report = premia.data.polygon.backfill(
+            instrument,
+            list(symbols),
+            start,
+            end,
+            workers=workers,
+            on_conflict=on_conflict,
+            queue_depth=queue_depth,
+            batch_size=batch_rows,
+            bulk=bulk,
+        )
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("trades")
+@click.argument("instrument", type=click.Choice(INSTRUMENT_CHOICES))
+@click.argument("symbols", nargs=-1, required=True)
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    required=True,
+    help="Start date (in UTC) of the data. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    help="End date (in UTC) of the data. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of windows that are fetched concurrently. Defaults to 4.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--keep-trades",
+    is_flag=True,
+    default=False,
+    help="Also store the raw trades in the instrument's trades table.",
+)
+@click.option(
+    "--queue-depth",
+    type=int,
+    default=premia.data.DEFAULT_QUEUE_DEPTH,
+    help="Maximal number of fetched results waiting to be written.",
+)
+@click.option(
+    "--batch-rows",
+    type=int,
+    default=premia.data.DEFAULT_BATCH_SIZE,
+    help="Number of rows that are combined into one write.",
+)
+def data_polygon_trades(
+    instrument: premia.InstrumentType,
+    symbols: tuple[str, ...],
+    start: datetime,
+    end: datetime,
+    workers: int,
+    on_conflict: premia.db.OnConflict,
+    keep_trades: bool,
+    queue_depth: int,
+    batch_rows: int,
+):
+    """Build the candles of an INSTRUMENT's base table from the trades of SYMBOLS."""
+    try:
+        report = premia.data.polygon.trades(
+            instrument,
+            list(symbols),
+            start,
+            end,
+            workers=workers,
+            on_conflict=on_conflict,
+            keep_trades=keep_trades,
+            queue_depth=queue_depth,
+            batch_size=batch_rows,
+        )
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("stream")
+@click.argument("instrument", type=click.Choice(INSTRUMENT_CHOICES))
+@click.argument("symbols", nargs=-1, required=True)
+@click.option(
+    "--flush-interval",
+    type=int,
+    default=premia.data.polygon.DEFAULT_FLUSH_INTERVAL,
+    help="Milliseconds after which buffered bars are written to the DB.",
+)
+@click.option(
+    "--flush-rows",
+    type=int,
+    default=premia.data.polygon.DEFAULT_FLUSH_ROWS,
+    help="Number of buffered bars after which they are written to the DB.",
+)
+@click.option(
+    "--url",
+    help="URL of the websocket server. Defaults to polygon.io's server for the INSTRUMENT.",
+)
+def data_polygon_stream(
+    instrument: premia.InstrumentType,
+    symbols: tuple[str, ...],
+    flush_interval: int,
+    flush_rows: int,
+    url: str | None,
+):
+    """Stream the live bars of SYMBOLS into the base table of an INSTRUMENT until stopped."""
+    try:
+        report = premia.data.polygon.stream(
+            instrument,
+            list(symbols),
+            flush_interval=flush_interval,
+            flush_rows=flush_rows,
+            url=url,
+            on_flush=utils.echo_progress,
+        )
+        click.echo()
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("options-chain")
+@click.argument("underlying")
+@click.option(
+    "--expiration-start",
+    type=click.DateTime(["%Y-%m-%d"]),
+    required=True,
+    help="Only import contracts expiring at or after this date, e.g. '2024-02-02'.",
+)
+@click.option(
+    "--expiration-end",
+    type=click.DateTime(["%Y-%m-%d"]),
+    required=True,
+    help="Only import contracts expiring at or before this date, e.g. '2024-03-15'.",
+)
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    required=True,
+    help="Start date (in UTC) of the candles. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    default=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    help="End date (in UTC) of the candles. Defaults to the current moment. Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of contracts that are fetched concurrently. Defaults to 4.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--queue-depth",
+    type=int,
+    default=premia.data.DEFAULT_QUEUE_DEPTH,
+    help="Maximal number of fetched results waiting to be written.",
+)
+@click.option(
+    "--batch-rows",
+    type=int,
+    default=premia.data.DEFAULT_BATCH_SIZE,
+    help="Number of rows that are combined into one write.",
+)
+def data_polygon_options_chain(
+    underlying: str,
+    expiration_start: datetime,
+    expiration_end: datetime,
+    start: datetime,
+    end: datetime,
+    workers: int,
+    on_conflict: premia.db.OnConflict,
+    queue_depth: int,
+    batch_rows: int,
+):
+    """Import the contracts and candles of an UNDERLYING's option chain."""
+    try:
+        report = premia.data.polygon.options_chain(
+            underlying,
+            expiration_start.date(),
+            expiration_end.date(),
+            start,
+            end,
+            workers=workers,
+            on_progress=utils.echo_progress,
+            on_conflict=on_conflict,
+            queue_depth=queue_depth,
+            batch_size=batch_rows,
+        )
+        click.echo()
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_polygon_group.command("market-day")
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(["%Y-%m-%d"]),
+    required=True,
+    help="First trading day that should be imported, e.g. '2024-01-02'.",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(["%Y-%m-%d"]),
+    default=datetime.now().strftime("%Y-%m-%d"),
+    help="Last trading day that should be imported. Defaults to today.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of days that are fetched concurrently. Defaults to 4.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--queue-depth",
+    type=int,
+    default=premia.data.DEFAULT_QUEUE_DEPTH,
+    help="Maximal number of fetched results waiting to be written.",
+)
+@click.option(
+    "--batch-rows",
+    type=int,
+    default=premia.data.DEFAULT_BATCH_SIZE,
+    help="Number of rows that are combined into one write.",
+)
+def data_polygon_market_day(
+    start: datetime,
+    end: datetime,
+    workers: int,
+    on_conflict: premia.db.OnConflict,
+    queue_depth: int,
+    batch_rows: int,
+):
+    """Import the daily candles of all US stocks with one request per day."""
+    try:
+        report = premia.data.polygon.market_day(
+            start.date(),
+            end.date(),
+            workers=workers,
+            on_conflict=on_conflict,
+            queue_depth=queue_depth,
+            batch_size=batch_rows,
+        )
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.group("csv")
+def data_csv_group():
+    """Import data using CSV files"""
+
+
+@data_csv_group.command("copy")
+@click.argument("file_paths", nargs=-1, required=True)
 @click.option(
     "-t",
     "--table",
     "table_name",
     help="Name of the table the data should be stored in.",
 )
+@click.option(
+    "--no-preview",
+    is_flag=True,
+    default=False,
+    help="Only persist the data without printing a preview.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=4,
+    help="Number of workers used when copying multiple files. Defaults to 4.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    type=int,
+    default=100,
+    help="Number of files copied in one transaction when copying multiple files. Defaults to 100.",
+)
 @click.option(
     "-r",
     "--rows",
@@ -876,17 +1858,229 @@ def data_csv_group():
     default=False,
     help="Print result as CSV.",
 )
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+@click.option(
+    "--bulk",
+    is_flag=True,
+    default=False,
+    help="Rebuild the (symbol, time) index of the table once after the import instead of updating it with every write. Suited for large initial loads.",
+)
 def data_csv_copy(
-    file_path: str,
+    file_paths: tuple[str, ...],
     table_name: str | None,
+    no_preview: bool,
+    workers: int,
+    batch_size: int,
+    on_conflict: premia.db.OnConflict,
     rows: int,
     as_json: bool,
     as_csv: bool,
+    bulk: bool,
 ):
-    """Copy data from a CSV and optionally store it in your DB by specifying a table name."""
+    """
+    Copy data from CSV files and optionally store it in your DB by specifying a table name.
+    FILE_PATHS can be files, glob patterns or directories. Gzip and zstd compressed files are supported.
+    """
     try:
-        df = premia.data.csv.copy(file_path, table_name)
-        utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        if len(file_paths) == 1 and os.path.isfile(file_paths[0]) and not bulk:
+            df = premia.data.csv.copy(
+                file_paths[0],
+                table_name,
+                preview=not no_preview,
+                on_conflict=on_conflict,
+            )
+            if df is not None:
+                utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+            else:
+                click.secho(
+                    f"Successfully copied '{file_paths[0]}' to '{table_name}'.",
+                    fg="green",
+                )
+            return
+
+        if table_name is None:
+            raise click.UsageError(
+                "Copying multiple files or in bulk requires a table name (--table)."
+            )
+
+        report = premia.data.csv.copy_many(
+            list(file_paths),
+            table_name,
+            workers=workers,
+            batch_size=batch_size,
+            on_conflict=on_conflict,
+            bulk=bulk,
+        )
+        utils.echo_report(report)
+        if report.failures:
+            sys.exit(1)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.group("trades")
+def data_trades_group():
+    """Build candles from trade files"""
+
+
+@data_trades_group.command("copy")
+@click.argument("instrument", type=click.Choice(INSTRUMENT_CHOICES))
+@click.argument("file_paths", nargs=-1, required=True)
+@click.option(
+    "-s",
+    "--symbol",
+    help="Symbol of all trades, if the files don't have a symbol column.",
+)
+@click.option(
+    "--keep-trades",
+    is_flag=True,
+    default=False,
+    help="Also store the raw trades in the instrument's trades table.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(ON_CONFLICT_CHOICES),
+    default="error",
+    help="What to do with rows that are already stored: fail, skip them or update them. Defaults to 'error'.",
+)
+def data_trades_copy(
+    instrument: premia.InstrumentType,
+    file_paths: tuple[str, ...],
+    symbol: str | None,
+    keep_trades: bool,
+    on_conflict: premia.db.OnConflict,
+):
+    """
+    Build the candles of an INSTRUMENT's base table from CSV or Parquet files of trades.
+    The files need a time, a price and a size column, integer times are nanoseconds since the epoch.
+    """
+    try:
+        report = premia.data.trades.copy(
+            list(file_paths),
+            instrument,
+            symbol=symbol,
+            on_conflict=on_conflict,
+            keep_trades=keep_trades,
+        )
+        utils.echo_report(report)
+    except Exception as e:
+        click.secho(e, fg="red", err=True)
+        sys.exit(1)
+
+
+@data_group.group("parquet")
+def data_parquet_group():
+    """Import data using Parquet or Arrow IPC files"""
+
+
+@data_parquet_group.command("copy")
+@click.argument("file_paths", nargs=-1, required=True)
+@click.option(
+    "-t",
+    "--table",
+    "table_name",
+    help="Name of the table the data should be stored in.",
+)
+@click.option(
+    "-i",
+    "--instrument",
+    type=click.Choice(INSTRUMENT_CHOICES),
+    help="Store the data in the base table of an instrument.",
+)
+@click.option(
+    "-S",
+    "--symbol",
+    "symbols",
+    multiple=True,
+    help="Only import rows of this symbol. Can be used multiple times.",
+)
+@click.option(
+    "-s",
+    "--start",
+    type=click.DateTime(),
+    help="Only import rows at or after this date (in UTC). Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "-e",
+    "--end",
+    type=click.DateTime(),
+    help="Only import rows at or before this date (in UTC). Can have the following formats: '2008-09-15', '2008-09-15T09:30:00', '2008-09-15 09:30:00'",
+)
+@click.option(
+    "--no-preview",
+    is_flag=True,
+    default=False,
+    help="Only persist the data without printing a preview.",
+)
+@click.option(
+    "-r",
+    "--rows",
+    type=int,
+    help="Maximal number of rows displayed. Defaults to 10. For all rows use -1",
+    default=10,
+)
+@click.option(
+    "-j",
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print result as JSON.",
+)
+@click.option(
+    "-c",
+    "--csv",
+    "as_csv",
+    is_flag=True,
+    default=False,
+    help="Print result as CSV.",
+)
+@click.option(
+    "--bulk",
+    is_flag=True,
+    default=False,
+    help="Rebuild the (symbol, time) index of the table once after the import instead of updating it with every write. Suited for large initial loads.",
+)
+def data_parquet_copy(
+    file_paths: tuple[str, ...],
+    table_name: str | None,
+    instrument: premia.InstrumentType | None,
+    symbols: tuple[str, ...],
+    start: datetime | None,
+    end: datetime | None,
+    no_preview: bool,
+    rows: int,
+    as_json: bool,
+    as_csv: bool,
+    bulk: bool,
+):
+    """
+    Copy data from Parquet or Arrow IPC files and optionally store it in your DB by specifying a table name or an instrument.
+    FILE_PATHS can be files or glob patterns.
+    """
+    try:
+        df = premia.data.parquet.copy(
+            list(file_paths),
+            table_name,
+            instrument=instrument,
+            symbols=list(symbols),
+            start=start,
+            end=end,
+            preview=not no_preview,
+            bulk=bulk,
+        )
+        if df is not None:
+            utils.echo_df(df, rows=rows, as_json=as_json, as_csv=as_csv)
+        else:
+            click.secho(
+                f"Successfully copied {len(file_paths)} file(s).", fg="green"
+            )
     except Exception as e:
         click.secho(e, fg="red", err=True)
         sys.exit(1)
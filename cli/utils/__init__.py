@@ -1,7 +1,15 @@
-from ._internal.echo import echo_df, echo_list, echo_iter
+from ._internal.echo import (
+    echo_df,
+    echo_list,
+    echo_iter,
+    echo_report,
+    echo_progress,
+)
 
 __all__ = [
     "echo_df",
     "echo_list",
     "echo_iter",
+    "echo_report",
+    "echo_progress",
 ]
@@ -3,6 +3,7 @@ from typing import Iterator
 import yaml
 import pandas as pd
 import click
+from premia.data import ImportReport
 from .loader import Loader
 
 
@@ -54,3 +55,32 @@ def echo_iter(iterator: Iterator[str]) -> None:
         loader.stop()
         click.echo(value, nl=False)
     click.echo()
+
+
+def echo_report(report: ImportReport) -> None:
+    """
+    Print the summary of an import to stdout and its failures to stderr.
+    """
+    conflicts = ""
+    if report.updated or report.skipped:
+        conflicts = f" ({report.updated} updated, {report.skipped} skipped)"
+
+    click.secho(
+        f"Imported {report.rows} rows{conflicts} from {report.tasks - len(report.failures)}/{report.tasks} {report.unit} "
+        f"in {report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s).",
+        fg="red" if report.failures else "green",
+    )
+    for task, error in report.failures.items():
+        click.secho(f"{task}: {error}", fg="red", err=True)
+
+
+def echo_progress(report: ImportReport) -> None:
+    """
+    Print the progress of a running import to stdout, overwriting the
+    previous progress line.
+    """
+    click.echo(
+        f"\r{report.completed}/{report.tasks} {report.unit}, {report.rows} rows "
+        f"({report.rows_per_second:,.0f} rows/s)",
+        nl=False,
+    )
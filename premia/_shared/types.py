@@ -1,5 +1,6 @@
 from typing import Literal, TypeAlias
 from dataclasses import dataclass
+from datetime import timedelta
 
 
 ModelType: TypeAlias = Literal["remote", "local"]
@@ -20,6 +21,7 @@ class TimespanInfo:
     twelvedata_code: str | None
     yfinance_code: str | None
     unit: Timespan
+    duration: timedelta
     bigger_timespans: list[Timespan]
 
 
@@ -29,6 +31,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code=None,
         yfinance_code=None,
         unit="second",
+        duration=timedelta(seconds=1),
         bigger_timespans=[
             "minute",
             "hour",
@@ -42,6 +45,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code="min",
         yfinance_code="m",
         unit="minute",
+        duration=timedelta(minutes=1),
         bigger_timespans=[
             "hour",
             "day",
@@ -54,6 +58,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code="h",
         yfinance_code="h",
         unit="hour",
+        duration=timedelta(hours=1),
         bigger_timespans=[
             "day",
             "week",
@@ -65,6 +70,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code="day",
         yfinance_code="d",
         unit="day",
+        duration=timedelta(days=1),
         bigger_timespans=[
             "week",
             "month",
@@ -75,6 +81,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code="week",
         yfinance_code="wk",
         unit="week",
+        duration=timedelta(weeks=1),
         bigger_timespans=["month"],
     ),
     "month": TimespanInfo(
@@ -82,6 +89,7 @@ timespan_info: dict[Timespan, TimespanInfo] = {
         twelvedata_code="month",
         yfinance_code="mo",
         unit="month",
+        duration=timedelta(days=30),
         bigger_timespans=[],
     ),
 }
@@ -15,14 +15,17 @@ from ._internal.public import (
     get_providers_str,
     get_provider_polygon,
     get_provider_twelvedata,
+    get_provider_rate_limit,
     remove_ai,
     remove_db,
     remove_db_instrument,
+    remove_provider_rate_limit,
     set_ai_local,
     set_ai_remote,
     set_db_instrument,
     set_provider_polygon,
     set_provider_twelvedata,
+    set_provider_rate_limit,
     update_ai,
     update_ai_local,
 )
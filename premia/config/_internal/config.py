@@ -9,6 +9,7 @@ from .types import (
     ConfigFileData,
     FormatOption,
     ProvidersConfig,
+    RateLimitConfig,
     InstrumentConfig,
     DbConfig,
     AiConfig,
@@ -335,6 +336,38 @@ def get_twelvedata_config() -> str | None:
     return providers_config.get("twelvedata")
 
 
+def set_rate_limit_config(
+    provider: str, requests: int, seconds: float
+) -> RateLimitConfig:
+    if requests < 1 or seconds <= 0:
+        raise errors.ConfigError(
+            "A rate limit needs at least one request in a positive number of seconds."
+        )
+
+    config_file_data = get_config()
+    providers_config = config_file_data.get("providers", {})
+    rate_limits = providers_config.get("rate_limits", {})
+
+    rate_limits[provider] = RateLimitConfig(requests=requests, seconds=seconds)
+    providers_config["rate_limits"] = rate_limits
+    config_file_data["providers"] = providers_config
+    save_config_file(config_file_data)
+
+    return rate_limits[provider]
+
+
+def remove_rate_limit_config(provider: str) -> None:
+    config_file_data = get_config()
+    rate_limits = config_file_data.get("providers", {}).get("rate_limits", {})
+    if rate_limits.pop(provider, None) is not None:
+        save_config_file(config_file_data)
+
+
+def get_rate_limit_config(provider: str) -> RateLimitConfig | None:
+    providers_config = get_providers_config() or ProvidersConfig()
+    return providers_config.get("rate_limits", {}).get(provider)
+
+
 def get_providers_config_str(fmt: FormatOption = "yaml") -> str:
     providers_config = get_providers_config()
     if providers_config is None:
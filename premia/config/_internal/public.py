@@ -13,12 +13,15 @@ from .config import (
     get_remote_ai_config_or_raise,
     get_polygon_config_or_raise,
     get_twelvedata_config_or_raise,
+    get_rate_limit_config,
     remove_ai_model_config,
     remove_db_or_raise,
     remove_instrument_config,
+    remove_rate_limit_config,
     set_instrument_config,
     set_local_model,
     set_polygon_config,
+    set_rate_limit_config,
     set_remote_model,
     set_ai_config,
     set_local_ai_config,
@@ -39,13 +42,16 @@ get_providers = get_providers_config_or_raise
 get_providers_str = get_providers_config_str
 get_provider_polygon = get_polygon_config_or_raise
 get_provider_twelvedata = get_twelvedata_config_or_raise
+get_provider_rate_limit = get_rate_limit_config
 remove_ai = remove_ai_model_config
 remove_db = remove_db_or_raise
 remove_db_instrument = remove_instrument_config
+remove_provider_rate_limit = remove_rate_limit_config
 set_ai_local = set_local_model
 set_ai_remote = set_remote_model
 set_db_instrument = set_instrument_config
 set_provider_polygon = set_polygon_config
 set_provider_twelvedata = set_twelvedata_config
+set_provider_rate_limit = set_rate_limit_config
 update_ai = set_ai_config
 update_ai_local = set_local_ai_config
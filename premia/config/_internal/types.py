@@ -5,9 +5,15 @@ from premia._shared import InstrumentType, Timespan, ModelType
 FormatOption: TypeAlias = Literal["yaml", "json"]
 
 
+class RateLimitConfig(TypedDict):
+    requests: int
+    seconds: float
+
+
 class ProvidersConfig(TypedDict):
     twelvedata: NotRequired[str]
     polygon: NotRequired[str]
+    rate_limits: NotRequired[dict[str, RateLimitConfig]]
 
 
 class InstrumentConfig(TypedDict):
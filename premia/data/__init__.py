@@ -1,13 +1,61 @@
 from ._internal.errors import DataError
-from ._internal.types import ProviderType, MarketDataRow
-from . import yfinance, twelvedata, polygon, csv
+from ._internal.types import ProviderType, ImportReport
+from ._internal.batch import CandleBatch
+from ._internal.pipeline import (
+    run_pipeline,
+    DEFAULT_QUEUE_DEPTH,
+    DEFAULT_BATCH_SIZE,
+)
+from . import (
+    cache,
+    replay,
+    ratelimit,
+    calendar,
+    trades,
+    yfinance,
+    twelvedata,
+    polygon,
+    csv,
+    parquet,
+    contracts,
+    synth,
+)
+from ._internal.sync import sync, plan_sync, SyncRange, SyncProvider
+from ._internal.watch import watch
+from ._internal.manifest import (
+    run_manifest,
+    load_manifest,
+    Manifest,
+    ManifestJob,
+)
 
 __all__ = [
     "DataError",
     "ProviderType",
-    "MarketDataRow",
+    "CandleBatch",
+    "ImportReport",
+    "run_pipeline",
+    "DEFAULT_QUEUE_DEPTH",
+    "DEFAULT_BATCH_SIZE",
+    "cache",
+    "replay",
+    "ratelimit",
+    "calendar",
+    "trades",
     "yfinance",
     "twelvedata",
     "polygon",
     "csv",
+    "parquet",
+    "contracts",
+    "synth",
+    "sync",
+    "plan_sync",
+    "SyncRange",
+    "SyncProvider",
+    "watch",
+    "run_manifest",
+    "load_manifest",
+    "Manifest",
+    "ManifestJob",
 ]
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import Iterable
+import numpy as np
+import pandas as pd
+
+
+def to_categorical(values: str | Iterable[str], length: int) -> pd.Categorical:
+    if isinstance(values, str):
+        return pd.Categorical.from_codes(
+            np.zeros(length, dtype=np.int8), categories=[values]
+        )
+    if isinstance(values, pd.Categorical):
+        return values
+
+    return pd.Categorical(values)
+
+
+@dataclass
+class CandleBatch:
+    """
+    Array-backed batch of candles. Prices are float64, volumes int64 and times
+    int64 milliseconds since the epoch (UTC). Symbols, currencies and data
+    providers are dictionary-encoded, so repeated values are stored only once.
+    """
+
+    time: np.ndarray
+    symbol: pd.Categorical
+    open: np.ndarray
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    currency: pd.Categorical
+    data_provider: pd.Categorical
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @classmethod
+    def from_columns(
+        cls,
+        time: Iterable,
+        symbol: str | Iterable[str],
+        open: Iterable,
+        close: Iterable,
+        high: Iterable,
+        low: Iterable,
+        volume: Iterable,
+        data_provider: str | Iterable[str],
+        currency: str | Iterable[str] = "USD",
+    ) -> "CandleBatch":
+        """
+        Create a batch from column values. Scalar symbols, currencies and data
+        providers are broadcast to every row. Datetime columns are converted
+        to epoch milliseconds, naive datetimes are interpreted as UTC.
+        """
+        if not isinstance(time, (pd.Series, pd.Index)):
+            time = np.asarray(time)
+
+        if time.dtype.kind in ("M", "O"):
+            time_index = pd.DatetimeIndex(time)
+            if time_index.tz is not None:
+                time_index = time_index.tz_convert("UTC").tz_localize(None)
+            time_array = time_index.as_unit("ms").asi8
+        else:
+            time_array = np.asarray(time, dtype=np.int64)
+
+        length = len(time_array)
+        volume_array = np.nan_to_num(
+            np.asarray(volume, dtype=np.float64), nan=0.0
+        ).astype(np.int64)
+
+        return cls(
+            time=time_array,
+            symbol=to_categorical(symbol, length),
+            open=np.asarray(open, dtype=np.float64),
+            close=np.asarray(close, dtype=np.float64),
+            high=np.asarray(high, dtype=np.float64),
+            low=np.asarray(low, dtype=np.float64),
+            volume=volume_array,
+            currency=to_categorical(currency, length),
+            data_provider=to_categorical(data_provider, length),
+        )
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "CandleBatch":
+        return cls.from_columns(
+            time=df["time"],
+            symbol=df["symbol"],
+            open=df["open"],
+            close=df["close"],
+            high=df["high"],
+            low=df["low"],
+            volume=df["volume"],
+            currency=df["currency"],
+            data_provider=df["data_provider"],
+        )
+
+    @classmethod
+    def empty(cls) -> "CandleBatch":
+        return cls.from_columns(
+            time=np.empty(0, dtype=np.int64),
+            symbol=[],
+            open=[],
+            close=[],
+            high=[],
+            low=[],
+            volume=[],
+            currency=[],
+            data_provider=[],
+        )
+
+    @classmethod
+    def concat(cls, batches: list["CandleBatch"]) -> "CandleBatch":
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        def concat_categorical(name: str) -> pd.Categorical:
+            return pd.api.types.union_categoricals(
+                [getattr(batch, name) for batch in batches]
+            )
+
+        return cls(
+            time=np.concatenate([batch.time for batch in batches]),
+            symbol=concat_categorical("symbol"),
+            open=np.concatenate([batch.open for batch in batches]),
+            close=np.concatenate([batch.close for batch in batches]),
+            high=np.concatenate([batch.high for batch in batches]),
+            low=np.concatenate([batch.low for batch in batches]),
+            volume=np.concatenate([batch.volume for batch in batches]),
+            currency=concat_categorical("currency"),
+            data_provider=concat_categorical("data_provider"),
+        )
+
+    def take(self, indices: np.ndarray) -> "CandleBatch":
+        """
+        Return the rows selected by an array of indices or a boolean mask.
+        """
+        return CandleBatch(
+            time=self.time[indices],
+            symbol=self.symbol[indices],
+            open=self.open[indices],
+            close=self.close[indices],
+            high=self.high[indices],
+            low=self.low[indices],
+            volume=self.volume[indices],
+            currency=self.currency[indices],
+            data_provider=self.data_provider[indices],
+        )
+
+    def sort(self) -> "CandleBatch":
+        """
+        Return the rows grouped by symbol and ordered by time within every
+        symbol. Batches that are already in this order are returned as they
+        are.
+        """
+        codes = self.symbol.codes
+        if np.all(
+            (codes[1:] > codes[:-1])
+            | ((codes[1:] == codes[:-1]) & (self.time[1:] >= self.time[:-1]))
+        ):
+            return self
+
+        return self.take(np.lexsort((self.time, codes)))
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Return the batch as a DataFrame in the column order of the candle
+        tables. The numeric arrays are shared with the batch, not copied.
+        """
+        time = pd.DatetimeIndex(
+            self.time.view("datetime64[ms]"), copy=False
+        ).tz_localize("UTC")
+
+        return pd.DataFrame(
+            {
+                "time": time,
+                "symbol": self.symbol,
+                "open": self.open,
+                "close": self.close,
+                "high": self.high,
+                "low": self.low,
+                "volume": self.volume,
+                "currency": self.currency,
+                "data_provider": self.data_provider,
+            },
+            copy=False,
+        )
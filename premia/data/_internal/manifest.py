@@ -0,0 +1,288 @@
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
+import yaml
+from premia._shared import types
+from premia import config, db
+from premia.data import (
+    DataError,
+    ImportReport,
+    run_pipeline,
+    DEFAULT_QUEUE_DEPTH,
+    DEFAULT_BATCH_SIZE,
+)
+from .sync import (
+    SyncProvider,
+    SyncRange,
+    fetchers,
+    provider_instruments,
+    closed_until,
+    fetch_range,
+    record_synced,
+)
+
+DEFAULT_CHUNK_DAYS = 30
+DEFAULT_SYMBOLS_PER_CHUNK = 100
+
+
+@dataclass
+class ManifestJob:
+    name: str
+    instrument: types.InstrumentType
+    provider: SyncProvider
+    symbols: list[str]
+    start: datetime
+    end: datetime
+    chunk_days: float = DEFAULT_CHUNK_DAYS
+    symbols_per_chunk: int = DEFAULT_SYMBOLS_PER_CHUNK
+    workers: int = 4
+    queue_depth: int = DEFAULT_QUEUE_DEPTH
+    batch_size: int = DEFAULT_BATCH_SIZE
+    on_conflict: db.OnConflict = "ignore"
+    bulk: bool = False
+
+    def chunks(self) -> list[SyncRange]:
+        """
+        Split the job into chunks of at most symbols_per_chunk symbols and
+        chunk_days days.
+        """
+        chunk_duration = timedelta(days=self.chunk_days)
+        chunks: list[SyncRange] = []
+        for i in range(0, len(self.symbols), self.symbols_per_chunk):
+            chunk_symbols = self.symbols[i : i + self.symbols_per_chunk]
+            chunk_start = self.start
+            while chunk_start < self.end:
+                chunk_end = min(chunk_start + chunk_duration, self.end)
+                chunks.append(SyncRange(chunk_symbols, chunk_start, chunk_end))
+                chunk_start = chunk_end
+
+        return chunks
+
+
+@dataclass
+class Manifest:
+    name: str
+    jobs: list[ManifestJob]
+
+
+def load_manifest(path: str) -> Manifest:
+    """
+    Load an ingestion manifest from a YAML file:
+
+        name: us-equities
+        universes:
+          tech: [AAPL, MSFT, NVDA]
+          sp500: sp500.txt
+        jobs:
+          - name: tech-minutes
+            instrument: stocks
+            provider: polygon
+            symbols: tech
+            start: 2020-01-01
+            end: 2024-01-01
+            chunk_days: 30
+            workers: 8
+
+    A universe is a list of symbols or a file with one symbol per line,
+    relative to the manifest. The symbols of a job are a list or the name of
+    a universe. The name of the manifest defaults to the file name and is
+    part of the checkpoints, like the names of its jobs. Jobs that load
+    large ranges can set `bulk: true` to rebuild the index of their table
+    once after the job.
+    """
+    try:
+        with open(path) as file:
+            content = yaml.safe_load(file) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise DataError(f"Failed to read manifest '{path}': {e}")
+
+    if not isinstance(content, dict) or not content.get("jobs"):
+        raise DataError(f"Manifest '{path}' doesn't define any jobs")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    universes = {
+        name: load_universe(universe, base_dir)
+        for name, universe in (content.get("universes") or {}).items()
+    }
+    default_name = os.path.splitext(os.path.basename(path))[0]
+
+    return Manifest(
+        name=str(content.get("name", default_name)),
+        jobs=[
+            parse_job(job, i, universes)
+            for i, job in enumerate(content["jobs"])
+        ],
+    )
+
+
+def load_universe(universe: Any, base_dir: str) -> list[str]:
+    if isinstance(universe, list):
+        return [str(symbol) for symbol in universe]
+
+    file_path = os.path.join(base_dir, str(universe))
+    try:
+        with open(file_path) as file:
+            return [line.strip() for line in file if line.strip()]
+    except OSError as e:
+        raise DataError(f"Failed to read universe '{file_path}': {e}")
+
+
+def parse_job(
+    job: dict[str, Any], index: int, universes: dict[str, list[str]]
+) -> ManifestJob:
+    name = str(job.get("name", index))
+    missing_keys = [
+        key
+        for key in ("instrument", "provider", "symbols", "start", "end")
+        if key not in job
+    ]
+    if missing_keys:
+        raise DataError(
+            f"Job '{name}' is missing the keys: {', '.join(missing_keys)}"
+        )
+
+    instrument, provider = job["instrument"], job["provider"]
+    if instrument not in provider_instruments.get(provider, []):
+        raise DataError(
+            f"Job '{name}': importing {instrument} from '{provider}' is not supported"
+        )
+
+    symbols = job["symbols"]
+    if isinstance(symbols, str):
+        if symbols not in universes:
+            raise DataError(f"Job '{name}': unknown universe '{symbols}'")
+        symbols = universes[symbols]
+
+    return ManifestJob(
+        name=name,
+        instrument=instrument,
+        provider=provider,
+        symbols=[str(symbol) for symbol in symbols],
+        start=to_datetime(job["start"]),
+        end=to_datetime(job["end"]),
+        chunk_days=job.get("chunk_days", DEFAULT_CHUNK_DAYS),
+        symbols_per_chunk=job.get(
+            "symbols_per_chunk", DEFAULT_SYMBOLS_PER_CHUNK
+        ),
+        workers=job.get("workers", 4),
+        queue_depth=job.get("queue_depth", DEFAULT_QUEUE_DEPTH),
+        batch_size=job.get("batch_size", DEFAULT_BATCH_SIZE),
+        on_conflict=job.get("on_conflict", "ignore"),
+        bulk=job.get("bulk", False),
+    )
+
+
+def to_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise DataError(f"Invalid date in manifest: '{value}'")
+
+
+def run_job(
+    manifest_name: str,
+    job: ManifestJob,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    restart=False,
+) -> ImportReport:
+    """
+    Run the chunks of a job that haven't been completed by a previous run.
+    A chunk is checkpointed after its candles have been committed, so a
+    chunk that was written but not checkpointed when a run stopped is only
+    fetched again and its rows are resolved by on_conflict.
+
+    Chunks are only fetched up to the last closed bar. Chunks that end after
+    it are recorded as covered up to it, but not checkpointed, so the next
+    run completes them.
+    """
+    con = db.connect()
+    checkpoint_job = f"{manifest_name}/{job.name}"
+    if restart:
+        db.clear_checkpoints(checkpoint_job, con)
+
+    instrument_config = config.get_db_instrument(job.instrument)
+    table_name = instrument_config["base_table"]
+    timespan = instrument_config["timespan"]
+    fetch = fetchers[job.provider]
+    closed_end = closed_until(datetime.utcnow(), timespan)
+
+    completed_chunks = db.checkpoints(checkpoint_job, con)
+    chunks = [
+        chunk
+        for chunk in job.chunks()
+        if str(chunk) not in completed_chunks and chunk.start < closed_end
+    ]
+
+    def closed_chunk(chunk: SyncRange) -> SyncRange:
+        end = min(chunk.end, closed_end)
+        return SyncRange(chunk.symbols, chunk.start, end)
+
+    # Only symbols with recorded coverage are extended, the coverage of the
+    # others is derived from the table by the next sync.
+    coverage = db.coverage(table_name, job.symbols, con)
+
+    def record_chunks(written_chunks: list[SyncRange]) -> None:
+        closed_chunks = [
+            chunk for chunk in written_chunks if chunk.end <= closed_end
+        ]
+        db.record_checkpoints(
+            checkpoint_job, [str(chunk) for chunk in closed_chunks], con
+        )
+        for chunk in written_chunks:
+            covered_chunk = SyncRange(
+                [symbol for symbol in chunk.symbols if symbol in coverage],
+                chunk.start,
+                min(chunk.end, closed_end),
+            )
+            record_synced(table_name, [covered_chunk], coverage, con)
+
+    return run_pipeline(
+        chunks,
+        lambda chunk: fetch_range(fetch, closed_chunk(chunk), timespan),
+        table_name,
+        workers=job.workers,
+        queue_depth=job.queue_depth,
+        batch_size=job.batch_size,
+        on_conflict=job.on_conflict,
+        bulk=job.bulk,
+        on_progress=on_progress,
+        on_written=record_chunks,
+        unit="chunks",
+    )
+
+
+def run_manifest(
+    manifest: Manifest | str,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    restart=False,
+) -> dict[SyncProvider, ImportReport]:
+    """
+    Run the jobs of a manifest one after another. Progress is checkpointed
+    in the `premia` schema per chunk, so a rerun resumes with the chunks
+    that haven't been committed yet. If restart is True the checkpoints of
+    the manifest are cleared first.
+
+    Returns the summary of every provider over all its jobs. Failures are
+    prefixed with the name of their job.
+    """
+    if isinstance(manifest, str):
+        manifest = load_manifest(manifest)
+
+    reports: dict[SyncProvider, ImportReport] = {}
+    for job in manifest.jobs:
+        report = run_job(manifest.name, job, on_progress, restart)
+        report.failures = {
+            f"{job.name}: {chunk}": error
+            for chunk, error in report.failures.items()
+        }
+        reports.setdefault(job.provider, ImportReport(unit="chunks")).merge(
+            report
+        )
+
+    return reports
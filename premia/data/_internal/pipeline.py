@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TypeVar
+import duckdb
+from premia import db
+from .batch import CandleBatch
+from .types import ImportReport
+
+Task = TypeVar("Task")
+
+DEFAULT_QUEUE_DEPTH = 8
+DEFAULT_BATCH_SIZE = 100_000
+
+# Seconds a worker waits for room in the queue before it checks whether the
+# pipeline has been stopped.
+PUT_TIMEOUT = 0.1
+
+
+@dataclass
+class FetchResult:
+    task: Any
+    batch: CandleBatch | None = None
+    error: Exception | None = None
+
+
+def run_pipeline(
+    tasks: Iterable[Task],
+    fetch: Callable[[Task], CandleBatch],
+    table_name: str,
+    workers=4,
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+    on_conflict: db.OnConflict = "error",
+    on_progress: Callable[[ImportReport], None] | None = None,
+    on_written: Callable[[list[Task]], None] | None = None,
+    unit="tasks",
+    bulk=False,
+) -> ImportReport:
+    """
+    Fetch tasks with a pool of worker threads and write their candles into a
+    table with a single writer. The workers put their results into a queue
+    of at most queue_depth results and block while it's full, so memory
+    stays bounded when the writer falls behind. The writer combines results
+    until they reach batch_size rows and writes them with one upsert. If a
+    combined write fails, the results are written one by one to find the
+    failing tasks.
+
+    on_written is called with the tasks whose candles have been written and
+    on_progress with the report after every written batch. If the writer
+    fails, the workers stop after their current task.
+
+    In bulk mode the table's unique index is dropped for the whole run and
+    rebuilt once at the end, and every batch is written sorted by symbol and
+    time. It suits large initial loads, not small incremental appends.
+    """
+    task_list = list(tasks)
+    report = ImportReport(tasks=len(task_list), unit=unit)
+    start_time = time.perf_counter()
+
+    task_iterator = iter(task_list)
+    task_lock = threading.Lock()
+    no_task = object()
+    results: queue.Queue[FetchResult | None] = queue.Queue(maxsize=queue_depth)
+    stop_event = threading.Event()
+
+    def put_result(result: FetchResult | None) -> None:
+        while not stop_event.is_set():
+            try:
+                results.put(result, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+
+    def fetch_tasks() -> None:
+        while not stop_event.is_set():
+            with task_lock:
+                task = next(task_iterator, no_task)
+            if task is no_task:
+                break
+            try:
+                put_result(FetchResult(task, batch=fetch(task)))
+            except Exception as e:
+                put_result(FetchResult(task, error=e))
+        put_result(None)
+
+    con = db.connect()
+    fetchers = [
+        threading.Thread(target=fetch_tasks, daemon=True)
+        for _ in range(min(workers, len(task_list)))
+    ]
+    for fetcher in fetchers:
+        fetcher.start()
+
+    pending: list[FetchResult] = []
+    pending_rows = 0
+
+    def write_pending() -> None:
+        nonlocal pending, pending_rows
+        if not pending:
+            return
+
+        written = write(
+            con,
+            table_name,
+            pending,
+            on_conflict,
+            report,
+            sort=bulk,
+        )
+        report.completed += len(pending)
+        report.seconds = time.perf_counter() - start_time
+        pending, pending_rows = [], 0
+
+        if on_written and written:
+            on_written(written)
+        if on_progress:
+            on_progress(report)
+
+    try:
+        with db.bulk_load(table_name, con) if bulk else nullcontext():
+            running_fetchers = len(fetchers)
+            while running_fetchers > 0:
+                result = results.get()
+                if result is None:
+                    running_fetchers -= 1
+                    continue
+
+                if result.error is not None:
+                    report.failures[str(result.task)] = str(result.error)
+                    report.completed += 1
+                    continue
+
+                pending.append(result)
+                pending_rows += len(result.batch or [])
+                if pending_rows >= batch_size:
+                    write_pending()
+
+            write_pending()
+    finally:
+        # Workers blocked on a full queue see the stop event within the put
+        # timeout, and draining releases the results they already fetched.
+        stop_event.set()
+        while True:
+            try:
+                results.get_nowait()
+            except queue.Empty:
+                break
+        con.close()
+
+    report.seconds = time.perf_counter() - start_time
+    return report
+
+
+def write(
+    con: duckdb.DuckDBPyConnection,
+    table_name: str,
+    pending: list[FetchResult],
+    on_conflict: db.OnConflict,
+    report: ImportReport,
+    sort=False,
+) -> list:
+    """
+    Write the candles of the results with a single upsert, falling back to
+    one upsert per result if that fails. With sort, the candles are written
+    grouped by symbol and ordered by time.
+
+    Returns the tasks whose candles have been written.
+    """
+    try:
+        batch = CandleBatch.concat(
+            [result.batch for result in pending if result.batch is not None]
+        )
+        if sort:
+            batch = batch.sort()
+        report.add(
+            db.upsert(table_name, batch.to_df(), con, on_conflict=on_conflict)
+        )
+        return [result.task for result in pending]
+    except Exception:
+        pass
+
+    written = []
+    for result in pending:
+        try:
+            batch = result.batch or CandleBatch.empty()
+            if sort:
+                batch = batch.sort()
+            report.add(
+                db.upsert(
+                    table_name,
+                    batch.to_df(),
+                    con,
+                    on_conflict=on_conflict,
+                )
+            )
+            written.append(result.task)
+        except Exception as e:
+            report.failures[str(result.task)] = str(e)
+
+    return written
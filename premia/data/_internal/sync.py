@@ -0,0 +1,277 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Literal, TypeAlias
+import numpy as np
+from premia._shared import types
+from premia import config, db
+from premia.data import (
+    DataError,
+    CandleBatch,
+    ImportReport,
+    run_pipeline,
+    DEFAULT_QUEUE_DEPTH,
+    DEFAULT_BATCH_SIZE,
+    calendar,
+    polygon,
+    yfinance,
+    twelvedata,
+)
+
+Interval = tuple[datetime, datetime]
+SyncProvider: TypeAlias = Literal["polygon", "yfinance", "twelvedata"]
+Fetcher = Callable[
+    [list[str], datetime, datetime, types.Timespan],
+    CandleBatch,
+]
+
+fetchers: dict[SyncProvider, Fetcher] = {
+    "polygon": polygon.fetch,
+    "yfinance": yfinance.download,
+    "twelvedata": twelvedata.get_aggregates,
+}
+
+provider_instruments: dict[SyncProvider, list[types.InstrumentType]] = {
+    "polygon": ["stocks", "options"],
+    "yfinance": ["stocks"],
+    "twelvedata": ["stocks"],
+}
+
+# Bars of these timespans are aligned to multiples of their duration.
+ALIGNED_TIMESPANS: list[types.Timespan] = ["second", "minute", "hour"]
+
+
+@dataclass
+class SyncRange:
+    symbols: list[str]
+    start: datetime
+    end: datetime
+
+    def __str__(self) -> str:
+        return f"{','.join(self.symbols)} {self.start.isoformat()} - {self.end.isoformat()}"
+
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def bridge_closed_gaps(
+    intervals: list[Interval], timespan: types.Timespan
+) -> list[Interval]:
+    """
+    Join sorted intervals that are only separated by time without trading,
+    like nights, weekends and holidays. The remaining gaps contain trading
+    time according to the exchange calendar.
+    """
+    bridged: list[Interval] = []
+    for start, end in intervals:
+        if bridged and calendar.prune(bridged[-1][1], start, timespan) is None:
+            bridged[-1] = (bridged[-1][0], end)
+        else:
+            bridged.append((start, end))
+
+    return bridged
+
+
+def missing_intervals(
+    start: datetime, end: datetime, covered: list[Interval]
+) -> list[Interval]:
+    """
+    Return the parts of [start, end) that aren't covered by the sorted,
+    non-overlapping covered intervals.
+    """
+    missing: list[Interval] = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+
+    if cursor < end:
+        missing.append((cursor, end))
+
+    return missing
+
+
+def plan_sync(
+    instrument: types.InstrumentType,
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    con=None,
+) -> tuple[
+    list[SyncRange], dict[str, list[Interval]], dict[str, list[Interval]]
+]:
+    """
+    Plan the ranges that are missing from the instrument's base table. The
+    coverage recorded by previous syncs is used where available; for other
+    symbols it's derived from the table, where a gap between stored bars
+    only counts if it contains trading time. Planning doesn't write to the
+    database, so the derived coverage is returned for `sync` to record.
+    Symbols missing the same range are grouped into one request. The end is
+    capped to the end of the last closed bar, so unfinished bars are never
+    treated as covered.
+    Missing ranges are cut to the exchange's trading hours and ranges
+    without any, like weekends and holidays, aren't reported as missing.
+
+    Returns the planned ranges, the coverage of every symbol and the
+    coverage derived from the table.
+    """
+    con = db.connect() if con is None else con
+    instrument_config = config.get_db_instrument(instrument)
+    table_name = instrument_config["base_table"]
+    timespan = instrument_config["timespan"]
+    duration = types.timespan_info[timespan].duration
+    end = min(end, closed_until(datetime.utcnow(), timespan))
+
+    coverage = db.coverage(table_name, symbols, con)
+    unknown_symbols = [symbol for symbol in symbols if symbol not in coverage]
+    scanned_coverage: dict[str, list[Interval]] = {}
+    if unknown_symbols:
+        # Every missing bar splits the scanned coverage, gaps without
+        # trading time are joined again with the calendar.
+        found_coverage = db.scan_coverage(
+            table_name, unknown_symbols, duration, timedelta(0), con
+        )
+        for symbol in unknown_symbols:
+            scanned_coverage[symbol] = bridge_closed_gaps(
+                found_coverage.get(symbol, []), timespan
+            )
+        coverage.update(scanned_coverage)
+
+    grouped_symbols: dict[Interval, list[str]] = {}
+    for symbol in symbols:
+        for missing_start, missing_end in missing_intervals(
+            start, end, coverage[symbol]
+        ):
+            interval = calendar.prune(missing_start, missing_end, timespan)
+            if interval:
+                grouped_symbols.setdefault(interval, []).append(symbol)
+
+    ranges = [
+        SyncRange(symbols=range_symbols, start=range_start, end=range_end)
+        for (range_start, range_end), range_symbols in sorted(
+            grouped_symbols.items()
+        )
+    ]
+    return ranges, coverage, scanned_coverage
+
+
+def sync(
+    instrument: types.InstrumentType,
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    provider: SyncProvider = "polygon",
+    on_progress: Callable[[ImportReport], None] | None = None,
+    on_conflict: db.OnConflict = "ignore",
+    workers=4,
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Import only the candles that are missing from the instrument's base table
+    between start and end (in UTC). Every fetched range is recorded as
+    covered, including ranges without data like market holidays, so the next
+    sync plans from the recorded coverage without scanning the table. Candles
+    that were stored by other imports are skipped by default. The ranges are
+    fetched concurrently and written by a single writer.
+    """
+    if instrument not in provider_instruments.get(provider, []):
+        raise DataError(
+            f"Syncing {instrument} from '{provider}' is not supported"
+        )
+
+    instrument_config = config.get_db_instrument(instrument)
+    table_name = instrument_config["base_table"]
+    timespan = instrument_config["timespan"]
+    fetch = fetchers[provider]
+
+    con = db.connect()
+    ranges, coverage, scanned_coverage = plan_sync(
+        instrument, symbols, start, end, con
+    )
+    for symbol, intervals in scanned_coverage.items():
+        db.record_coverage(table_name, symbol, intervals, con)
+
+    def record_ranges(written_ranges: list[SyncRange]) -> None:
+        record_synced(table_name, written_ranges, coverage, con)
+
+    return run_pipeline(
+        ranges,
+        lambda sync_range: fetch_range(fetch, sync_range, timespan),
+        table_name,
+        workers=workers,
+        queue_depth=queue_depth,
+        batch_size=batch_size,
+        on_conflict=on_conflict,
+        on_progress=on_progress,
+        on_written=record_ranges,
+        unit="ranges",
+    )
+
+
+def closed_until(moment: datetime, timespan: types.Timespan) -> datetime:
+    """
+    Return the end of the last bar that has closed at the moment. Every bar
+    that starts before it is complete. Bars of longer timespans aren't
+    aligned to their duration, so they are only complete a whole duration
+    after their start.
+    """
+    duration = types.timespan_info[timespan].duration
+    if timespan not in ALIGNED_TIMESPANS:
+        return moment - duration
+
+    duration_ms = duration // timedelta(milliseconds=1)
+    moment_ms = to_epoch_ms(moment)
+    return moment - timedelta(milliseconds=moment_ms % duration_ms)
+
+
+def fetch_range(
+    fetch: Fetcher, sync_range: SyncRange, timespan: types.Timespan
+) -> CandleBatch:
+    """
+    Fetch the candles of a range. A range holds the bars that start in
+    [start, end), so the range can be recorded as covered once they are
+    written. Providers round ranges to their own granularity, so bars
+    outside the range are dropped.
+    """
+    batch = fetch(
+        sync_range.symbols, sync_range.start, sync_range.end, timespan
+    )
+    in_range = (batch.time >= to_epoch_ms(sync_range.start)) & (
+        batch.time < to_epoch_ms(sync_range.end)
+    )
+    return batch.take(in_range)
+
+
+def record_synced(
+    table_name: str,
+    ranges: list[SyncRange],
+    coverage: dict[str, list[Interval]],
+    con=None,
+) -> None:
+    """
+    Merge the written ranges into the coverage of their symbols and record
+    it.
+    """
+    for sync_range in ranges:
+        for symbol in sync_range.symbols:
+            coverage[symbol] = merge_intervals(
+                coverage[symbol] + [(sync_range.start, sync_range.end)]
+            )
+            db.record_coverage(table_name, symbol, coverage[symbol], con)
+
+
+def to_epoch_ms(value: datetime) -> int:
+    return int(np.datetime64(value, "ms").astype(np.int64))
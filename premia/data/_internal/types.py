@@ -1,22 +1,42 @@
-from datetime import datetime
-from typing import Literal, TypeAlias, TypedDict
+from dataclasses import dataclass, field
+from typing import Literal, TypeAlias
+from premia import db
 
 
 ProviderType: TypeAlias = Literal[
     "polygon.io",
     "twelvedata.com",
     "csv",
+    "parquet",
     "yfinance",
 ]
 
 
-class MarketDataRow(TypedDict):
-    time: datetime
-    symbol: str
-    open: str
-    close: str
-    high: str
-    low: str
-    volume: str
-    currency: str
-    data_provider: ProviderType
+@dataclass
+class ImportReport:
+    tasks: int = 0
+    completed: int = 0
+    rows: int = 0
+    updated: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    failures: dict[str, str] = field(default_factory=dict)
+    unit: str = "tasks"
+
+    def add(self, result: db.InsertResult) -> None:
+        self.rows += result.inserted
+        self.updated += result.updated
+        self.skipped += result.skipped
+
+    def merge(self, other: "ImportReport") -> None:
+        self.tasks += other.tasks
+        self.completed += other.completed
+        self.rows += other.rows
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.seconds += other.seconds
+        self.failures.update(other.failures)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
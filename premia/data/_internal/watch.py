@@ -0,0 +1,234 @@
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+import numpy as np
+from premia._shared import types
+from premia import config, db
+from premia.data import (
+    DataError,
+    CandleBatch,
+    ImportReport,
+    cache,
+    calendar,
+    polygon,
+    yfinance,
+    twelvedata,
+)
+from .sync import SyncProvider, Fetcher, provider_instruments, to_epoch_ms
+
+# Providers publish a bar shortly after it closed, so every poll waits this
+# long after the close of a bar.
+DEFAULT_DELAY = timedelta(seconds=2)
+# Symbols without stored candles are watched from this far back.
+DEFAULT_LOOKBACK = timedelta(days=1)
+
+
+@dataclass
+class WatchedInstrument:
+    instrument: types.InstrumentType
+    table_name: str
+    timespan: types.Timespan
+    duration: timedelta
+    # Time of the latest stored bar per symbol in epoch milliseconds.
+    last_times: dict[str, int] = field(default_factory=dict)
+    next_poll: float = 0.0
+
+
+def warm_fetcher(provider: SyncProvider) -> Fetcher:
+    """
+    Return a fetch function that reuses one provider client for every poll.
+    """
+    if provider == "polygon":
+        polygon_client = polygon.rest_client()
+        return lambda symbols, start, end, timespan: polygon.fetch(
+            symbols, start, end, timespan, client=polygon_client
+        )
+    if provider == "twelvedata":
+        twelvedata_client = twelvedata.Client()
+        return lambda symbols, start, end, timespan: twelvedata.get_aggregates(
+            symbols, start, end, timespan, client=twelvedata_client
+        )
+
+    return yfinance.download
+
+
+def next_bar_close(duration: timedelta, delay: timedelta) -> float:
+    seconds = duration.total_seconds()
+    return (time.time() // seconds + 1) * seconds + delay.total_seconds()
+
+
+def last_stored_times(
+    con, table_name: str, symbols: list[str], default: datetime
+) -> dict[str, int]:
+    con.execute(
+        f"""
+        SELECT symbol, epoch_ms(max(time))
+        FROM {table_name}
+        WHERE list_contains(?, symbol)
+        GROUP BY symbol;
+        """,
+        (symbols,),
+    )
+    stored_times = dict(con.fetchall())
+    return {
+        symbol: stored_times.get(symbol, to_epoch_ms(default))
+        for symbol in symbols
+    }
+
+
+def poll(
+    con,
+    fetch: Fetcher,
+    watched: WatchedInstrument,
+    report: ImportReport,
+) -> None:
+    """
+    Fetch the bars that closed since the latest stored bar of every symbol
+    and append them. Symbols that are up to date with each other are fetched
+    with a single request.
+    """
+    now = datetime.utcnow()
+    now_ms = to_epoch_ms(now)
+    duration_ms = watched.duration // timedelta(milliseconds=1)
+
+    grouped_symbols: dict[int, list[str]] = {}
+    for symbol, last_time in watched.last_times.items():
+        grouped_symbols.setdefault(last_time, []).append(symbol)
+
+    for last_time, symbols in grouped_symbols.items():
+        start = datetime.utcfromtimestamp(last_time / 1000)
+        # No bar can have closed since the last one if the exchange was
+        # closed the whole time.
+        if (
+            calendar.prune(start + watched.duration, now, watched.timespan)
+            is None
+        ):
+            continue
+
+        try:
+            batch = fetch(symbols, start, now, watched.timespan)
+            is_new = (batch.time > last_time) & (
+                batch.time + duration_ms <= now_ms
+            )
+            new_batch = batch.take(is_new)
+            report.add(
+                db.upsert(
+                    watched.table_name,
+                    new_batch.to_df(),
+                    con,
+                    on_conflict="ignore",
+                )
+            )
+            update_last_times(watched, new_batch)
+        except Exception as e:
+            report.failures[
+                f"{watched.instrument} {','.join(symbols)} {now.isoformat()}"
+            ] = str(e)
+
+    report.tasks += 1
+    report.completed += 1
+
+
+def update_last_times(watched: WatchedInstrument, batch: CandleBatch) -> None:
+    if len(batch) == 0:
+        return
+
+    symbols = np.asarray(batch.symbol)
+    for symbol in np.unique(symbols):
+        symbol_last_time = int(batch.time[symbols == symbol].max())
+        if symbol_last_time > watched.last_times.get(symbol, 0):
+            watched.last_times[symbol] = symbol_last_time
+
+
+def watch(
+    symbols: dict[types.InstrumentType, list[str]],
+    provider: SyncProvider = "polygon",
+    delay: timedelta = DEFAULT_DELAY,
+    lookback: timedelta = DEFAULT_LOOKBACK,
+    stop_event: threading.Event | None = None,
+    on_poll: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Keep the base tables of the instruments up to date until stopped. One
+    DuckDB connection and one provider client are kept open for the whole
+    run. Every instrument is polled right after each of its bars closed and
+    only bars newer than the latest stored bar of a symbol are appended.
+
+    The watcher stops when stop_event is set or, if it runs in the main
+    thread, on SIGTERM and SIGINT. on_poll is called with the report after
+    every poll. The previous signal handlers and cache setting are restored
+    when the watcher stops.
+    """
+    for instrument in symbols:
+        if instrument not in provider_instruments[provider]:
+            raise DataError(
+                f"Watching {instrument} with '{provider}' is not supported"
+            )
+
+    stop_event = stop_event or threading.Event()
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signal_number] = signal.signal(
+                signal_number, lambda *_: stop_event.set()
+            )
+
+    # Every poll asks for an open range, which would never be served from
+    # the cache again.
+    cache_enabled = cache.configure().enabled
+    cache.configure(enabled=False)
+
+    con = None
+    report = ImportReport(unit="polls")
+    start_time = time.perf_counter()
+    try:
+        fetch = warm_fetcher(provider)
+        con = db.connect()
+        watched_instruments: list[WatchedInstrument] = []
+        for instrument, instrument_symbols in symbols.items():
+            instrument_config = config.get_db_instrument(instrument)
+            duration = types.timespan_info[
+                instrument_config["timespan"]
+            ].duration
+            watched_instruments.append(
+                WatchedInstrument(
+                    instrument=instrument,
+                    table_name=instrument_config["base_table"],
+                    timespan=instrument_config["timespan"],
+                    duration=duration,
+                    last_times=last_stored_times(
+                        con,
+                        instrument_config["base_table"],
+                        instrument_symbols,
+                        datetime.utcnow() - lookback,
+                    ),
+                )
+            )
+
+        while not stop_event.is_set():
+            for watched in watched_instruments:
+                if watched.next_poll > time.time():
+                    continue
+
+                poll(con, fetch, watched, report)
+                report.seconds = time.perf_counter() - start_time
+                watched.next_poll = next_bar_close(watched.duration, delay)
+                if on_poll:
+                    on_poll(report)
+
+            next_poll = min(
+                watched.next_poll for watched in watched_instruments
+            )
+            stop_event.wait(max(next_poll - time.time(), 0))
+    finally:
+        if con is not None:
+            con.close()
+        for signal_number, handler in previous_handlers.items():
+            signal.signal(signal_number, handler)
+        cache.configure(enabled=cache_enabled)
+
+    report.seconds = time.perf_counter() - start_time
+    return report
@@ -0,0 +1,21 @@
+from ._internal.cache import (
+    configure,
+    fetch,
+    get,
+    put,
+    evict,
+    stats,
+    clear,
+    CacheSettings,
+)
+
+__all__ = [
+    "configure",
+    "fetch",
+    "get",
+    "put",
+    "evict",
+    "stats",
+    "clear",
+    "CacheSettings",
+]
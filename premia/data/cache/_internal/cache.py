@@ -0,0 +1,317 @@
+import os
+import glob
+import time
+import uuid
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+import duckdb
+import numpy as np
+import pandas as pd
+from premia._shared import types
+from premia import config
+from premia.db import sql_literal
+from premia.config._internal.config import CACHE_DIR_PATH
+from premia.data import CandleBatch
+
+RESPONSES_DIR_NAME = "responses"
+RESPONSES_DIR_PATH = os.path.join(CACHE_DIR_PATH, RESPONSES_DIR_NAME)
+
+
+@dataclass
+class CacheSettings:
+    # Bulk imports request every range once, so caching their responses
+    # would only duplicate the database on disk. Workflows that repeat
+    # requests enable the cache with `configure`.
+    enabled: bool = False
+    # Candles of closed ranges only change on corrections, while the latest
+    # bar of an open range changes until it is complete.
+    historical_ttl: timedelta = timedelta(days=30)
+    open_ttl: timedelta = timedelta(minutes=5)
+    max_size: int = 1024**3
+
+
+settings = CacheSettings()
+
+# Eviction scans the whole cache directory, so it runs at most once per
+# interval instead of after every stored response.
+EVICTION_INTERVAL = 60.0
+last_eviction = 0.0
+
+# Entries are read and written through one in-memory connection instead of
+# opening a new one per entry. Cursors of it can be used from any thread.
+cache_con = duckdb.connect()
+
+
+def configure(
+    enabled: bool | None = None,
+    historical_ttl: timedelta | None = None,
+    open_ttl: timedelta | None = None,
+    max_size: int | None = None,
+) -> CacheSettings:
+    """
+    Change the settings of the response cache for the current process. The
+    size cap is in bytes.
+    """
+    if enabled is not None:
+        settings.enabled = enabled
+    if historical_ttl is not None:
+        settings.historical_ttl = historical_ttl
+    if open_ttl is not None:
+        settings.open_ttl = open_ttl
+    if max_size is not None:
+        settings.max_size = max_size
+
+    return settings
+
+
+def provider_dir(provider: str, create_if_missing=False) -> str:
+    dir_path = os.path.join(RESPONSES_DIR_PATH, provider)
+    if create_if_missing:
+        config.cache_dir(create_if_missing=True)
+        os.makedirs(dir_path, exist_ok=True)
+
+    return dir_path
+
+
+def cache_key(
+    provider: str,
+    symbol: str,
+    timespan: types.Timespan,
+    start: datetime,
+    end: datetime,
+) -> str:
+    key = "|".join(
+        [
+            provider,
+            symbol.upper(),
+            timespan,
+            start.isoformat(),
+            end.isoformat(),
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def entry_paths(provider: str, key: str) -> list[str]:
+    return glob.glob(os.path.join(provider_dir(provider), f"{key}-*.parquet"))
+
+
+def expires_at(path: str) -> float:
+    return float(os.path.basename(path).split("-")[1].removesuffix(".parquet"))
+
+
+def get(
+    provider: str,
+    symbol: str,
+    timespan: types.Timespan,
+    start: datetime,
+    end: datetime,
+) -> CandleBatch | None:
+    """
+    Return the cached candles of a request or None if they aren't cached or
+    have expired. Reading an entry marks it as recently used.
+    """
+    now = time.time()
+    for path in entry_paths(
+        provider, cache_key(provider, symbol, timespan, start, end)
+    ):
+        if expires_at(path) < now:
+            remove(path)
+            continue
+
+        try:
+            with cache_con.cursor() as cursor:
+                df = cursor.read_parquet(path).df()
+            os.utime(path)
+        except (OSError, duckdb.Error):
+            remove(path)
+            continue
+
+        return CandleBatch.from_df(df)
+
+    return None
+
+
+def put(
+    provider: str,
+    symbol: str,
+    timespan: types.Timespan,
+    start: datetime,
+    end: datetime,
+    batch: CandleBatch,
+) -> None:
+    """
+    Store the candles of a request as a zstd compressed Parquet file named by
+    the hash of the request. Ranges that end before the latest completed bar
+    are cached with the historical TTL, others with the open TTL.
+    """
+    duration = types.timespan_info[timespan].duration
+    is_open = end > datetime.utcnow() - duration
+    ttl = settings.open_ttl if is_open else settings.historical_ttl
+
+    key = cache_key(provider, symbol, timespan, start, end)
+    dir_path = provider_dir(provider, create_if_missing=True)
+    path = os.path.join(
+        dir_path, f"{key}-{int(time.time() + ttl.total_seconds())}.parquet"
+    )
+    temp_path = os.path.join(dir_path, f".{uuid.uuid4().hex}.parquet")
+
+    # Times are stored as epoch milliseconds, so they are read back exactly.
+    df = batch.to_df().assign(time=batch.time)
+    with cache_con.cursor() as cursor:
+        cursor.register("batch", df)
+        cursor.execute(
+            f"COPY batch TO {sql_literal(temp_path)} (FORMAT PARQUET, COMPRESSION ZSTD);"
+        )
+
+    for stale_path in entry_paths(provider, key):
+        remove(stale_path)
+    os.replace(temp_path, path)
+
+
+def fetch(
+    provider: str,
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timespan: types.Timespan,
+    fetch_symbols: Callable[[list[str]], CandleBatch],
+) -> CandleBatch:
+    """
+    Return the candles of the symbols from the cache and fetch the ones that
+    aren't cached with a single call of fetch_symbols. The fetched candles
+    are cached per symbol, so later requests can combine symbols freely.
+    """
+    if not settings.enabled:
+        return fetch_symbols(symbols)
+
+    batches: list[CandleBatch] = []
+    missing_symbols: list[str] = []
+    for symbol in symbols:
+        cached_batch = get(provider, symbol, timespan, start, end)
+        if cached_batch is None:
+            missing_symbols.append(symbol)
+        else:
+            batches.append(cached_batch)
+
+    if missing_symbols:
+        fetched_batch = fetch_symbols(missing_symbols)
+        fetched_symbols = pd.Series(fetched_batch.symbol).str.upper()
+        for symbol in missing_symbols:
+            put(
+                provider,
+                symbol,
+                timespan,
+                start,
+                end,
+                fetched_batch.take(
+                    np.asarray(fetched_symbols == symbol.upper())
+                ),
+            )
+        batches.append(fetched_batch)
+
+        global last_eviction
+        if time.time() - last_eviction > EVICTION_INTERVAL:
+            last_eviction = time.time()
+            evict()
+
+    return CandleBatch.concat(batches)
+
+
+def remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def entries() -> pd.DataFrame:
+    paths = glob.glob(os.path.join(RESPONSES_DIR_PATH, "*", "*.parquet"))
+    rows = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        rows.append(
+            {
+                "path": path,
+                "provider": os.path.basename(os.path.dirname(path)),
+                "size": stat.st_size,
+                "last_used": stat.st_mtime,
+                "expires_at": expires_at(path),
+            }
+        )
+
+    return pd.DataFrame(
+        rows, columns=["path", "provider", "size", "last_used", "expires_at"]
+    )
+
+
+def evict() -> int:
+    """
+    Remove expired entries, then the least recently used ones until the
+    cache fits its size cap.
+
+    Returns the number of removed entries.
+    """
+    cache_entries = entries()
+    expired = cache_entries["expires_at"] < time.time()
+    for path in cache_entries.loc[expired, "path"]:
+        remove(path)
+
+    cache_entries = cache_entries[~expired].sort_values(
+        "last_used", ascending=False
+    )
+    over_cap = cache_entries["size"].cumsum() > settings.max_size
+    for path in cache_entries.loc[over_cap, "path"]:
+        remove(path)
+
+    return int(expired.sum() + over_cap.sum())
+
+
+def stats() -> pd.DataFrame:
+    """
+    Return the number of entries, the expired entries, the size in MB and the
+    last use of the cache per provider.
+    """
+    cache_entries = entries()
+    cache_entries["expired"] = cache_entries["expires_at"] < time.time()
+    result = (
+        cache_entries.groupby("provider")
+        .agg(
+            entries=("path", "count"),
+            expired=("expired", "sum"),
+            size=("size", "sum"),
+            last_used=("last_used", "max"),
+        )
+        .reset_index()
+    )
+    result["size_mb"] = (result.pop("size") / 1024**2).round(2)
+    result["last_used"] = pd.to_datetime(
+        result["last_used"], unit="s", utc=True
+    )
+
+    return result[["provider", "entries", "expired", "size_mb", "last_used"]]
+
+
+def clear(provider: str | None = None, expired_only=False) -> int:
+    """
+    Remove the entries of a provider or of all providers. With expired_only
+    only entries past their TTL are removed.
+
+    Returns the number of removed entries.
+    """
+    cache_entries = entries()
+    if provider:
+        cache_entries = cache_entries[cache_entries["provider"] == provider]
+    if expired_only:
+        expired = cache_entries["expires_at"] < time.time()
+        cache_entries = cache_entries[expired]
+
+    for path in cache_entries["path"]:
+        remove(path)
+
+    return len(cache_entries)
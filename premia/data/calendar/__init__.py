@@ -0,0 +1,27 @@
+from ._internal.calendar import (
+    sessions,
+    holidays,
+    early_closes,
+    is_trading_day,
+    prune,
+    next_open,
+    advance,
+    sessions_df,
+    holidays_df,
+    store,
+    Session,
+)
+
+__all__ = [
+    "sessions",
+    "holidays",
+    "early_closes",
+    "is_trading_day",
+    "prune",
+    "next_open",
+    "advance",
+    "sessions_df",
+    "holidays_df",
+    "store",
+    "Session",
+]
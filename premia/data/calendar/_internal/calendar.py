@@ -0,0 +1,314 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import duckdb
+import pandas as pd
+from premia._shared import types
+from premia import db
+
+Interval = tuple[datetime, datetime]
+
+# Trading calendar of the New York Stock Exchange, whose holidays US option
+# exchanges follow as well.
+EXCHANGE_TIMEZONE = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16)
+EARLY_CLOSE = time(13)
+EXTENDED_OPEN = time(4)
+EXTENDED_CLOSE = time(20)
+EARLY_EXTENDED_CLOSE = time(17)
+
+# Closures that don't follow from the regular holiday rules.
+SPECIAL_CLOSURES: dict[date, str] = {
+    date(2001, 9, 11): "September 11",
+    date(2001, 9, 12): "September 11",
+    date(2001, 9, 13): "September 11",
+    date(2001, 9, 14): "September 11",
+    date(2004, 6, 11): "Day of Mourning for Ronald Reagan",
+    date(2007, 1, 2): "Day of Mourning for Gerald Ford",
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "Day of Mourning for George H.W. Bush",
+    date(2025, 1, 9): "Day of Mourning for Jimmy Carter",
+}
+
+
+@dataclass(frozen=True)
+class Session:
+    """
+    Trading day with its regular and extended hours as naive UTC datetimes.
+    """
+
+    date: date
+    open: datetime
+    close: datetime
+    extended_open: datetime
+    extended_close: datetime
+    early_close: bool
+
+
+def easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Return the nth weekday (0 is Monday) of a month, or the last one if n
+    is -1.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(
+            days=(weekday - first.weekday()) % 7 + 7 * (n - 1)
+        )
+
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day: date) -> date:
+    # Holidays on a Saturday are observed on Friday, on a Sunday on Monday.
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache
+def holidays(year: int) -> dict[date, str]:
+    """
+    Return the weekdays of a year on which the exchange is closed.
+    """
+    result: dict[date, str] = {}
+
+    # New Year's Day on a Saturday isn't observed on the previous Friday.
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        result[observed(new_year)] = "New Year's Day"
+    if year >= 1998:
+        result[nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    result[nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    result[easter(year) - timedelta(days=2)] = "Good Friday"
+    result[nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        result[observed(date(year, 6, 19))] = "Juneteenth"
+    result[observed(date(year, 7, 4))] = "Independence Day"
+    result[nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    result[nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    result[observed(date(year, 12, 25))] = "Christmas Day"
+
+    result.update(
+        {
+            day: name
+            for day, name in SPECIAL_CLOSURES.items()
+            if day.year == year
+        }
+    )
+    return {day: name for day, name in result.items() if day.weekday() < 5}
+
+
+def early_closes(year: int) -> set[date]:
+    """
+    Return the days of a year on which the exchange closes at 13:00: the day
+    before Independence Day, the day after Thanksgiving and Christmas Eve, if
+    they are regular trading days.
+    """
+    days = {nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    if date(year, 7, 4).weekday() in (1, 2, 3, 4):
+        days.add(date(year, 7, 3))
+    if date(year, 12, 24).weekday() in (0, 1, 2, 3):
+        days.add(date(year, 12, 24))
+
+    return {day for day in days if day not in holidays(year)}
+
+
+def to_utc(day: date, moment: time) -> datetime:
+    return (
+        datetime.combine(day, moment, EXCHANGE_TIMEZONE)
+        .astimezone(ZoneInfo("UTC"))
+        .replace(tzinfo=None)
+    )
+
+
+@lru_cache
+def year_sessions(year: int) -> tuple[Session, ...]:
+    closed_days = holidays(year)
+    early_close_days = early_closes(year)
+
+    sessions: list[Session] = []
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5 and day not in closed_days:
+            early_close = day in early_close_days
+            close = EARLY_CLOSE if early_close else REGULAR_CLOSE
+            extended_close = (
+                EARLY_EXTENDED_CLOSE if early_close else EXTENDED_CLOSE
+            )
+            sessions.append(
+                Session(
+                    date=day,
+                    open=to_utc(day, REGULAR_OPEN),
+                    close=to_utc(day, close),
+                    extended_open=to_utc(day, EXTENDED_OPEN),
+                    extended_close=to_utc(day, extended_close),
+                    early_close=early_close,
+                )
+            )
+        day += timedelta(days=1)
+
+    return tuple(sessions)
+
+
+def sessions(start: datetime, end: datetime) -> list[Session]:
+    """
+    Return the sessions whose extended hours overlap [start, end) in UTC.
+    """
+    return [
+        session
+        for year in range(start.year, end.year + 1)
+        for session in year_sessions(year)
+        if session.extended_close > start and session.extended_open < end
+    ]
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def prune(
+    start: datetime, end: datetime, timespan: types.Timespan
+) -> Interval | None:
+    """
+    Shrink a range in UTC to the trading time it contains, so no request is
+    spent on closed periods. Intraday ranges are cut to the extended hours
+    of their first and last session. Ranges of daily or longer bars are kept
+    if they contain a regular open, because providers stamp those bars at
+    different times of the day.
+
+    Returns None if the range doesn't contain any trading time.
+    """
+    if types.timespan_info[timespan].duration >= timedelta(days=1):
+        has_open = any(
+            start <= session.open < end
+            for session in sessions(start - timedelta(days=1), end)
+        )
+        return (start, end) if has_open else None
+
+    range_sessions = sessions(start, end)
+    if not range_sessions:
+        return None
+
+    return (
+        max(start, range_sessions[0].extended_open),
+        min(end, range_sessions[-1].extended_close),
+    )
+
+
+def next_open(moment: datetime) -> datetime:
+    """
+    Return moment if it lies within extended hours, else the next extended
+    open.
+    """
+    year = moment.year
+    while True:
+        for session in year_sessions(year):
+            if session.extended_close > moment:
+                return max(moment, session.extended_open)
+        year += 1
+
+
+def advance(start: datetime, trading_time: timedelta) -> datetime:
+    """
+    Return the moment at which trading_time of extended hours has passed
+    since start.
+    """
+    remaining = trading_time
+    year = start.year
+    while True:
+        for session in year_sessions(year):
+            if session.extended_close <= start:
+                continue
+
+            session_start = max(start, session.extended_open)
+            session_time = session.extended_close - session_start
+            if session_time >= remaining:
+                return session_start + remaining
+            remaining -= session_time
+        year += 1
+
+
+def sessions_df(start_year: int, end_year: int) -> pd.DataFrame:
+    rows = [
+        session
+        for year in range(start_year, end_year + 1)
+        for session in year_sessions(year)
+    ]
+    df = pd.DataFrame(rows, columns=list(Session.__dataclass_fields__))
+    for column in ("open", "close", "extended_open", "extended_close"):
+        df[column] = pd.to_datetime(df[column]).dt.tz_localize("UTC")
+
+    return df
+
+
+def holidays_df(start_year: int, end_year: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            (day, name)
+            for year in range(start_year, end_year + 1)
+            for day, name in sorted(holidays(year).items())
+        ],
+        columns=["date", "name"],
+    )
+
+
+def store(
+    start_year: int,
+    end_year: int,
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> int:
+    """
+    Write the sessions and holidays between start_year and end_year to the
+    tables premia.trading_sessions and premia.market_holidays, so they can
+    be joined with candles in DuckDB.
+
+    Returns the number of sessions.
+    """
+    con = db.connect() if con is None else con
+    sessions = sessions_df(start_year, end_year)
+    holidays = holidays_df(start_year, end_year)
+
+    with con.cursor() as cursor:
+        cursor.register("calendar_sessions", sessions)
+        cursor.register("calendar_holidays", holidays)
+        cursor.execute(
+            """
+            CREATE SCHEMA IF NOT EXISTS premia;
+            CREATE OR REPLACE TABLE premia.trading_sessions AS
+            SELECT
+                CAST(date AS DATE) AS date,
+                CAST(open AS TIMESTAMPTZ) AS open,
+                CAST(close AS TIMESTAMPTZ) AS close,
+                CAST(extended_open AS TIMESTAMPTZ) AS extended_open,
+                CAST(extended_close AS TIMESTAMPTZ) AS extended_close,
+                early_close
+            FROM calendar_sessions;
+            CREATE OR REPLACE TABLE premia.market_holidays AS
+            SELECT CAST(date AS DATE) AS date, name FROM calendar_holidays;
+            """
+        )
+
+    return len(sessions)
@@ -0,0 +1,3 @@
+from ._internal.contracts import parse_symbols, import_contracts
+
+__all__ = ["parse_symbols", "import_contracts"]
@@ -0,0 +1,171 @@
+import os
+import time
+import duckdb
+import pandas as pd
+from premia import db
+from premia.data import DataError, ImportReport
+
+# OCC option symbols consist of the underlying (padded with spaces to six
+# characters in the original format), the expiration date as YYMMDD, the
+# contract type and the strike price times 1000 with eight digits, e.g.
+# AMZN240202C00080000. polygon.io prefixes them with 'O:'.
+OCC_SYMBOL_PATTERN = r"^(?:O:)?([A-Z0-9.]{1,6}) *(\d{6})([CP])(\d{8})$"
+SHARES_PER_CONTRACT = 100
+INVALID_SYMBOL_ERROR = "Not an OCC option symbol"
+SYMBOLS_TABLE = "contract_symbols"
+CONTRACTS_TABLE = "parsed_contracts"
+
+
+def parse_sql(source: str) -> str:
+    """
+    Build a query that parses the `symbol` column of a DuckDB table
+    expression into rows of the contracts table. The symbols are matched
+    with one vectorized regular expression by DuckDB and symbols that don't
+    match the OCC format or have an invalid expiration date are left out.
+    """
+    return f"""
+        WITH parsed AS (
+            SELECT
+                symbol,
+                regexp_extract(
+                    symbol,
+                    '{OCC_SYMBOL_PATTERN}',
+                    ['underlying', 'expiration', 'type', 'strike']
+                ) AS parts
+            FROM {source}
+            WHERE regexp_full_match(symbol, '{OCC_SYMBOL_PATTERN}')
+        ),
+        dated AS (
+            SELECT
+                *,
+                try_strptime(parts.expiration, '%y%m%d') AS expiration
+            FROM parsed
+        )
+        SELECT
+            symbol,
+            timezone('UTC', expiration) AS expiration_date,
+            parts.underlying AS company_symbol,
+            CASE parts.type WHEN 'C' THEN 'call' ELSE 'put' END AS contract_type,
+            {SHARES_PER_CONTRACT} AS shares_per_contract,
+            CAST(parts.strike AS BIGINT) / 1000 AS strike_price,
+            'USD' AS currency
+        FROM dated
+        WHERE expiration IS NOT NULL
+    """
+
+
+def parse_symbols(symbols: pd.Series | list[str]) -> pd.DataFrame:
+    """
+    Parse OCC option symbols into rows of the contracts table. Symbols that
+    don't match the OCC format are missing from the result.
+    """
+    symbols_df = pd.DataFrame({"symbol": pd.Series(symbols, dtype=object)})
+    con = duckdb.connect()
+    con.register(SYMBOLS_TABLE, symbols_df)
+    return con.execute(parse_sql(SYMBOLS_TABLE)).df()
+
+
+def table_symbols_sql(con: duckdb.DuckDBPyConnection) -> str:
+    """
+    Build a query for the symbols of all options candle tables.
+    """
+    con.execute(
+        """
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = 'main'
+            AND table_type = 'BASE TABLE'
+            AND table_name LIKE 'options\\_%\\_candles' ESCAPE '\\';
+        """
+    )
+    table_names = [table_name for (table_name,) in con.fetchall()]
+    if not table_names:
+        raise DataError("There are no options candle tables to read from")
+
+    return " UNION ALL ".join(
+        f"SELECT DISTINCT symbol FROM {table_name}"
+        for table_name in table_names
+    )
+
+
+def file_symbols_sql(
+    con: duckdb.DuckDBPyConnection, file_paths: list[str]
+) -> str:
+    """
+    Build a query for the symbols of files. Parquet and CSV files are read
+    by their `symbol` column, other files have one symbol per line.
+    """
+    queries = []
+    for i, file_path in enumerate(file_paths):
+        if not os.path.exists(file_path):
+            raise DataError(f"File '{file_path}' doesn't exist")
+
+        path = "'" + file_path.replace("'", "''") + "'"
+        if file_path.endswith(".parquet"):
+            source = f"read_parquet({path})"
+        elif file_path.endswith((".csv", ".csv.gz", ".csv.zst")):
+            source = f"read_csv({path}, header = true, compression = 'auto')"
+        else:
+            with open(file_path) as file:
+                lines = [line.strip() for line in file if line.strip()]
+            source = f"{SYMBOLS_TABLE}_{i}"
+            con.register(source, pd.DataFrame({"symbol": lines}))
+
+        queries.append(
+            f"SELECT DISTINCT CAST(symbol AS VARCHAR) AS symbol FROM {source}"
+        )
+
+    return " UNION ALL ".join(queries)
+
+
+def import_contracts(file_paths: list[str] | None = None) -> ImportReport:
+    """
+    Add the contracts of option symbols that are missing from the contracts
+    table. The symbols are read from the files or, without files, from all
+    options candle tables. They are deduplicated, parsed and written in bulk
+    by DuckDB, contracts that are already stored are skipped and symbols
+    that aren't OCC symbols are reported as failures.
+    """
+    start_time = time.perf_counter()
+    con = db.connect()
+
+    try:
+        symbols_sql = (
+            file_symbols_sql(con, file_paths)
+            if file_paths
+            else table_symbols_sql(con)
+        )
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE {SYMBOLS_TABLE} AS
+            SELECT DISTINCT symbol FROM ({symbols_sql}) WHERE symbol IS NOT NULL;
+            CREATE OR REPLACE TEMP TABLE {CONTRACTS_TABLE} AS {parse_sql(SYMBOLS_TABLE)};
+            """
+        )
+    except duckdb.Error as e:
+        raise DataError(f"Failed to read option symbols: {e}")
+
+    con.execute(f"SELECT count(*) FROM {SYMBOLS_TABLE};")
+    report = ImportReport(tasks=con.fetchone()[0], unit="symbols")
+    report.add(
+        db.upsert_from(
+            CONTRACTS_TABLE,
+            "contracts",
+            con,
+            on_conflict="ignore",
+            key_columns=("symbol",),
+        )
+    )
+
+    con.execute(
+        f"""
+        SELECT symbol FROM {SYMBOLS_TABLE}
+        ANTI JOIN {CONTRACTS_TABLE} USING (symbol);
+        """
+    )
+    report.failures = {
+        symbol: INVALID_SYMBOL_ERROR for (symbol,) in con.fetchall()
+    }
+    report.completed = report.tasks
+    report.seconds = time.perf_counter() - start_time
+    return report
@@ -1,3 +1,3 @@
-from ._internal.csv import copy
+from ._internal.csv import copy, copy_many
 
-__all__ = ["copy"]
+__all__ = ["copy", "copy_many"]
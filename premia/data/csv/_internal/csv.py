@@ -1,25 +1,189 @@
+import os
+import glob
+import itertools
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import duckdb
 import pandas as pd
 from premia import db
-from premia.data import DataError
+from premia.data import DataError, ImportReport
+
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst")
+BULK_ORDER = ("symbol", "time")
+KEY_COLUMNS = ("symbol", "time")
 
 
 def copy(
     file_path: str,
     table_name: str | None = None,
-) -> pd.DataFrame:
-    df = pd.read_csv(file_path)
-
+    preview=True,
+    on_conflict: db.OnConflict = "error",
+) -> pd.DataFrame | None:
+    """
+    Copy a CSV file into a table with DuckDB's native CSV reader. If preview is
+    False the file content isn't loaded into a DataFrame, which is useful when
+    the data should only be persisted.
+    """
     if table_name:
         try:
-            df.to_sql(
-                table_name,
-                con=db.connect(),
-                if_exists="append",
-                index=False,
-            )
+            db.upsert_csv(file_path, table_name, on_conflict=on_conflict)
         except Exception as e:
             raise DataError(
                 f"Failed to copy CSV data to table '{table_name}': {e}"
             )
 
-    return df
+    if not preview:
+        return None
+
+    try:
+        con = duckdb.connect()
+        return con.read_csv(file_path, header=True, compression="auto").df()
+    except Exception as e:
+        raise DataError(f"Failed to read CSV file '{file_path}': {e}")
+
+
+def expand_paths(paths: list[str]) -> list[str]:
+    """
+    Resolve file paths, glob patterns and directories to a sorted list of CSV
+    files. Directories are searched recursively.
+    """
+    file_paths: set[str] = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for extension in CSV_EXTENSIONS:
+                pattern = os.path.join(path, "**", f"*{extension}")
+                file_paths.update(glob.glob(pattern, recursive=True))
+        elif glob.has_magic(path):
+            file_paths.update(glob.glob(path, recursive=True))
+        else:
+            file_paths.add(path)
+
+    return sorted(file_paths)
+
+
+def read_batch(
+    file_paths: list[str],
+) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+    """
+    Read a batch of files into DataFrames with a private in-memory DuckDB
+    connection, so that files are parsed in parallel without touching the
+    database. Files that fail to parse are returned as failures.
+    """
+    frames: dict[str, pd.DataFrame] = {}
+    failures: dict[str, str] = {}
+    with duckdb.connect() as reader:
+        for file_path in file_paths:
+            try:
+                frames[file_path] = reader.read_csv(
+                    file_path, header=True, compression="auto"
+                ).df()
+            except Exception as e:
+                failures[file_path] = str(e)
+
+    return frames, failures
+
+
+def write_batch(
+    con: duckdb.DuckDBPyConnection,
+    frames: dict[str, pd.DataFrame],
+    table_name: str,
+    on_conflict: db.OnConflict = "error",
+    order_by: tuple[str, ...] | None = None,
+) -> tuple[list[db.InsertResult], dict[str, str]]:
+    """
+    Write the files of a batch in a single transaction. If the batch fails,
+    the files are written one by one to find out which of them are broken.
+    Rows of several files with the same key are resolved in the order of
+    the files, like separate writes would.
+    """
+    if not frames:
+        return [], {}
+
+    try:
+        batch = pd.concat(frames.values(), ignore_index=True)
+        if on_conflict != "error" and set(KEY_COLUMNS) <= set(batch.columns):
+            keep = "first" if on_conflict == "ignore" else "last"
+            batch = batch.drop_duplicates(list(KEY_COLUMNS), keep=keep)
+        return [
+            db.upsert(table_name, batch, con, on_conflict, order_by=order_by)
+        ], {}
+    except Exception:
+        pass
+
+    results: list[db.InsertResult] = []
+    failures: dict[str, str] = {}
+    for file_path, frame in frames.items():
+        try:
+            results.append(
+                db.upsert(
+                    table_name, frame, con, on_conflict, order_by=order_by
+                )
+            )
+        except Exception as e:
+            failures[file_path] = str(e)
+
+    return results, failures
+
+
+def copy_many(
+    paths: list[str],
+    table_name: str,
+    workers=4,
+    batch_size=100,
+    on_conflict: db.OnConflict = "error",
+    bulk=False,
+) -> ImportReport:
+    """
+    Copy many CSV files into a table. Paths can be files, glob patterns or
+    directories. The files are split into batches of batch_size files which
+    a pool of workers parses in parallel, while a single writer loads every
+    batch in one transaction, in the order of the files. At most two parsed
+    batches per worker wait for the writer. Files that fail to load are
+    reported instead of aborting the import. on_conflict decides what
+    happens to rows that are already stored.
+
+    With bulk, the (symbol, time) index of the table is dropped during the
+    import and rebuilt once at the end, and every batch is inserted sorted
+    by symbol and time.
+    """
+    file_paths = expand_paths(paths)
+    if not file_paths:
+        raise DataError(f"No CSV files found for: {', '.join(paths)}")
+
+    batches = iter(
+        [
+            file_paths[i : i + batch_size]
+            for i in range(0, len(file_paths), batch_size)
+        ]
+    )
+
+    report = ImportReport(tasks=len(file_paths), unit="files")
+    start_time = time.perf_counter()
+
+    con = db.connect()
+    order_by = BULK_ORDER if bulk else None
+    with db.bulk_load(table_name, con) if bulk else nullcontext():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque(
+                executor.submit(read_batch, batch)
+                for batch in itertools.islice(batches, 2 * workers)
+            )
+            while pending:
+                frames, failures = pending.popleft().result()
+                next_batch = next(batches, None)
+                if next_batch:
+                    pending.append(executor.submit(read_batch, next_batch))
+
+                insert_results, write_failures = write_batch(
+                    con, frames, table_name, on_conflict, order_by
+                )
+                for insert_result in insert_results:
+                    report.add(insert_result)
+                report.completed += len(frames) - len(write_failures)
+                report.failures.update(failures)
+                report.failures.update(write_failures)
+
+    report.seconds = time.perf_counter() - start_time
+    return report
@@ -0,0 +1,3 @@
+from ._internal.parquet import copy
+
+__all__ = ["copy"]
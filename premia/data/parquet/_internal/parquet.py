@@ -0,0 +1,135 @@
+import os
+from contextlib import nullcontext
+from datetime import datetime
+import duckdb
+import pandas as pd
+from premia._shared import types
+from premia import config, db
+from premia.data import DataError
+
+ARROW_IPC_EXTENSIONS = (".arrow", ".feather", ".ipc")
+SOURCE_VIEW = "parquet_source"
+BULK_ORDER = ("symbol", "time")
+
+
+def register_source(
+    con: duckdb.DuckDBPyConnection, file_paths: list[str]
+) -> None:
+    """
+    Register the files as a view on the connection. Parquet files are read by
+    DuckDB itself, Arrow IPC files are scanned as a pyarrow dataset. In both
+    cases DuckDB pushes projections and filters down to the scan.
+    """
+    if all(path.endswith(ARROW_IPC_EXTENSIONS) for path in file_paths):
+        try:
+            import pyarrow.dataset as ds
+        except ImportError:
+            raise DataError(
+                "Reading Arrow IPC files requires pyarrow. Install it with 'pip install pyarrow'."
+            )
+
+        con.register(SOURCE_VIEW, ds.dataset(file_paths, format="ipc"))
+    else:
+        path_list = ", ".join(
+            "'" + path.replace("'", "''") + "'" for path in file_paths
+        )
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP VIEW {SOURCE_VIEW} AS
+            SELECT * FROM read_parquet([{path_list}], union_by_name = true);
+            """
+        )
+
+
+def build_filter(
+    symbols: list[str] | None,
+    start: datetime | None,
+    end: datetime | None,
+) -> tuple[str | None, list]:
+    conditions = []
+    parameters: list = []
+
+    if symbols:
+        conditions.append(f"symbol IN ({', '.join('?' for _ in symbols)})")
+        parameters.extend(symbols)
+    if start:
+        conditions.append("time >= ?")
+        parameters.append(start)
+    if end:
+        conditions.append("time <= ?")
+        parameters.append(end)
+
+    where = " AND ".join(conditions) if conditions else None
+    return where, parameters
+
+
+def copy(
+    file_paths: str | list[str],
+    table_name: str | None = None,
+    instrument: types.InstrumentType | None = None,
+    symbols: list[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    preview=True,
+    bulk=False,
+) -> pd.DataFrame | None:
+    """
+    Copy Parquet or Arrow IPC files into a table. The table can be given by
+    name or by instrument, in which case the instrument's base table is used.
+    Only the columns the table needs are read, and the symbol and time range
+    filters are applied while scanning the files. With bulk, the rows are
+    inserted sorted by symbol and time and the (symbol, time) index of the
+    table is rebuilt once afterwards.
+    """
+    paths = [file_paths] if isinstance(file_paths, str) else file_paths
+    for path in paths:
+        if not os.path.exists(path) and not any(c in path for c in "*?["):
+            raise DataError(f"File '{path}' doesn't exist.")
+
+    if instrument:
+        table_name = config.get_db_instrument(instrument)["base_table"]
+
+    con = db.connect() if table_name else duckdb.connect()
+    try:
+        register_source(con, paths)
+    except DataError:
+        raise
+    except Exception as e:
+        raise DataError(f"Failed to read '{', '.join(paths)}': {e}")
+
+    where, parameters = build_filter(symbols, start, end)
+
+    if table_name:
+        try:
+            with db.bulk_load(table_name, con) if bulk else nullcontext():
+                db.copy_from(
+                    SOURCE_VIEW,
+                    table_name,
+                    con,
+                    where=where,
+                    parameters=parameters,
+                    ignore_unknown_columns=True,
+                    order_by=BULK_ORDER if bulk else None,
+                )
+        except Exception as e:
+            raise DataError(
+                f"Failed to copy Parquet data to table '{table_name}': {e}"
+            )
+
+    if not preview:
+        return None
+
+    projection = "*"
+    if table_name:
+        table_columns = db.columns(table_name, con)
+        con.execute(f"DESCRIBE SELECT * FROM {SOURCE_VIEW};")
+        projection = ", ".join(
+            f'"{column_name}"'
+            for column_name, *_ in con.fetchall()
+            if column_name in table_columns
+        )
+
+    where_clause = f"WHERE {where}" if where else ""
+    return con.execute(
+        f"SELECT {projection} FROM {SOURCE_VIEW} {where_clause};", parameters
+    ).df()
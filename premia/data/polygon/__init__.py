@@ -1,3 +1,37 @@
-from ._internal.polygon import stocks, options
+from ._internal.polygon import (
+    stocks,
+    options,
+    backfill,
+    fetch,
+    rest_client,
+    market_day,
+    options_chain,
+    plan,
+    FetchWindow,
+    DEFAULT_CHUNK_SIZE,
+)
+from ._internal.trades import import_trades as trades
+from ._internal.stream import (
+    stream,
+    Stream,
+    DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_FLUSH_ROWS,
+)
 
-__all__ = ["stocks", "options"]
+__all__ = [
+    "stocks",
+    "options",
+    "backfill",
+    "fetch",
+    "rest_client",
+    "market_day",
+    "options_chain",
+    "plan",
+    "FetchWindow",
+    "DEFAULT_CHUNK_SIZE",
+    "trades",
+    "stream",
+    "Stream",
+    "DEFAULT_FLUSH_INTERVAL",
+    "DEFAULT_FLUSH_ROWS",
+]
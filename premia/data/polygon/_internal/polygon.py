@@ -1,11 +1,27 @@
-from typing import cast
-from datetime import datetime
+from typing import Callable, Iterator, cast
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from datetime import date, datetime, timedelta
 from polygon import RESTClient
 from polygon.rest import models
+import duckdb
+import numpy as np
 import pandas as pd
 from premia._shared import types
 from premia import config, db
-from premia.data import DataError, MarketDataRow
+from premia.data import (
+    DataError,
+    CandleBatch,
+    ImportReport,
+    cache,
+    replay,
+    ratelimit,
+    calendar,
+    run_pipeline,
+    DEFAULT_QUEUE_DEPTH,
+    DEFAULT_BATCH_SIZE,
+)
 
 accepted_timespans: list[types.Timespan] = [
     "second",
@@ -16,19 +32,46 @@ accepted_timespans: list[types.Timespan] = [
     "month",
 ]
 
+# polygon.io returns at most 50000 aggregates per page.
+MAX_PAGE_SIZE = 50_000
+DEFAULT_CHUNK_SIZE = MAX_PAGE_SIZE
+
+
+def rest_client() -> RESTClient:
+    """
+    Create a polygon.io client whose requests are kept within the provider's
+    rate limit and are recorded or replayed if a replay mode is active.
+    """
+    api_key = (
+        "replay" if replay.is_replaying() else config.get_provider_polygon()
+    )
+    client = RESTClient(api_key=api_key)
+    client.client = replay.polygon_transport(
+        ratelimit.polygon_transport(client.client)
+    )
+    return client
+
 
 def stocks(
     symbol: str,
     start: datetime,
     end: datetime,
     persist=False,
-) -> pd.DataFrame:
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    resume=False,
+    preview=True,
+    on_conflict: db.OnConflict = "error",
+) -> pd.DataFrame | None:
     return import_market_data(
         instrument="stocks",
         symbol=symbol,
         start=start,
         end=end,
         persist=persist,
+        chunk_size=chunk_size,
+        resume=resume,
+        preview=preview,
+        on_conflict=on_conflict,
     )
 
 
@@ -37,77 +80,469 @@ def options(
     start: datetime,
     end: datetime,
     persist=False,
-) -> pd.DataFrame:
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    resume=False,
+    preview=True,
+    on_conflict: db.OnConflict = "error",
+) -> pd.DataFrame | None:
     return import_market_data(
         instrument="options",
         symbol=symbol,
         start=start,
         end=end,
         persist=persist,
+        chunk_size=chunk_size,
+        resume=resume,
+        preview=preview,
+        on_conflict=on_conflict,
     )
 
 
-def map_agg_to_market_data_row(symbol: str, agg: models.Agg) -> MarketDataRow:
-    if agg.timestamp is None:
-        raise ValueError(f"Entry needs to have a timestamp: {agg}")
+def aggs_to_batch(symbol: str, aggs: list[models.Agg]) -> CandleBatch:
+    """
+    Convert polygon.io aggregates into a candle batch, one column at a time.
+    """
+    for agg in aggs:
+        if agg.timestamp is None:
+            raise ValueError(f"Entry needs to have a timestamp: {agg}")
 
-    return MarketDataRow(
-        time=datetime.fromtimestamp(float(agg.timestamp / 1000)),
+    count = len(aggs)
+    return CandleBatch.from_columns(
+        time=np.fromiter((agg.timestamp for agg in aggs), np.int64, count),
         symbol=symbol,
-        open=str(agg.open),
-        close=str(agg.close),
-        high=str(agg.high),
-        low=str(agg.low),
-        volume=str(int(agg.volume)) if agg.volume else "",
-        currency="USD",
+        open=np.fromiter((agg.open for agg in aggs), np.float64, count),
+        close=np.fromiter((agg.close for agg in aggs), np.float64, count),
+        high=np.fromiter((agg.high for agg in aggs), np.float64, count),
+        low=np.fromiter((agg.low for agg in aggs), np.float64, count),
+        volume=np.fromiter(
+            (agg.volume or 0 for agg in aggs), np.float64, count
+        ),
         data_provider="polygon.io",
     )
 
 
+def iter_batches(
+    client: RESTClient,
+    symbol: str,
+    timespan: types.Timespan,
+    start: datetime,
+    end: datetime,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+) -> Iterator[CandleBatch]:
+    """
+    Page through the aggregates of a symbol and yield them in batches of at
+    most chunk_size candles, so only one chunk is held in memory at a time.
+    """
+    aggs = cast(
+        Iterator[models.Agg],
+        client.list_aggs(
+            ticker=symbol,
+            multiplier=1,
+            timespan=timespan,
+            from_=start,
+            to=end,
+            sort="asc",
+            limit=MAX_PAGE_SIZE,
+        ),
+    )
+
+    while chunk := list(islice(aggs, chunk_size)):
+        yield aggs_to_batch(symbol, chunk)
+
+
+def last_persisted_time(
+    con: duckdb.DuckDBPyConnection,
+    table_name: str,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+) -> datetime | None:
+    con.execute(
+        f"""
+        SELECT MAX(time)
+        FROM {table_name}
+        WHERE symbol = ? AND time >= ? AND time <= ?;
+        """,
+        [symbol, start, end],
+    )
+    result = con.fetchone()
+    return result[0] if result else None
+
+
 def import_market_data(
     instrument: types.InstrumentType,
     symbol: str,
     start: datetime,
     end: datetime,
     persist=False,
-) -> pd.DataFrame:
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    resume=False,
+    preview=True,
+    on_conflict: db.OnConflict = "error",
+) -> pd.DataFrame | None:
+    """
+    Stream the aggregates of a symbol from polygon.io. When persisting, every
+    chunk is written to the instrument's base table as soon as it arrives.
+    With resume the import continues after the latest candle of the symbol
+    that is already stored in the range, e.g. after the process died. If
+    preview is False no DataFrame is assembled, which keeps the memory usage
+    bounded by the chunk size. on_conflict decides what happens to candles
+    that are already stored.
+    """
     instrument_config = config.get_db_instrument(instrument)
     if instrument_config["timespan"] not in accepted_timespans:
         raise ValueError(
             f"Timespan '{instrument_config['timespan']}' is not supported by polygon.io"
         )
 
-    polygon_api_key = config.get_provider_polygon()
-    client = RESTClient(api_key=polygon_api_key)
+    client = rest_client()
+    table_name = instrument_config["base_table"]
 
+    con = db.connect() if persist else None
+    resume_after: int | None = None
+    if con and resume:
+        last_time = last_persisted_time(con, table_name, symbol, start, end)
+        if last_time:
+            start = last_time
+            resume_after = int(last_time.timestamp() * 1000)
+
+    batches: list[CandleBatch] = []
     try:
-        aggs = cast(
-            list[models.Agg],
-            client.get_aggs(
-                ticker=symbol,
-                multiplier=1,
-                timespan=instrument_config["timespan"],
-                from_=start,
-                to=end,
-            ),
-        )
+        for batch in iter_batches(
+            client,
+            symbol,
+            instrument_config["timespan"],
+            start,
+            end,
+            chunk_size,
+        ):
+            if resume_after is not None:
+                batch = batch.take(batch.time > resume_after)
+
+            if con:
+                db.upsert(
+                    table_name, batch.to_df(), con, on_conflict=on_conflict
+                )
+            if preview or not persist:
+                batches.append(batch)
+    except DataError:
+        raise
     except Exception as e:
-        raise DataError(e)
-
-    market_data_rows = [map_agg_to_market_data_row(symbol, agg) for agg in aggs]
-    rows_df = pd.DataFrame(market_data_rows)
-
-    if persist:
-        try:
-            rows_df.to_sql(
-                instrument_config["base_table"],
-                con=db.connect(),
-                if_exists="append",
-                index=False,
+        raise DataError(
+            f"Failed to import polygon.io data for '{symbol}' into '{table_name}': {e}"
+        )
+
+    if persist and not preview:
+        return None
+
+    return CandleBatch.concat(batches).to_df()
+
+
+@dataclass
+class FetchWindow:
+    symbol: str
+    start: datetime
+    end: datetime
+
+    def __str__(self) -> str:
+        return (
+            f"{self.symbol} {self.start.isoformat()} - {self.end.isoformat()}"
+        )
+
+
+def plan(
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timespan: types.Timespan,
+) -> list[FetchWindow]:
+    """
+    Split the range of every symbol into windows that fit into a single page
+    of polygon.io's 50000 results limit. Intraday windows only count the
+    exchange's trading hours and start at the next session, so closed
+    periods neither fill windows nor get windows of their own.
+    """
+    duration = types.timespan_info[timespan].duration
+    window_size = duration * MAX_PAGE_SIZE
+    intraday = duration < timedelta(days=1)
+    windows: list[FetchWindow] = []
+
+    for symbol in symbols:
+        window_start = start
+        while window_start < end:
+            if intraday:
+                window_start = calendar.next_open(window_start)
+                if window_start >= end:
+                    break
+                window_end = min(
+                    calendar.advance(window_start, window_size), end
+                )
+            else:
+                window_end = min(window_start + window_size, end)
+            windows.append(FetchWindow(symbol, window_start, window_end))
+            window_start = window_end + timedelta(milliseconds=1)
+
+    return windows
+
+
+def fetch_window(
+    client: RESTClient, window: FetchWindow, timespan: types.Timespan
+) -> CandleBatch:
+    return cache.fetch(
+        "polygon",
+        [window.symbol],
+        window.start,
+        window.end,
+        timespan,
+        lambda symbols: CandleBatch.concat(
+            list(
+                iter_batches(
+                    client, symbols[0], timespan, window.start, window.end
+                )
             )
-        except Exception as e:
-            raise DataError(
-                f"Failed to copy polygon.io data to table '{instrument_config['base_table']}': {e}"
+        ),
+    )
+
+
+def fetch(
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timespan: types.Timespan,
+    client: RESTClient | None = None,
+    workers=4,
+) -> CandleBatch:
+    """
+    Fetch the candles of many symbols into a single batch without persisting
+    them. The windows are fetched concurrently by a pool of workers.
+    """
+    if timespan not in accepted_timespans:
+        raise ValueError(
+            f"Timespan '{timespan}' is not supported by polygon.io"
+        )
+
+    client = client or rest_client()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batches = executor.map(
+            lambda window: fetch_window(client, window, timespan),
+            plan(symbols, start, end, timespan),
+        )
+        return CandleBatch.concat(list(batches))
+
+
+def backfill(
+    instrument: types.InstrumentType,
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    workers=4,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    on_conflict: db.OnConflict = "error",
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+    bulk=False,
+) -> ImportReport:
+    """
+    Import the candles of many symbols into the instrument's base table. The
+    range of every symbol is split into windows that are fetched concurrently
+    by a pool of workers sharing one client, while a single DuckDB writer
+    combines their results into batches of batch_size rows. At most
+    queue_depth fetched windows wait for the writer. on_progress is called
+    with the report after every written batch. With bulk, the table's index
+    is rebuilt once after the import instead of being updated by every
+    write.
+    """
+    instrument_config = config.get_db_instrument(instrument)
+    timespan = instrument_config["timespan"]
+    if timespan not in accepted_timespans:
+        raise ValueError(
+            f"Timespan '{timespan}' is not supported by polygon.io"
+        )
+
+    client = rest_client()
+    return run_pipeline(
+        plan(symbols, start, end, timespan),
+        lambda window: fetch_window(client, window, timespan),
+        instrument_config["base_table"],
+        workers=workers,
+        queue_depth=queue_depth,
+        batch_size=batch_size,
+        on_conflict=on_conflict,
+        on_progress=on_progress,
+        unit="windows",
+        bulk=bulk,
+    )
+
+
+def grouped_daily_aggs_to_batch(
+    aggs: list[models.GroupedDailyAgg],
+) -> CandleBatch:
+    aggs = [agg for agg in aggs if agg.timestamp is not None and agg.ticker]
+    count = len(aggs)
+    return CandleBatch.from_columns(
+        time=np.fromiter((agg.timestamp for agg in aggs), np.int64, count),
+        symbol=[agg.ticker for agg in aggs],
+        open=np.fromiter((agg.open for agg in aggs), np.float64, count),
+        close=np.fromiter((agg.close for agg in aggs), np.float64, count),
+        high=np.fromiter((agg.high for agg in aggs), np.float64, count),
+        low=np.fromiter((agg.low for agg in aggs), np.float64, count),
+        volume=np.fromiter(
+            (agg.volume or 0 for agg in aggs), np.float64, count
+        ),
+        data_provider="polygon.io",
+    )
+
+
+def fetch_market_day(client: RESTClient, day: date) -> CandleBatch:
+    aggs = cast(
+        list[models.GroupedDailyAgg],
+        client.get_grouped_daily_aggs(day.isoformat(), adjusted=True),
+    )
+    return grouped_daily_aggs_to_batch(aggs)
+
+
+def market_day(
+    start: date,
+    end: date,
+    workers=4,
+    on_conflict: db.OnConflict = "error",
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Import the daily candles of every US stock with polygon.io's grouped
+    daily endpoint, which returns the whole market for a date in a single
+    request. Only trading days are requested. The dates are fetched
+    concurrently and written into the stocks base table, which needs to have
+    a daily timespan, by a single writer.
+    """
+    instrument_config = config.get_db_instrument("stocks")
+    if instrument_config["timespan"] != "day":
+        raise ValueError(
+            f"Grouped daily candles can't be stored in '{instrument_config['base_table']}', because its timespan is '{instrument_config['timespan']}'"
+        )
+
+    client = rest_client()
+    table_name = instrument_config["base_table"]
+    days = [
+        start + timedelta(days=offset)
+        for offset in range((end - start).days + 1)
+        if calendar.is_trading_day(start + timedelta(days=offset))
+    ]
+
+    return run_pipeline(
+        days,
+        lambda day: fetch_market_day(client, day),
+        table_name,
+        workers=workers,
+        queue_depth=queue_depth,
+        batch_size=batch_size,
+        on_conflict=on_conflict,
+        unit="days",
+    )
+
+
+def contracts_to_df(contracts: list[models.OptionsContract]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "symbol": [contract.ticker for contract in contracts],
+            "expiration_date": pd.to_datetime(
+                [contract.expiration_date for contract in contracts]
+            ),
+            "company_symbol": [
+                contract.underlying_ticker for contract in contracts
+            ],
+            "contract_type": [contract.contract_type for contract in contracts],
+            "shares_per_contract": [
+                contract.shares_per_contract for contract in contracts
+            ],
+            "strike_price": [contract.strike_price for contract in contracts],
+            "currency": "USD",
+        }
+    )
+
+
+def import_contracts(
+    client: RESTClient,
+    con: duckdb.DuckDBPyConnection,
+    underlying: str,
+    expiration_start: date,
+    expiration_end: date,
+) -> list[str]:
+    """
+    Page through the reference data of all active and expired contracts of
+    an underlying and add the ones that are missing to the contracts table.
+
+    Returns the symbols of all contracts in the expiration window.
+    """
+    contracts: list[models.OptionsContract] = []
+    for expired in (False, True):
+        contracts.extend(
+            cast(
+                Iterator[models.OptionsContract],
+                client.list_options_contracts(
+                    underlying_ticker=underlying,
+                    expiration_date_gte=expiration_start,
+                    expiration_date_lte=expiration_end,
+                    expired=expired,
+                    limit=1000,
+                ),
             )
+        )
+
+    contracts_df = contracts_to_df(contracts).drop_duplicates("symbol")
+    db.upsert(
+        "contracts",
+        contracts_df,
+        con,
+        on_conflict="ignore",
+        key_columns=("symbol",),
+    )
+
+    return contracts_df["symbol"].tolist()
+
 
-    return rows_df
+def options_chain(
+    underlying: str,
+    expiration_start: date,
+    expiration_end: date,
+    start: datetime,
+    end: datetime,
+    workers=4,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    on_conflict: db.OnConflict = "error",
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Import the option chain of an underlying. The contracts expiring in the
+    expiration window are added to the contracts table, then the candles of
+    all of them are fetched concurrently into the options base table.
+    """
+    client = rest_client()
+
+    try:
+        symbols = import_contracts(
+            client, db.connect(), underlying, expiration_start, expiration_end
+        )
+    except Exception as e:
+        raise DataError(
+            f"Failed to import the option contracts of '{underlying}': {e}"
+        )
+
+    if not symbols:
+        raise DataError(
+            f"polygon.io has no option contracts for '{underlying}' expiring between {expiration_start} and {expiration_end}."
+        )
+
+    return backfill(
+        "options",
+        symbols,
+        start,
+        end,
+        workers=workers,
+        on_progress=on_progress,
+        on_conflict=on_conflict,
+        queue_depth=queue_depth,
+        batch_size=batch_size,
+    )
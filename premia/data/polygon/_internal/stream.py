@@ -0,0 +1,286 @@
+import asyncio
+import json
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+import numpy as np
+import websockets
+from polygon import RESTClient
+from premia._shared import types
+from premia import config, db
+from premia.data import DataError, CandleBatch, ImportReport
+from .polygon import fetch, rest_client
+
+STREAM_URL = "wss://socket.polygon.io"
+# Aggregate events of the websocket feed per timespan.
+stream_events: dict[types.Timespan, str] = {
+    "second": "A",
+    "minute": "AM",
+}
+DEFAULT_FLUSH_INTERVAL = 1000
+DEFAULT_FLUSH_ROWS = 10_000
+MAX_RECONNECT_DELAY = 30.0
+
+
+class StreamBuffer:
+    """
+    Columnar in-memory buffer of streamed aggregates that is flushed to the
+    base table as one batch.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def clear(self) -> None:
+        self.time: list[int] = []
+        self.symbol: list[str] = []
+        self.open: list[float] = []
+        self.close: list[float] = []
+        self.high: list[float] = []
+        self.low: list[float] = []
+        self.volume: list[float] = []
+
+    def append(self, message: dict[str, Any]) -> None:
+        self.time.append(message["s"])
+        self.symbol.append(message["sym"])
+        self.open.append(message["o"])
+        self.close.append(message["c"])
+        self.high.append(message["h"])
+        self.low.append(message["l"])
+        self.volume.append(message["v"])
+
+    def to_batch(self) -> CandleBatch:
+        return CandleBatch.from_columns(
+            time=np.asarray(self.time, dtype=np.int64),
+            symbol=self.symbol,
+            open=self.open,
+            close=self.close,
+            high=self.high,
+            low=self.low,
+            volume=self.volume,
+            data_provider="polygon.io",
+        )
+
+
+class Stream:
+    """
+    Consume polygon.io's websocket feed of per-second or per-minute
+    aggregates into the instrument's base table. Aggregates are buffered and
+    appended every flush_interval milliseconds or flush_rows rows, whichever
+    comes first. After a lost connection or a failed handshake the stream
+    reconnects with exponential backoff and backfills the bars it missed
+    over REST.
+    """
+
+    def __init__(
+        self,
+        instrument: types.InstrumentType,
+        symbols: list[str],
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        flush_rows=DEFAULT_FLUSH_ROWS,
+        url: str | None = None,
+        client: RESTClient | None = None,
+        max_reconnects: int | None = None,
+        stop_event: threading.Event | None = None,
+        on_flush: Callable[[ImportReport], None] | None = None,
+    ):
+        instrument_config = config.get_db_instrument(instrument)
+        self.timespan = instrument_config["timespan"]
+        if self.timespan not in stream_events:
+            raise ValueError(
+                f"polygon.io doesn't stream aggregates with a timespan of '{self.timespan}'"
+            )
+
+        self.table_name = instrument_config["base_table"]
+        self.event = stream_events[self.timespan]
+        self.duration = types.timespan_info[self.timespan].duration
+        self.symbols = symbols
+        self.flush_interval = flush_interval / 1000
+        self.flush_rows = flush_rows
+        self.url = url or f"{STREAM_URL}/{instrument}"
+        self.api_key = config.get_provider_polygon()
+        self.client = client or rest_client()
+        self.max_reconnects = max_reconnects
+        self.stop_event = stop_event or threading.Event()
+        self.on_flush = on_flush
+
+        self.con = db.connect()
+        self.buffer = StreamBuffer()
+        self.report = ImportReport(unit="flushes")
+        # Start time of the latest streamed bar in epoch milliseconds.
+        self.last_time: int | None = None
+
+    def run(self) -> ImportReport:
+        start_time = time.perf_counter()
+        try:
+            asyncio.run(self.consume())
+        finally:
+            self.flush()
+            self.con.close()
+
+        self.report.seconds = time.perf_counter() - start_time
+        return self.report
+
+    async def consume(self) -> None:
+        reconnects = 0
+        while not self.stop_event.is_set():
+            try:
+                async with websockets.connect(self.url) as websocket:
+                    await self.subscribe(websocket)
+                    if reconnects > 0:
+                        await asyncio.to_thread(self.backfill)
+                    reconnects = 0
+                    await self.receive(websocket)
+            except (
+                websockets.WebSocketException,
+                OSError,
+                asyncio.TimeoutError,
+            ) as e:
+                self.flush()
+                reconnects += 1
+                if (
+                    self.max_reconnects is not None
+                    and reconnects > self.max_reconnects
+                ):
+                    raise DataError(
+                        f"Lost the connection to '{self.url}' {reconnects} times: {e}"
+                    )
+
+                delay = min(2 ** (reconnects - 1), MAX_RECONNECT_DELAY)
+                await asyncio.to_thread(self.stop_event.wait, delay)
+
+    async def subscribe(self, websocket) -> None:
+        await websocket.recv()
+        await websocket.send(
+            json.dumps({"action": "auth", "params": self.api_key})
+        )
+        auth_messages = json.loads(await websocket.recv())
+        if auth_messages[0].get("status") != "auth_success":
+            raise DataError(
+                f"polygon.io stream authentication failed: {auth_messages[0].get('message')}"
+            )
+
+        params = ",".join(f"{self.event}.{symbol}" for symbol in self.symbols)
+        await websocket.send(
+            json.dumps({"action": "subscribe", "params": params})
+        )
+
+    async def receive(self, websocket) -> None:
+        flush_deadline = time.monotonic() + self.flush_interval
+        while not self.stop_event.is_set():
+            timeout = max(flush_deadline - time.monotonic(), 0)
+            try:
+                raw_messages = await asyncio.wait_for(
+                    websocket.recv(), timeout=timeout
+                )
+                for message in json.loads(raw_messages):
+                    if message.get("ev") == self.event:
+                        self.buffer.append(message)
+            except asyncio.TimeoutError:
+                pass
+
+            if (
+                len(self.buffer) >= self.flush_rows
+                or time.monotonic() >= flush_deadline
+            ):
+                self.flush()
+                flush_deadline = time.monotonic() + self.flush_interval
+
+    def flush(self) -> None:
+        if len(self.buffer) == 0:
+            return
+
+        batch = self.buffer.to_batch()
+        self.buffer.clear()
+        self.write(batch, datetime.utcnow().isoformat())
+
+    def write(self, batch: CandleBatch, task: str) -> None:
+        try:
+            self.report.add(
+                db.upsert(
+                    self.table_name,
+                    batch.to_df(),
+                    self.con,
+                    on_conflict="ignore",
+                )
+            )
+            if len(batch) > 0:
+                latest_time = int(batch.time.max())
+                self.last_time = max(self.last_time or 0, latest_time)
+        except Exception as e:
+            self.report.failures[task] = str(e)
+
+        self.report.tasks += 1
+        self.report.completed += 1
+        if self.on_flush:
+            self.on_flush(self.report)
+
+    def backfill(self) -> None:
+        """
+        Fetch the completed bars between the latest streamed bar and now
+        over REST. Bars that were streamed before are skipped.
+        """
+        if self.last_time is None:
+            return
+
+        start = datetime.utcfromtimestamp(self.last_time / 1000)
+        end = datetime.utcnow()
+        try:
+            batch = fetch(self.symbols, start, end, self.timespan, self.client)
+        except Exception as e:
+            self.report.failures[f"backfill {start.isoformat()}"] = str(e)
+            return
+
+        duration_ms = self.duration // timedelta(milliseconds=1)
+        end_ms = int(np.datetime64(end, "ms").astype(np.int64))
+        is_complete = batch.time + duration_ms <= end_ms
+        self.write(batch.take(is_complete), f"backfill {start.isoformat()}")
+
+
+def stream(
+    instrument: types.InstrumentType,
+    symbols: list[str],
+    flush_interval=DEFAULT_FLUSH_INTERVAL,
+    flush_rows=DEFAULT_FLUSH_ROWS,
+    url: str | None = None,
+    max_reconnects: int | None = None,
+    stop_event: threading.Event | None = None,
+    on_flush: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Stream the aggregates of the symbols into the instrument's base table
+    until stopped. The instrument needs a timespan of a second or a minute.
+    url replaces polygon.io's websocket server, e.g. with a local stand-in.
+
+    The stream stops when stop_event is set or, if it runs in the main
+    thread, on SIGTERM and SIGINT. The previous signal handlers are restored
+    when the stream stops.
+    """
+    polygon_stream = Stream(
+        instrument,
+        symbols,
+        flush_interval=flush_interval,
+        flush_rows=flush_rows,
+        url=url,
+        max_reconnects=max_reconnects,
+        stop_event=stop_event,
+        on_flush=on_flush,
+    )
+
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signal_number] = signal.signal(
+                signal_number, lambda *_: polygon_stream.stop_event.set()
+            )
+
+    try:
+        return polygon_stream.run()
+    finally:
+        for signal_number, handler in previous_handlers.items():
+            signal.signal(signal_number, handler)
@@ -0,0 +1,251 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator
+from polygon import RESTClient
+import numpy as np
+import pandas as pd
+from premia._shared import types
+from premia import db
+from premia.data import (
+    CandleBatch,
+    ImportReport,
+    trades,
+    calendar,
+    run_pipeline,
+    DEFAULT_QUEUE_DEPTH,
+    DEFAULT_BATCH_SIZE,
+)
+from .polygon import FetchWindow, rest_client
+
+# polygon.io returns at most 50000 trades per page.
+MAX_TRADES_PAGE_SIZE = 50_000
+# Trades are requested one day per window, which keeps every bar of the
+# accepted timespans within one window.
+TRADES_WINDOW_SIZE = timedelta(days=1)
+
+
+def plan_trades(
+    symbols: list[str], start: datetime, end: datetime
+) -> list[FetchWindow]:
+    """
+    Split the range of every symbol into days, cut to the trading hours of
+    the exchange. Days without a session are left out.
+    """
+    windows: list[FetchWindow] = []
+    for symbol in symbols:
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + TRADES_WINDOW_SIZE, end)
+            trading_range = calendar.prune(window_start, window_end, "second")
+            if trading_range:
+                windows.append(FetchWindow(symbol, *trading_range))
+            window_start = window_end
+
+    return windows
+
+
+def iter_trade_pages(
+    client: RESTClient, symbol: str, start: datetime, end: datetime
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Page through the trades of a symbol in [start, end), oldest first. The
+    raw JSON pages are read instead of deserializing every trade into an
+    object.
+    """
+    path = f"/v3/trades/{symbol}"
+    params: dict[str, Any] | None = {
+        "timestamp.gte": to_epoch_ns(start),
+        "timestamp.lt": to_epoch_ns(end),
+        "sort": "timestamp",
+        "order": "asc",
+        "limit": MAX_TRADES_PAGE_SIZE,
+    }
+
+    while path:
+        response = client._get(path=path, params=params, raw=True)
+        page = json.loads(response.data)
+        yield page.get("results") or []
+
+        next_url = page.get("next_url")
+        path = next_url.replace(client.BASE, "") if next_url else ""
+        params = None
+
+
+def fetch_trades_window(
+    client: RESTClient,
+    window: FetchWindow,
+    timespan: types.Timespan,
+    on_trades: Callable[[pd.DataFrame], None] | None = None,
+) -> CandleBatch:
+    """
+    Build the candles of a window while paging through its trades. Every
+    page is aggregated as soon as it arrives, only the trades of its last
+    bar are carried over to the next page, because the bar may continue
+    there. on_trades is called with the trades of every page.
+
+    Corrected trades are dropped and the sale conditions decide which trades
+    set the open, high, low and close, following the SIP rules. Trades at
+    the same time are ordered by their sequence number.
+    """
+    bar_ns = (
+        types.timespan_info[timespan].duration
+        // timedelta(microseconds=1)
+        * 1000
+    )
+    batches: list[CandleBatch] = []
+    columns = {
+        "time_ns": np.empty(0, dtype=np.int64),
+        "sequence": np.empty(0, dtype=np.int64),
+        "price": np.empty(0, dtype=np.float64),
+        "size": np.empty(0, dtype=np.float64),
+        "updates_high_low": np.empty(0, dtype=bool),
+        "updates_open_close": np.empty(0, dtype=bool),
+    }
+
+    for results in iter_trade_pages(
+        client, window.symbol, window.start, window.end
+    ):
+        if not results:
+            continue
+
+        count = len(results)
+        page_time_ns = np.fromiter(
+            (trade["sip_timestamp"] for trade in results), np.int64, count
+        )
+        page_price = np.fromiter(
+            (trade["price"] for trade in results), np.float64, count
+        )
+        page_size = np.fromiter(
+            (trade.get("size", 0) for trade in results), np.float64, count
+        )
+        if on_trades:
+            on_trades(
+                pd.DataFrame(
+                    {
+                        "time": pd.to_datetime(
+                            page_time_ns, unit="ns", utc=True
+                        ),
+                        "symbol": window.symbol,
+                        "price": page_price,
+                        "size": page_size,
+                    }
+                )
+            )
+
+        is_trade, updates_high_low, updates_open_close = (
+            trades.condition_updates(
+                [trade.get("conditions") or [] for trade in results]
+            )
+        )
+        is_trade &= np.fromiter(
+            (not trade.get("correction") for trade in results), bool, count
+        )
+        page_columns = {
+            "time_ns": page_time_ns,
+            "sequence": np.fromiter(
+                (trade.get("sequence_number", 0) for trade in results),
+                np.int64,
+                count,
+            ),
+            "price": page_price,
+            "size": page_size,
+            "updates_high_low": updates_high_low,
+            "updates_open_close": updates_open_close,
+        }
+        columns = {
+            name: np.concatenate((values, page_columns[name][is_trade]))
+            for name, values in columns.items()
+        }
+        if len(columns["time_ns"]) == 0:
+            continue
+
+        order = np.lexsort((columns["sequence"], columns["time_ns"]))
+        columns = {name: values[order] for name, values in columns.items()}
+        time_ns = columns["time_ns"]
+        complete = time_ns // bar_ns < time_ns[-1] // bar_ns
+        batches.append(
+            to_candles(
+                {name: values[complete] for name, values in columns.items()},
+                window.symbol,
+                timespan,
+            )
+        )
+        columns = {name: values[~complete] for name, values in columns.items()}
+
+    batches.append(to_candles(columns, window.symbol, timespan))
+    return CandleBatch.concat(batches)
+
+
+def to_candles(
+    columns: dict[str, np.ndarray], symbol: str, timespan: types.Timespan
+) -> CandleBatch:
+    return trades.trades_to_candles(
+        columns["time_ns"],
+        columns["price"],
+        columns["size"],
+        symbol,
+        timespan,
+        "polygon.io",
+        columns["updates_high_low"],
+        columns["updates_open_close"],
+    )
+
+
+def store_trades(
+    instrument: types.InstrumentType,
+) -> Callable[[pd.DataFrame], None]:
+    """
+    Return a callback that appends trades to the instrument's trades table.
+    Every call uses its own cursor, so workers can append concurrently.
+    """
+    con = db.connect()
+    table_name = trades.trades_table(instrument, con)
+
+    def append(trades_df: pd.DataFrame) -> None:
+        with con.cursor() as cursor:
+            db.insert(table_name, trades_df, cursor)
+
+    return append
+
+
+def import_trades(
+    instrument: types.InstrumentType,
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    workers=4,
+    on_progress: Callable[[ImportReport], None] | None = None,
+    on_conflict: db.OnConflict = "error",
+    keep_trades=False,
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    batch_size=DEFAULT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Build the candles of the instrument's base table from the trades of many
+    symbols between start and end (in UTC). The trades are fetched day by
+    day and aggregated page by page, so only the candles reach the writer.
+    The raw trades are only stored in the `{instrument}_trades` table if
+    keep_trades is True.
+    """
+    table_name, timespan = trades.candle_table_config(instrument)
+    client = rest_client()
+    on_trades = store_trades(instrument) if keep_trades else None
+
+    def fetch(window: FetchWindow) -> CandleBatch:
+        return fetch_trades_window(client, window, timespan, on_trades)
+
+    return run_pipeline(
+        plan_trades(symbols, start, end),
+        fetch,
+        table_name,
+        workers=workers,
+        queue_depth=queue_depth,
+        batch_size=batch_size,
+        on_conflict=on_conflict,
+        on_progress=on_progress,
+        unit="windows",
+    )
+
+
+def to_epoch_ns(value: datetime) -> int:
+    return int(np.datetime64(value, "ns").astype(np.int64))
@@ -0,0 +1,13 @@
+from ._internal.ratelimit import (
+    RateLimiter,
+    limiter,
+    polygon_transport,
+    twelvedata_session,
+)
+
+__all__ = [
+    "RateLimiter",
+    "limiter",
+    "polygon_transport",
+    "twelvedata_session",
+]
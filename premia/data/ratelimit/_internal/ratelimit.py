@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import fcntl
+import random
+from typing import Any, Callable
+import requests
+from urllib3.util import Retry
+from premia import config
+from premia.config._internal.config import CONFIG_DIR_PATH
+
+RATE_LIMIT_DIR_NAME = "ratelimit"
+RATE_LIMIT_DIR_PATH = os.path.join(CONFIG_DIR_PATH, RATE_LIMIT_DIR_NAME)
+TOO_MANY_REQUESTS = 429
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+MAX_BACKOFF = 60.0
+
+
+class RateLimiter:
+    """
+    Budget of at most `requests` requests per `seconds` seconds, shared by
+    all threads and processes using the same provider. The times of the
+    requests in the current window are kept in a state file in ~/.premia that
+    is locked while a request is admitted, so the budget holds for any
+    sliding window, not only for fixed ones.
+    """
+
+    def __init__(self, provider: str, requests: int, seconds: float):
+        self.provider = provider
+        self.requests = requests
+        self.seconds = seconds
+        os.makedirs(RATE_LIMIT_DIR_PATH, exist_ok=True)
+        self.state_path = os.path.join(RATE_LIMIT_DIR_PATH, f"{provider}.json")
+
+    def acquire(self) -> None:
+        """
+        Block until the budget admits another request and count it.
+        """
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """
+        Count a request if the budget admits it.
+
+        Returns 0 if the request was counted, else the seconds until the
+        oldest request of the window expires.
+        """
+        with open(self.state_path, "a+") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                content = file.read()
+                now = time.time()
+                window_start = now - self.seconds
+                stored_times = json.loads(content) if content else []
+                request_times = [
+                    request_time
+                    for request_time in stored_times
+                    if request_time > window_start
+                ]
+
+                if len(request_times) >= self.requests:
+                    return request_times[-self.requests] - window_start
+
+                request_times.append(now)
+                file.seek(0)
+                file.truncate()
+                json.dump(request_times, file)
+                # The state has to be written before the lock is released.
+                file.flush()
+                return 0
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def limiter(provider: str) -> RateLimiter | None:
+    """
+    Return the rate limiter of a provider or None if its config doesn't
+    declare a budget.
+    """
+    try:
+        rate_limit = config.get_provider_rate_limit(provider)
+    except Exception:
+        return None
+
+    if rate_limit is None:
+        return None
+
+    return RateLimiter(provider, rate_limit["requests"], rate_limit["seconds"])
+
+
+def backoff(attempt: int, retry_after: str | None = None) -> float:
+    """
+    Seconds to wait before retrying a rejected request: the server's
+    Retry-After if given, else an exponential backoff with jitter.
+    """
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    delay = min(MAX_BACKOFF, BACKOFF_BASE * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def send(
+    rate_limiter: RateLimiter | None,
+    request: Callable[[], Any],
+    is_rejected: Callable[[Any], bool],
+    retry_after: Callable[[Any], str | None],
+) -> Any:
+    """
+    Send a request within the budget and retry it with exponential backoff
+    while the provider rejects it for exceeding its rate limit. After
+    MAX_RETRIES retries the rejected response is returned.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if rate_limiter:
+            rate_limiter.acquire()
+
+        response = request()
+        if not is_rejected(response) or attempt == MAX_RETRIES:
+            return response
+
+        time.sleep(backoff(attempt, retry_after(response)))
+
+
+class PolygonTransport:
+    """
+    Wraps the urllib3 pool of polygon's RESTClient to keep its requests
+    within the budget. urllib3 doesn't retry rejected requests itself, so
+    every retry is counted against the budget.
+    """
+
+    def __init__(self, pool: Any, rate_limiter: RateLimiter | None):
+        self.pool = pool
+        self.rate_limiter = rate_limiter
+        self.retries = pool.connection_pool_kw.get("retries")
+        if isinstance(self.retries, Retry):
+            self.retries = self.retries.new(
+                status_forcelist=set(self.retries.status_forcelist or ())
+                - {TOO_MANY_REQUESTS}
+            )
+
+    def request(
+        self, method: str, url: str, fields=None, headers=None, **kwargs
+    ) -> Any:
+        kwargs.setdefault("retries", self.retries)
+        return send(
+            self.rate_limiter,
+            lambda: self.pool.request(
+                method, url, fields=fields, headers=headers, **kwargs
+            ),
+            lambda response: response.status == TOO_MANY_REQUESTS,
+            lambda response: response.headers.get("Retry-After"),
+        )
+
+
+class TwelvedataSession:
+    """
+    Wraps the requests session of the TwelveData client to keep its requests
+    within the budget. TwelveData reports an exceeded rate limit with a 429
+    status or with an error body of code 429.
+    """
+
+    def __init__(self, session: Any, rate_limiter: RateLimiter | None):
+        self.session = session
+        self.rate_limiter = rate_limiter
+
+    def get(self, url: str, params=None, **kwargs) -> Any:
+        return send(
+            self.rate_limiter,
+            lambda: self.session.get(url, params=params, **kwargs),
+            is_twelvedata_rejected,
+            lambda response: response.headers.get("Retry-After"),
+        )
+
+
+def is_twelvedata_rejected(response: requests.Response) -> bool:
+    if response.status_code == TOO_MANY_REQUESTS:
+        return True
+
+    # Error bodies are small, time series aren't parsed twice.
+    if len(response.content) > 1024:
+        return False
+    try:
+        return response.json().get("code") == TOO_MANY_REQUESTS
+    except ValueError:
+        return False
+
+
+def polygon_transport(pool: Any) -> PolygonTransport:
+    return PolygonTransport(pool, limiter("polygon"))
+
+
+def twelvedata_session(session: Any) -> TwelvedataSession:
+    return TwelvedataSession(session, limiter("twelvedata"))
@@ -0,0 +1,25 @@
+from ._internal.replay import (
+    recording,
+    replaying,
+    start_recording,
+    start_replaying,
+    stop,
+    is_replaying,
+    polygon_transport,
+    twelvedata_session,
+    yfinance_download,
+    ReplaySettings,
+)
+
+__all__ = [
+    "recording",
+    "replaying",
+    "start_recording",
+    "start_replaying",
+    "stop",
+    "is_replaying",
+    "polygon_transport",
+    "twelvedata_session",
+    "yfinance_download",
+    "ReplaySettings",
+]
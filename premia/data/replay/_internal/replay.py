@@ -0,0 +1,441 @@
+import os
+import re
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator, Literal, TypeAlias
+from urllib.parse import urlencode
+import duckdb
+import numpy as np
+import pandas as pd
+import requests
+from premia._shared import types
+from premia import db
+from premia.data import DataError, cache
+
+ReplayMode: TypeAlias = Literal["off", "record", "replay"]
+
+# Parameters that don't change the response and must not end up in
+# recordings.
+IGNORED_PARAMS = ("apikey", "apiKey")
+# Bars per synthesized response, so synthetic ranges are paged like real
+# ones.
+SYNTHETIC_PAGE_SIZE = 50_000
+
+
+@dataclass
+class ReplaySettings:
+    mode: ReplayMode = "off"
+    directory: str = ""
+    synthetic: bool = False
+    latency: float = 0.0
+    cache_enabled: bool = True
+
+
+settings = ReplaySettings()
+
+
+def start_recording(directory: str) -> None:
+    """
+    Save every provider response to directory, so it can be replayed later.
+    """
+    start(ReplaySettings(mode="record", directory=directory))
+
+
+def start_replaying(directory: str, synthetic=False, latency=0.0) -> None:
+    """
+    Serve provider requests from the responses recorded in directory instead
+    of the network. With synthetic, requests without a recording are
+    answered with generated candles. latency is the number of seconds every
+    response is delayed by, to simulate the network.
+    """
+    start(
+        ReplaySettings(
+            mode="replay",
+            directory=directory,
+            synthetic=synthetic,
+            latency=latency,
+        )
+    )
+
+
+def start(new_settings: ReplaySettings) -> None:
+    # Cached responses would bypass both the recording and the replayed
+    # fetch path.
+    new_settings.cache_enabled = cache.configure().enabled
+    cache.configure(enabled=False)
+    settings.__dict__.update(new_settings.__dict__)
+    os.makedirs(settings.directory, exist_ok=True)
+
+
+def stop() -> None:
+    cache.configure(enabled=settings.cache_enabled)
+    settings.__dict__.update(ReplaySettings().__dict__)
+
+
+@contextmanager
+def recording(directory: str) -> Iterator[None]:
+    start_recording(directory)
+    try:
+        yield
+    finally:
+        stop()
+
+
+@contextmanager
+def replaying(directory: str, synthetic=False, latency=0.0) -> Iterator[None]:
+    start_replaying(directory, synthetic, latency)
+    try:
+        yield
+    finally:
+        stop()
+
+
+def is_replaying() -> bool:
+    return settings.mode == "replay"
+
+
+def request_key(url: str, params: dict | None) -> str:
+    params = {
+        key: value
+        for key, value in (params or {}).items()
+        if key not in IGNORED_PARAMS
+    }
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def recording_path(provider: str, key: str, extension: str) -> str:
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    file_name = f"{key_hash}.{extension}"
+    return os.path.join(settings.directory, provider, file_name)
+
+
+def save(provider: str, key: str, data: bytes) -> None:
+    path = recording_path(provider, key, "json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def load(
+    provider: str, key: str, synthesize: Callable[[], bytes] | None = None
+) -> bytes:
+    if settings.latency:
+        time.sleep(settings.latency)
+
+    path = recording_path(provider, key, "json")
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            return file.read()
+
+    if settings.synthetic and synthesize:
+        return synthesize()
+
+    raise DataError(f"No recorded {provider} response for '{key}'")
+
+
+class ReplayResponse:
+    """
+    Minimal stand-in for the urllib3 and requests responses the provider
+    clients read.
+    """
+
+    def __init__(self, data: bytes, status=200):
+        self.data = data
+        self.content = data
+        self.status = status
+        self.status_code = status
+        self.headers: dict[str, str] = {}
+
+    def json(self) -> Any:
+        return json.loads(self.data)
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class PolygonTransport:
+    """
+    Replaces the urllib3 pool of polygon's RESTClient to record or replay
+    its requests.
+    """
+
+    def __init__(self, pool: Any):
+        self.pool = pool
+
+    def request(
+        self, method: str, url: str, fields=None, headers=None, **kwargs
+    ) -> Any:
+        key = request_key(url, fields)
+        if settings.mode == "replay":
+            return ReplayResponse(
+                load("polygon", key, lambda: synthetic_polygon_aggs(url))
+            )
+
+        response = self.pool.request(
+            method, url, fields=fields, headers=headers, **kwargs
+        )
+        if settings.mode == "record" and response.status == 200:
+            save("polygon", key, response.data)
+
+        return response
+
+
+class TwelvedataSession:
+    """
+    Wraps the requests session of the TwelveData client to record or replay
+    its requests.
+    """
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def get(self, url: str, params=None, **kwargs) -> Any:
+        key = request_key(url, params)
+        if settings.mode == "replay":
+            return ReplayResponse(
+                load(
+                    "twelvedata",
+                    key,
+                    lambda: synthetic_twelvedata_time_series(params or {}),
+                )
+            )
+
+        response = self.session.get(url, params=params, **kwargs)
+        if settings.mode == "record" and response.ok:
+            save("twelvedata", key, response.content)
+
+        return response
+
+
+def polygon_transport(pool: Any) -> Any:
+    return pool if settings.mode == "off" else PolygonTransport(pool)
+
+
+def twelvedata_session(session: requests.Session) -> Any:
+    return session if settings.mode == "off" else TwelvedataSession(session)
+
+
+def yfinance_download(
+    download: Callable[..., pd.DataFrame],
+    tickers: list[str],
+    start: str,
+    end: str,
+    interval: str,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Call `yf.download` or replay its recorded result. yfinance doesn't expose
+    its raw responses, so the DataFrame it returns is recorded instead, as
+    Parquet with its (field, ticker) columns flattened.
+    """
+    if settings.mode == "off":
+        return download(
+            tickers, start=start, end=end, interval=interval, **kwargs
+        )
+
+    key = request_key(
+        "yfinance",
+        {
+            "tickers": ",".join(tickers),
+            "start": start,
+            "end": end,
+            "interval": interval,
+        },
+    )
+    path = recording_path("yfinance", key, "parquet")
+
+    if settings.mode == "replay":
+        if settings.latency:
+            time.sleep(settings.latency)
+        if os.path.exists(path):
+            return read_history(path)
+        if settings.synthetic:
+            return synthetic_yfinance_history(tickers, start, end, interval)
+        raise DataError(f"No recorded yfinance response for '{key}'")
+
+    history = download(
+        tickers, start=start, end=end, interval=interval, **kwargs
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_history(history, path)
+    return history
+
+
+def write_history(history: pd.DataFrame, path: str) -> None:
+    flat_history = history.copy()
+    if isinstance(flat_history.columns, pd.MultiIndex):
+        flat_history.columns = [
+            "|".join(column) for column in flat_history.columns
+        ]
+    flat_history = flat_history.rename_axis("Datetime").reset_index()
+
+    con = duckdb.connect()
+    con.register("history", flat_history)
+    con.execute(f"COPY history TO {db.sql_literal(path)} (FORMAT PARQUET);")
+
+
+def read_history(path: str) -> pd.DataFrame:
+    con = duckdb.connect()
+    history = con.read_parquet(path).df().set_index("Datetime")
+    if any("|" in column for column in history.columns):
+        history.columns = pd.MultiIndex.from_tuples(
+            [tuple(column.split("|")) for column in history.columns]
+        )
+
+    return history
+
+
+def synthetic_candles(symbol: str, times: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Generate a reproducible random walk for a symbol at the given times.
+    """
+    seed = int(hashlib.sha256(symbol.encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed + int(times[0]) if len(times) else seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(times))))
+    open = np.concatenate([[close[0]] if len(close) else [], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, len(times))) * close
+
+    return {
+        "open": open.round(4),
+        "close": close.round(4),
+        "high": (np.maximum(open, close) + spread).round(4),
+        "low": (np.minimum(open, close) - spread).round(4),
+        "volume": rng.integers(100, 10_000, len(times)),
+    }
+
+
+def synthetic_times(
+    start_ms: int, end_ms: int, duration: timedelta
+) -> np.ndarray:
+    step = duration // timedelta(milliseconds=1)
+    first = -(-start_ms // step) * step
+    return np.arange(first, end_ms + 1, step, dtype=np.int64)
+
+
+AGGS_PATH = re.compile(
+    r"/v2/aggs/ticker/(?P<symbol>[^/]+)/range/1/(?P<timespan>\w+)/(?P<start>\d+)/(?P<end>\d+)"
+)
+
+
+def synthetic_polygon_aggs(url: str) -> bytes:
+    match = AGGS_PATH.search(url)
+    if match is None:
+        raise DataError(f"Can't synthesize a polygon.io response for '{url}'")
+
+    timespan = match["timespan"]
+    times = synthetic_times(
+        int(match["start"]),
+        int(match["end"]),
+        types.timespan_info[timespan].duration,
+    )
+    page_times = times[:SYNTHETIC_PAGE_SIZE]
+    candles = synthetic_candles(match["symbol"], page_times)
+
+    response: dict[str, Any] = {
+        "ticker": match["symbol"],
+        "status": "OK",
+        "resultsCount": len(page_times),
+        "results": [
+            {
+                "t": int(t),
+                "o": float(o),
+                "c": float(c),
+                "h": float(h),
+                "l": float(l),
+                "v": int(v),
+            }
+            for t, o, c, h, l, v in zip(
+                page_times,
+                candles["open"],
+                candles["close"],
+                candles["high"],
+                candles["low"],
+                candles["volume"],
+            )
+        ],
+    }
+    if len(times) > SYNTHETIC_PAGE_SIZE:
+        next_start = int(times[SYNTHETIC_PAGE_SIZE])
+        response["next_url"] = AGGS_PATH.sub(
+            f"/v2/aggs/ticker/{match['symbol']}/range/1/{timespan}/{next_start}/{match['end']}",
+            url.split("?")[0],
+        )
+
+    return json.dumps(response).encode()
+
+
+def synthetic_twelvedata_time_series(params: dict) -> bytes:
+    timespan = next(
+        timespan
+        for timespan, info in types.timespan_info.items()
+        if f"1{info.twelvedata_code}" == params["interval"]
+    )
+    start = datetime.strptime(params["start_date"], "%Y-%m-%d %H:%M:%S")
+    end = datetime.strptime(params["end_date"], "%Y-%m-%d %H:%M:%S")
+    times = synthetic_times(
+        int(start.replace(tzinfo=timezone.utc).timestamp() * 1000),
+        int(end.replace(tzinfo=timezone.utc).timestamp() * 1000),
+        types.timespan_info[timespan].duration,
+    )[::-1][: int(params.get("outputsize", 5000))]
+    datetimes = pd.to_datetime(times, unit="ms").strftime("%Y-%m-%d %H:%M:%S")
+
+    series = {}
+    for symbol in params["symbol"].split(","):
+        candles = synthetic_candles(symbol, times)
+        series[symbol] = {
+            "meta": {"symbol": symbol, "currency": "USD"},
+            "values": [
+                {
+                    "datetime": datetime_str,
+                    "open": str(o),
+                    "close": str(c),
+                    "high": str(h),
+                    "low": str(l),
+                    "volume": str(v),
+                }
+                for datetime_str, o, c, h, l, v in zip(
+                    datetimes,
+                    candles["open"],
+                    candles["close"],
+                    candles["high"],
+                    candles["low"],
+                    candles["volume"],
+                )
+            ],
+            "status": "ok",
+        }
+
+    response = series if len(series) > 1 else next(iter(series.values()))
+    return json.dumps(response).encode()
+
+
+def synthetic_yfinance_history(
+    tickers: list[str], start: str, end: str, interval: str
+) -> pd.DataFrame:
+    timespan = next(
+        timespan
+        for timespan, info in types.timespan_info.items()
+        if f"1{info.yfinance_code}" == interval
+    )
+    start_ms = int(pd.Timestamp(start, tz="UTC").value // 1_000_000)
+    end_ms = int(pd.Timestamp(end, tz="UTC").value // 1_000_000) - 1
+    times = synthetic_times(
+        start_ms, end_ms, types.timespan_info[timespan].duration
+    )
+
+    fields = ["Close", "High", "Low", "Open", "Volume"]
+    columns = {}
+    for ticker in tickers:
+        candles = synthetic_candles(ticker, times)
+        for field in fields:
+            columns[(field, ticker)] = candles[field.lower()]
+
+    history = pd.DataFrame(
+        columns, index=pd.to_datetime(times, unit="ms", utc=True)
+    )
+    history.columns = pd.MultiIndex.from_tuples(history.columns)
+    return history.sort_index(axis=1, level=0)
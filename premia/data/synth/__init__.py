@@ -0,0 +1,3 @@
+from ._internal.synth import synth, grid, symbol_names, OutputType
+
+__all__ = ["synth", "grid", "symbol_names", "OutputType"]
@@ -0,0 +1,732 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from datetime import datetime, timedelta
+from typing import Callable, Literal, TypeAlias
+import duckdb
+import numpy as np
+import pandas as pd
+from premia._shared import errors, types
+from premia import config, db
+from premia.data import (
+    DataError,
+    CandleBatch,
+    ImportReport,
+    calendar,
+    contracts,
+    run_pipeline,
+)
+
+OutputType: TypeAlias = Literal["tables", "parquet"]
+
+DATA_PROVIDER = "synthetic"
+# Synthetic tickers are 'SY' followed by letters, so they are valid OCC
+# underlyings and unlikely to collide with real symbols.
+SYMBOL_PREFIX = "SY"
+MAX_SYMBOL_LETTERS = 4
+DEFAULT_TIMESPANS: dict[types.InstrumentType, types.Timespan] = {
+    "stocks": "minute",
+    "options": "hour",
+}
+SECTORS = [
+    ("Technology", "Software - Infrastructure"),
+    ("Technology", "Semiconductors"),
+    ("Communication Services", "Internet Content & Information"),
+    ("Consumer Cyclical", "Internet Retail"),
+    ("Consumer Defensive", "Discount Stores"),
+    ("Financial Services", "Banks - Diversified"),
+    ("Healthcare", "Drug Manufacturers - General"),
+    ("Energy", "Oil & Gas Integrated"),
+    ("Industrials", "Aerospace & Defense"),
+    ("Utilities", "Utilities - Regulated Electric"),
+]
+TRADING_DAYS_PER_YEAR = 252
+REGULAR_SESSION = timedelta(hours=6, minutes=30)
+# Share of a day's variance that falls between the close and the next open.
+OVERNIGHT_VARIANCE = 0.2
+RISK_FREE_RATE = 0.04
+# Contracts expire at the close of their expiration date.
+EXPIRATION_TIME = timedelta(hours=21)
+MS_PER_YEAR = 365 * 24 * 3600 * 1000
+
+
+@dataclass
+class SymbolModel:
+    """
+    Parameters of the jump diffusion and the volume of a synthetic symbol.
+    """
+
+    symbol: str
+    seed: int
+    price: float
+    drift: float
+    volatility: float
+    jump_intensity: float
+    jump_mean: float
+    jump_std: float
+    daily_volume: float
+
+
+@dataclass
+class Grid:
+    """
+    Bar times of a timespan within the trading sessions of a range. Every bar
+    has its length in trading years, whether it opens a session and its
+    position within the session for the intraday volume profile.
+    """
+
+    time: np.ndarray
+    years: np.ndarray
+    session_open: np.ndarray
+    position: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+@dataclass
+class SynthTask:
+    instrument: types.InstrumentType
+    part: int
+    models: list[SymbolModel]
+
+    def __str__(self) -> str:
+        return f"{self.instrument} part {self.part} ({self.models[0].symbol}-{self.models[-1].symbol})"
+
+
+def symbol_names(count: int) -> list[str]:
+    letters = 3
+    while 26**letters < count:
+        letters += 1
+    if letters > MAX_SYMBOL_LETTERS:
+        raise DataError(
+            f"At most {26**MAX_SYMBOL_LETTERS} synthetic symbols can be generated"
+        )
+
+    codes = np.arange(count)
+    chars = []
+    for position in range(letters - 1, -1, -1):
+        chars.append(codes // 26**position % 26)
+
+    return [
+        SYMBOL_PREFIX + "".join(chr(65 + char[i]) for char in chars)
+        for i in range(count)
+    ]
+
+
+def symbol_models(symbols: list[str], seed: int) -> list[SymbolModel]:
+    """
+    Draw the model parameters of every symbol. A symbol's parameters and
+    paths only depend on the seed and its position, so stocks and options of
+    the same run describe the same companies.
+    """
+    models = []
+    for i, symbol in enumerate(symbols):
+        rng = np.random.default_rng([seed, i])
+        models.append(
+            SymbolModel(
+                symbol=symbol,
+                seed=int(rng.integers(2**62)),
+                price=float(np.exp(rng.uniform(np.log(5), np.log(800)))),
+                drift=float(rng.normal(0.07, 0.1)),
+                volatility=float(rng.uniform(0.15, 0.7)),
+                jump_intensity=float(rng.uniform(0.5, 8)),
+                jump_mean=float(rng.normal(-0.01, 0.01)),
+                jump_std=float(rng.uniform(0.01, 0.06)),
+                daily_volume=float(
+                    np.exp(rng.uniform(np.log(1e5), np.log(5e7)))
+                ),
+            )
+        )
+
+    return models
+
+
+def to_epoch_ms(moment: datetime) -> int:
+    return int(pd.Timestamp(moment).value // 1_000_000)
+
+
+def grid(start: datetime, end: datetime, timespan: types.Timespan) -> Grid:
+    """
+    Lay out the bars of a timespan over the regular sessions in [start, end).
+    Intraday bars are aligned like the bars of the data providers, so the
+    first and last bar of a session can be cut short by the open and close.
+    """
+    sessions = [
+        session
+        for session in calendar.sessions(start, end)
+        if start <= session.open < end
+    ]
+    if not sessions:
+        return Grid(
+            time=np.empty(0, dtype=np.int64),
+            years=np.empty(0),
+            session_open=np.empty(0, dtype=bool),
+            position=np.empty(0),
+        )
+
+    opens = np.array([to_epoch_ms(session.open) for session in sessions])
+    closes = np.array([to_epoch_ms(session.close) for session in sessions])
+
+    if timespan in ("second", "minute", "hour"):
+        step = types.timespan_info[timespan].duration // timedelta(
+            milliseconds=1
+        )
+        first_bars = opens // step
+        counts = -(-closes // step) - first_bars
+        session_index = np.repeat(np.arange(len(sessions)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        bar_time = (first_bars[session_index] + offsets) * step
+        bar_start = np.maximum(bar_time, opens[session_index])
+        bar_end = np.minimum(bar_time + step, closes[session_index])
+        session_ms = REGULAR_SESSION // timedelta(milliseconds=1)
+
+        return Grid(
+            time=bar_time,
+            years=(bar_end - bar_start) / session_ms / TRADING_DAYS_PER_YEAR,
+            session_open=offsets == 0,
+            position=(bar_start - opens[session_index])
+            / (closes - opens)[session_index],
+        )
+
+    days = pd.DatetimeIndex([session.date for session in sessions])
+    if timespan == "week":
+        buckets = days - pd.to_timedelta(days.weekday, unit="D")
+    elif timespan == "month":
+        buckets = days - pd.to_timedelta(days.day - 1, unit="D")
+    else:
+        buckets = days
+
+    bucket_time, session_counts = np.unique(
+        buckets.as_unit("ms").asi8, return_counts=True
+    )
+    return Grid(
+        time=bucket_time,
+        years=session_counts / TRADING_DAYS_PER_YEAR,
+        session_open=np.ones(len(bucket_time), dtype=bool),
+        position=np.full(len(bucket_time), 0.5),
+    )
+
+
+def simulate_prices(
+    models: list[SymbolModel], bars: Grid
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate the opens and closes of every symbol on the grid as a geometric
+    Brownian motion with normally distributed jumps. Bars that open a session
+    start with the overnight move, so they gap away from the previous close.
+
+    Returns the opens and closes as arrays of shape (symbols, bars).
+    """
+    shape = (len(models), len(bars))
+    drift = np.array([model.drift for model in models])[:, None]
+    volatility = np.array([model.volatility for model in models])[:, None]
+
+    overnight_years = bars.session_open * (
+        OVERNIGHT_VARIANCE / TRADING_DAYS_PER_YEAR
+    )
+    shocks = np.empty(shape)
+    overnight_shocks = np.empty(shape)
+    jumps = np.empty(shape)
+    for i, model in enumerate(models):
+        rng = np.random.default_rng([model.seed, 0])
+        shocks[i] = rng.standard_normal(len(bars))
+        overnight_shocks[i] = rng.standard_normal(len(bars))
+        jump_counts = rng.poisson(
+            model.jump_intensity * (bars.years + overnight_years)
+        )
+        jumps[i] = jump_counts * model.jump_mean + np.sqrt(
+            jump_counts
+        ) * model.jump_std * rng.standard_normal(len(bars))
+
+    trend = drift - 0.5 * volatility**2
+    intraday = (
+        trend * bars.years + volatility * np.sqrt(bars.years) * shocks + jumps
+    )
+    overnight = (
+        trend * overnight_years
+        + volatility * np.sqrt(overnight_years) * overnight_shocks
+    )
+    log_close = np.cumsum(intraday + overnight, axis=1)
+    log_close += np.log([model.price for model in models])[:, None]
+
+    return np.exp(log_close - intraday), np.exp(log_close)
+
+
+def candle_envelope(
+    rng: np.random.Generator,
+    open: np.ndarray,
+    close: np.ndarray,
+    spread: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Draw highs and lows around the open and close of every bar.
+    """
+    high = np.maximum(open, close) * np.exp(
+        np.abs(rng.standard_normal(open.shape)) * spread
+    )
+    low = np.minimum(open, close) * np.exp(
+        -np.abs(rng.standard_normal(open.shape)) * spread
+    )
+    return high, low
+
+
+def volume_profile(position: np.ndarray) -> np.ndarray:
+    """
+    U-shaped intraday volume profile with a mean of one: trading is busiest
+    right after the open and before the close.
+    """
+    return (1 + 3 * (2 * position - 1) ** 2) / 2
+
+
+def stock_candles(task: SynthTask, bars: Grid, gap_rate: float) -> CandleBatch:
+    """
+    Generate the candles of the task's symbols. Bars are dropped at the gap
+    rate to leave holes like the ones in real provider data.
+    """
+    if len(bars) == 0:
+        return CandleBatch.empty()
+
+    open, close = simulate_prices(task.models, bars)
+    rng = np.random.default_rng([task.models[0].seed, 1])
+
+    volatility = np.array([model.volatility for model in task.models])
+    spread = 0.5 * volatility[:, None] * np.sqrt(bars.years)[None, :]
+    high, low = candle_envelope(rng, open, close, spread)
+
+    daily_volume = np.array([model.daily_volume for model in task.models])
+    volume = (
+        daily_volume[:, None]
+        * (bars.years * TRADING_DAYS_PER_YEAR * volume_profile(bars.position))[
+            None, :
+        ]
+        * rng.lognormal(-0.125, 0.5, open.shape)
+    )
+
+    return to_batch(
+        [model.symbol for model in task.models],
+        bars,
+        open,
+        close,
+        high,
+        low,
+        volume,
+        1 - gap_rate,
+        rng,
+    )
+
+
+def to_batch(
+    symbols: list[str],
+    bars: Grid,
+    open: np.ndarray,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    fill_rate: float,
+    rng: np.random.Generator,
+) -> CandleBatch:
+    """
+    Flatten arrays of shape (symbols, bars) into a batch ordered by symbol
+    and time. Every bar is kept with the probability of the fill rate and
+    bars without a close are left out.
+    """
+    keep = (rng.random(open.shape) < fill_rate) & np.isfinite(close)
+    rows = np.flatnonzero(keep.ravel())
+
+    symbol_codes = (rows // len(bars)).astype(np.int32)
+    bar_index = rows % len(bars)
+
+    return CandleBatch(
+        time=bars.time[bar_index],
+        symbol=pd.Categorical.from_codes(symbol_codes, categories=symbols),
+        open=np.round(open.ravel()[rows], 2),
+        close=np.round(close.ravel()[rows], 2),
+        high=np.round(high.ravel()[rows], 2),
+        low=np.maximum(np.round(low.ravel()[rows], 2), 0.01),
+        volume=np.maximum(volume.ravel()[rows], 1).astype(np.int64),
+        currency=pd.Categorical.from_codes(
+            np.zeros(len(rows), dtype=np.int8), categories=["USD"]
+        ),
+        data_provider=pd.Categorical.from_codes(
+            np.zeros(len(rows), dtype=np.int8), categories=[DATA_PROVIDER]
+        ),
+    )
+
+
+def strike_step(price: float) -> float:
+    if price < 25:
+        return 0.5
+    if price < 100:
+        return 1.0
+    if price < 250:
+        return 2.5
+
+    return 5.0
+
+
+def contract_symbols(
+    model: SymbolModel, start: datetime, end: datetime, count: int
+) -> list[str]:
+    """
+    Build OCC symbols for a chain of calls and puts around the starting
+    price. The chain has monthly expirations from start to a quarter after
+    end and strikes spread evenly over ±30% of the starting price.
+    """
+    if count <= 0:
+        return []
+
+    fridays = pd.date_range(start, end + timedelta(days=90), freq="W-FRI")
+    monthly = fridays[(fridays.day >= 15) & (fridays.day <= 21)]
+    expirations = list(monthly if len(monthly) else fridays[-1:])
+    expirations = expirations[: max(1, min(len(expirations), count // 4))]
+    strikes_per_expiration = -(-count // (2 * len(expirations)))
+
+    step = strike_step(model.price)
+    moneyness = np.linspace(0.7, 1.3, strikes_per_expiration)
+    strikes = np.unique(np.round(model.price * moneyness / step) * step)
+    strikes = strikes[strikes > 0]
+
+    symbols = []
+    for expiration in expirations:
+        for contract_type in ("C", "P"):
+            for strike in strikes:
+                symbols.append(
+                    f"{model.symbol}{expiration:%y%m%d}{contract_type}{round(strike * 1000):08d}"
+                )
+
+    return symbols[:count]
+
+
+def normal_cdf(x: np.ndarray) -> np.ndarray:
+    """
+    Standard normal distribution function after Abramowitz and Stegun
+    26.2.17, accurate to 7.5e-8.
+    """
+    t = 1 / (1 + 0.2316419 * np.abs(x))
+    polynomial = t * (
+        0.319381530
+        + t
+        * (
+            -0.356563782
+            + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))
+        )
+    )
+    tail = np.exp(-0.5 * x**2) / np.sqrt(2 * np.pi) * polynomial
+    return np.where(x >= 0, 1 - tail, tail)
+
+
+def black_scholes(
+    spot: np.ndarray,
+    strike: np.ndarray,
+    years: np.ndarray,
+    volatility: float,
+    is_call: np.ndarray,
+) -> np.ndarray:
+    years = np.maximum(years, 1e-6)
+    deviation = volatility * np.sqrt(years)
+    d1 = (
+        np.log(spot / strike) + (RISK_FREE_RATE + 0.5 * volatility**2) * years
+    ) / deviation
+    d2 = d1 - deviation
+    discounted_strike = strike * np.exp(-RISK_FREE_RATE * years)
+
+    call = spot * normal_cdf(d1) - discounted_strike * normal_cdf(d2)
+    put = discounted_strike * normal_cdf(-d2) - spot * normal_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def option_candles(
+    task: SynthTask,
+    bars: Grid,
+    chains: dict[str, pd.DataFrame],
+    fill_rate: float,
+) -> CandleBatch:
+    """
+    Generate the candles of the contracts of the task's underlyings. The
+    underlying is simulated on the options grid with the same model as its
+    stock and every contract is priced with Black-Scholes until its
+    expiration. Options trade thinly, so only a share of the bars given by
+    the fill rate has a candle.
+    """
+    batches = []
+    for model in task.models:
+        chain = chains.get(model.symbol)
+        if chain is None or len(bars) == 0:
+            continue
+
+        rng = np.random.default_rng([model.seed, 2])
+        spot_open, spot_close = simulate_prices([model], bars)
+        strike = chain["strike_price"].to_numpy(dtype=np.float64)[:, None]
+        is_call = (chain["contract_type"] == "call").to_numpy()[:, None]
+        expiration = (
+            (
+                chain["expiration_date"]
+                .dt.tz_convert("UTC")
+                .dt.tz_localize(None)
+                + EXPIRATION_TIME
+            )
+            .to_numpy(dtype="datetime64[ms]")
+            .astype(np.int64)[:, None]
+        )
+        remaining = (expiration - bars.time[None, :]) / MS_PER_YEAR
+
+        open, close = (
+            np.maximum(
+                black_scholes(
+                    spot, strike, remaining, model.volatility, is_call
+                ),
+                0.01,
+            )
+            for spot in (spot_open, spot_close)
+        )
+        # Expired contracts don't trade anymore.
+        close[remaining <= 0] = np.nan
+
+        spread = model.volatility * np.sqrt(bars.years)[None, :] * 2
+        high, low = candle_envelope(rng, open, close, spread)
+        volume = rng.lognormal(2, 1.5, open.shape)
+
+        batches.append(
+            to_batch(
+                list(chain["symbol"]),
+                bars,
+                open,
+                close,
+                high,
+                low,
+                volume,
+                fill_rate,
+                rng,
+            )
+        )
+
+    return CandleBatch.concat(batches)
+
+
+def companies_df(models: list[SymbolModel]) -> pd.DataFrame:
+    sectors = [SECTORS[model.seed % len(SECTORS)] for model in models]
+    return pd.DataFrame(
+        {
+            "symbol": [model.symbol for model in models],
+            "name": [
+                f"{model.symbol[len(SYMBOL_PREFIX):].title()} Synthetic Inc."
+                for model in models
+            ],
+            "industry": [industry for _, industry in sectors],
+            "sector": [sector for sector, _ in sectors],
+            "country": "United States",
+        }
+    )
+
+
+def contracts_df(
+    models: list[SymbolModel], start: datetime, end: datetime, count: int
+) -> pd.DataFrame:
+    symbols = [
+        symbol
+        for model in models
+        for symbol in contract_symbols(model, start, end, count)
+    ]
+    return contracts.parse_symbols(symbols)
+
+
+def chunk_tasks(
+    instrument: types.InstrumentType,
+    models: list[SymbolModel],
+    rows_per_symbol: int,
+    chunk_rows: int,
+) -> list[SynthTask]:
+    symbols_per_chunk = max(1, chunk_rows // max(rows_per_symbol, 1))
+    return [
+        SynthTask(instrument, part, models[i : i + symbols_per_chunk])
+        for part, i in enumerate(range(0, len(models), symbols_per_chunk))
+    ]
+
+
+def table_timespan(
+    instrument: types.InstrumentType, output: OutputType
+) -> tuple[str, types.Timespan]:
+    """
+    Return the table and timespan of an instrument's candles. Parquet files
+    follow the configured base table and fall back to the default timespan
+    if the instrument isn't set up.
+    """
+    try:
+        instrument_config = config.get_db_instrument(instrument)
+        return instrument_config["base_table"], instrument_config["timespan"]
+    except errors.ConfigError:
+        if output == "tables":
+            raise
+
+    timespan = DEFAULT_TIMESPANS[instrument]
+    return f"{instrument}_1_{timespan}_candles", timespan
+
+
+def write_parquet(df: pd.DataFrame, path: str) -> None:
+    con = duckdb.connect()
+    try:
+        con.register("synth_rows", df)
+        con.execute(
+            f"""
+            COPY (SELECT * FROM synth_rows)
+            TO '{path.replace("'", "''")}' (FORMAT parquet);
+            """
+        )
+    finally:
+        con.close()
+
+
+def run_parquet(
+    tasks: list[SynthTask],
+    generate: Callable[[SynthTask], CandleBatch],
+    directory: str,
+    workers: int,
+    on_progress: Callable[[ImportReport], None] | None,
+) -> ImportReport:
+    """
+    Generate the tasks with a pool of threads that each write their own
+    Parquet file, since files don't need a single writer.
+    """
+    os.makedirs(directory, exist_ok=True)
+    report = ImportReport(tasks=len(tasks), unit="chunks")
+    start_time = time.perf_counter()
+
+    def run(task: SynthTask) -> int:
+        batch = generate(task)
+        write_parquet(
+            batch.to_df(),
+            os.path.join(directory, f"part-{task.part:05d}.parquet"),
+        )
+        return len(batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [(task, executor.submit(run, task)) for task in tasks]
+        for task, future in futures:
+            try:
+                report.rows += future.result()
+            except Exception as e:
+                report.failures[str(task)] = str(e)
+            report.completed += 1
+            report.seconds = time.perf_counter() - start_time
+            if on_progress:
+                on_progress(report)
+
+    return report
+
+
+def synth(
+    symbols: int | list[str] = 100,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    instruments: list[types.InstrumentType] | None = None,
+    contracts_per_symbol=20,
+    output: OutputType = "tables",
+    directory: str = "synthetic",
+    seed=0,
+    gap_rate=0.001,
+    option_fill_rate=0.3,
+    chunk_rows=2_000_000,
+    workers=4,
+    on_conflict: db.OnConflict = "error",
+    on_progress: Callable[[ImportReport], None] | None = None,
+    bulk=False,
+) -> dict[types.InstrumentType, ImportReport]:
+    """
+    Generate realistic market data for scale tests: companies, option
+    contracts and candle series of stocks and options over the trading
+    sessions between start and end.
+
+    Stock prices follow a geometric Brownian motion with jumps and overnight
+    gaps, volumes follow a U-shaped intraday profile and a small share of
+    the bars is missing. Options are priced with Black-Scholes on the
+    simulated underlying. The same seed always generates the same data.
+
+    The candles are generated in chunks of about chunk_rows rows by a pool
+    of threads and written either to the instruments' base tables, or to
+    Parquet files in the directory with one subdirectory per table.
+    Companies and contracts are written next to them. With bulk, the index
+    of every base table is rebuilt once after its candles are written.
+    """
+    end = end or datetime.utcnow().replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise DataError("The start of the range must lie before its end")
+
+    instruments = instruments or ["stocks", "options"]
+    names = symbol_names(symbols) if isinstance(symbols, int) else symbols
+    models = symbol_models(names, seed)
+
+    companies = companies_df(models)
+    contract_rows = pd.DataFrame()
+    chains: dict[str, pd.DataFrame] = {}
+    if "options" in instruments:
+        contract_rows = contracts_df(models, start, end, contracts_per_symbol)
+        groups = contract_rows.groupby("company_symbol", sort=False)
+        chains = dict(iter(groups))
+
+    if output == "tables":
+        con = db.connect()
+        try:
+            db.upsert("companies", companies, con, key_columns=("symbol",))
+            if len(contract_rows):
+                db.upsert(
+                    "contracts", contract_rows, con, key_columns=("symbol",)
+                )
+        finally:
+            con.close()
+    else:
+        os.makedirs(directory, exist_ok=True)
+        write_parquet(companies, os.path.join(directory, "companies.parquet"))
+        if len(contract_rows):
+            write_parquet(
+                contract_rows, os.path.join(directory, "contracts.parquet")
+            )
+
+    reports: dict[types.InstrumentType, ImportReport] = {}
+    for instrument in instruments:
+        table_name, timespan = table_timespan(instrument, output)
+        bars = grid(start, end, timespan)
+
+        if instrument == "stocks":
+            rows_per_symbol = len(bars)
+            generate = partial(stock_candles, bars=bars, gap_rate=gap_rate)
+        else:
+            rows_per_symbol = len(bars) * contracts_per_symbol
+            generate = partial(
+                option_candles,
+                bars=bars,
+                chains=chains,
+                fill_rate=option_fill_rate,
+            )
+
+        tasks = chunk_tasks(instrument, models, rows_per_symbol, chunk_rows)
+        if output == "tables":
+            reports[instrument] = run_pipeline(
+                tasks,
+                generate,
+                table_name,
+                workers=workers,
+                batch_size=chunk_rows,
+                on_conflict=on_conflict,
+                on_progress=on_progress,
+                unit="chunks",
+                bulk=bulk,
+            )
+        else:
+            reports[instrument] = run_parquet(
+                tasks,
+                generate,
+                os.path.join(directory, table_name),
+                workers,
+                on_progress,
+            )
+
+    return reports
@@ -0,0 +1,17 @@
+from ._internal.trades import (
+    copy,
+    trades_to_candles,
+    condition_updates,
+    trades_table,
+    candle_table_config,
+    accepted_timespans,
+)
+
+__all__ = [
+    "copy",
+    "trades_to_candles",
+    "condition_updates",
+    "trades_table",
+    "candle_table_config",
+    "accepted_timespans",
+]
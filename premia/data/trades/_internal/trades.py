@@ -0,0 +1,334 @@
+import os
+import time
+from datetime import timedelta
+import duckdb
+import numpy as np
+from premia._shared import types
+from premia import config, db
+from premia.data import DataError, CandleBatch, ImportReport
+
+# Candles are built from trades for timespans with a fixed duration.
+accepted_timespans: list[types.Timespan] = ["second", "minute", "hour"]
+
+TIME_COLUMNS = ("time", "sip_timestamp", "participant_timestamp", "timestamp")
+SYMBOL_COLUMNS = ("symbol", "ticker")
+SIZE_COLUMNS = ("size", "volume", "quantity")
+SEQUENCE_COLUMNS = ("sequence_number", "sequence")
+INTEGER_TYPES = ("BIGINT", "UBIGINT", "HUGEINT", "INTEGER")
+SOURCE_VIEW = "trades_source"
+TRADES_VIEW = "trades_normalized"
+CANDLES_VIEW = "trades_candles"
+
+# Sale conditions of the consolidated tape, by polygon.io's condition ids,
+# that follow the SIP rules for building bars. Official open and close
+# prints and corrected closes repeat earlier trades and are ignored.
+NON_TRADE_CONDITIONS = frozenset({15, 16, 38})
+# Trades that don't set the high and low: average price, cash, next day,
+# price variation, prior reference price, seller, odd lot and contingent
+# trades.
+NO_HIGH_LOW_CONDITIONS = frozenset({2, 7, 20, 21, 22, 29, 37, 52, 53})
+# Trades that set the high and low, but not the open and close, because
+# they are derivatively priced or reported out of sequence.
+NO_OPEN_CLOSE_CONDITIONS = NO_HIGH_LOW_CONDITIONS | {10, 13, 32, 33}
+
+
+def candle_table_config(
+    instrument: types.InstrumentType,
+) -> tuple[str, types.Timespan]:
+    instrument_config = config.get_db_instrument(instrument)
+    timespan = instrument_config["timespan"]
+    if timespan not in accepted_timespans:
+        raise DataError(
+            f"Candles can't be built from trades for the timespan '{timespan}'"
+        )
+
+    return instrument_config["base_table"], timespan
+
+
+def trades_table(
+    instrument: types.InstrumentType, con: duckdb.DuckDBPyConnection
+) -> str:
+    """
+    Create the table of an instrument's raw trades if it doesn't exist yet
+    and return its name.
+    """
+    table_name = f"{instrument}_trades"
+    with con.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                time TIMESTAMPTZ NOT NULL,
+                symbol TEXT NOT NULL,
+                price DOUBLE NOT NULL,
+                size DOUBLE NOT NULL
+            );
+            """
+        )
+
+    return table_name
+
+
+def condition_updates(
+    conditions: list[list[int]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return whether every trade with the conditions counts as a trade at
+    all, sets the high and low, and sets the open and close of its bar.
+    """
+    count = len(conditions)
+    is_trade = np.fromiter(
+        (NON_TRADE_CONDITIONS.isdisjoint(codes) for codes in conditions),
+        bool,
+        count,
+    )
+    updates_high_low = np.fromiter(
+        (NO_HIGH_LOW_CONDITIONS.isdisjoint(codes) for codes in conditions),
+        bool,
+        count,
+    )
+    updates_open_close = np.fromiter(
+        (NO_OPEN_CLOSE_CONDITIONS.isdisjoint(codes) for codes in conditions),
+        bool,
+        count,
+    )
+    return is_trade, updates_high_low, updates_open_close
+
+
+def trades_to_candles(
+    time_ns: np.ndarray,
+    price: np.ndarray,
+    size: np.ndarray,
+    symbol: str,
+    timespan: types.Timespan,
+    data_provider: str,
+    updates_high_low: np.ndarray | None = None,
+    updates_open_close: np.ndarray | None = None,
+) -> CandleBatch:
+    """
+    Aggregate the trades of a symbol, sorted by time in nanoseconds since the
+    epoch, into candles in one vectorized pass: the trades are cut into runs
+    of the same bar and every run is reduced at once.
+
+    Only trades flagged by updates_high_low set the high and low and only
+    those flagged by updates_open_close the open and close, all trades count
+    towards the volume. Bars without a trade that sets the open and close
+    are left out.
+    """
+    if len(time_ns) == 0:
+        return CandleBatch.empty()
+
+    count = len(time_ns)
+    if updates_high_low is None:
+        updates_high_low = np.ones(count, dtype=bool)
+    if updates_open_close is None:
+        updates_open_close = updates_high_low
+
+    bar_ns = (
+        types.timespan_info[timespan].duration
+        // timedelta(microseconds=1)
+        * 1000
+    )
+    bars = time_ns // bar_ns
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bars)) + 1))
+
+    # The first and last trade of every bar that sets the open and close.
+    index = np.arange(count)
+    opens = np.minimum.reduceat(
+        np.where(updates_open_close, index, count), starts
+    )
+    closes = np.maximum.reduceat(
+        np.where(updates_open_close, index, -1), starts
+    )
+    has_price = opens < count
+    high_low_price = np.where(updates_high_low, price, np.nan)
+
+    return CandleBatch.from_columns(
+        time=bars[starts][has_price] * (bar_ns // 1_000_000),
+        symbol=symbol,
+        open=price[opens[has_price]],
+        close=price[closes[has_price]],
+        high=np.fmax.reduceat(high_low_price, starts)[has_price],
+        low=np.fmin.reduceat(high_low_price, starts)[has_price],
+        volume=np.add.reduceat(size, starts)[has_price],
+        data_provider=data_provider,
+    )
+
+
+def register_source(
+    con: duckdb.DuckDBPyConnection, file_paths: list[str]
+) -> None:
+    path_list = ", ".join(
+        "'" + path.replace("'", "''") + "'" for path in file_paths
+    )
+    if all(path.endswith(".parquet") for path in file_paths):
+        source = f"read_parquet([{path_list}], union_by_name = true)"
+    else:
+        source = f"read_csv([{path_list}], header = true, compression = 'auto', union_by_name = true)"
+
+    con.execute(
+        f"CREATE OR REPLACE TEMP VIEW {SOURCE_VIEW} AS SELECT * FROM {source};"
+    )
+
+
+def find_column(
+    source_columns: dict[str, str], names: tuple[str, ...]
+) -> str | None:
+    return next((name for name in names if name in source_columns), None)
+
+
+def register_trades(
+    con: duckdb.DuckDBPyConnection,
+    symbol: str | None,
+) -> None:
+    """
+    Normalize the trades of the source view to a time in UTC, a symbol, a
+    price and a size. The column names of polygon.io's trade files are
+    recognized as well, integer times are nanoseconds since the epoch and
+    naive times are interpreted as UTC. Without a symbol column every trade
+    belongs to symbol. Trades at the same time are ordered by their sequence
+    number or else by their position in the source.
+    """
+    con.execute(f"DESCRIBE SELECT * FROM {SOURCE_VIEW};")
+    source_columns = {
+        column_name: column_type
+        for column_name, column_type, *_ in con.fetchall()
+    }
+
+    time_column = find_column(source_columns, TIME_COLUMNS)
+    symbol_column = find_column(source_columns, SYMBOL_COLUMNS)
+    size_column = find_column(source_columns, SIZE_COLUMNS)
+    sequence_column = find_column(source_columns, SEQUENCE_COLUMNS)
+    if time_column is None or size_column is None:
+        raise DataError(
+            "Trades need a time, a price and a size column, found: "
+            + ", ".join(source_columns)
+        )
+    if "price" not in source_columns:
+        raise DataError("Trades need a price column")
+    if symbol_column is None and symbol is None:
+        raise DataError("Trades without a symbol column need a symbol")
+
+    time_type = source_columns[time_column]
+    if time_type in INTEGER_TYPES:
+        time_sql = f'make_timestamp(CAST("{time_column}" // 1000 AS BIGINT))'
+    elif time_type == "TIMESTAMP WITH TIME ZONE":
+        time_sql = f"timezone('UTC', \"{time_column}\")"
+    else:
+        time_sql = f'CAST("{time_column}" AS TIMESTAMP)'
+
+    symbol_sql = (
+        f'CAST("{symbol_column}" AS VARCHAR)'
+        if symbol_column
+        else "'" + str(symbol).replace("'", "''") + "'"
+    )
+
+    sequence_sql = (
+        f'CAST("{sequence_column}" AS BIGINT)'
+        if sequence_column
+        else "row_number() OVER ()"
+    )
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP VIEW {TRADES_VIEW} AS
+        SELECT
+            {time_sql} AS time,
+            {symbol_sql} AS symbol,
+            CAST(price AS DOUBLE) AS price,
+            CAST("{size_column}" AS DOUBLE) AS size,
+            {sequence_sql} AS sequence
+        FROM {SOURCE_VIEW};
+        """
+    )
+
+
+def register_candles(
+    con: duckdb.DuckDBPyConnection,
+    timespan: types.Timespan,
+    data_provider: str,
+) -> None:
+    """
+    Aggregate the normalized trades into candles. DuckDB streams the trades
+    through a hash aggregation, so only the candles are held in memory. The
+    open and close of trades at the same time follow their sequence.
+    """
+    interval = f"INTERVAL '1 {timespan}'"
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP VIEW {CANDLES_VIEW} AS
+        SELECT
+            timezone('UTC', time_bucket({interval}, time)) AS time,
+            symbol,
+            first(price ORDER BY time, sequence) AS open,
+            last(price ORDER BY time, sequence) AS close,
+            max(price) AS high,
+            min(price) AS low,
+            CAST(round(sum(size)) AS BIGINT) AS volume,
+            'USD' AS currency,
+            '{data_provider}' AS data_provider
+        FROM {TRADES_VIEW}
+        GROUP BY ALL;
+        """
+    )
+
+
+def copy(
+    file_paths: str | list[str],
+    instrument: types.InstrumentType,
+    symbol: str | None = None,
+    on_conflict: db.OnConflict = "error",
+    keep_trades=False,
+) -> ImportReport:
+    """
+    Build the candles of the instrument's base table from CSV or Parquet
+    files of trades. The files are scanned once by DuckDB and aggregated on
+    the fly, the raw trades are only stored in the `{instrument}_trades`
+    table if keep_trades is True. Candles whose trades are split across
+    several imports are resolved by on_conflict, so trades of one bar
+    should be imported together.
+    """
+    paths = [file_paths] if isinstance(file_paths, str) else file_paths
+    for path in paths:
+        if not os.path.exists(path) and not any(c in path for c in "*?["):
+            raise DataError(f"File '{path}' doesn't exist.")
+
+    table_name, timespan = candle_table_config(instrument)
+    data_provider = (
+        "parquet" if all(p.endswith(".parquet") for p in paths) else "csv"
+    )
+
+    start_time = time.perf_counter()
+    con = db.connect()
+    try:
+        register_source(con, paths)
+        register_trades(con, symbol)
+        register_candles(con, timespan, data_provider)
+    except DataError:
+        raise
+    except Exception as e:
+        path_list = ", ".join(paths)
+        raise DataError(f"Failed to read trades from '{path_list}': {e}")
+
+    report = ImportReport(tasks=len(paths), unit="files")
+    try:
+        if keep_trades:
+            con.execute(
+                f"""
+                INSERT INTO {trades_table(instrument, con)}
+                SELECT timezone('UTC', time), symbol, price, size
+                FROM {TRADES_VIEW};
+                """
+            )
+        report.add(
+            db.upsert_from(
+                CANDLES_VIEW, table_name, con, on_conflict=on_conflict
+            )
+        )
+    except Exception as e:
+        raise DataError(
+            f"Failed to build candles of table '{table_name}' from trades: {e}"
+        )
+
+    report.completed = len(paths)
+    report.seconds = time.perf_counter() - start_time
+    return report
@@ -1,3 +1,3 @@
-from ._internal.twelvedata import stocks
+from ._internal.twelvedata import stocks, get_aggregates, Client
 
-__all__ = ["stocks"]
+__all__ = ["stocks", "get_aggregates", "Client"]
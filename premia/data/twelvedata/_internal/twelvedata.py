@@ -1,9 +1,9 @@
 import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Any
-from urllib.parse import urlencode
-from premia.data import DataError, MarketDataRow
+from premia.data import DataError, CandleBatch, cache, replay, ratelimit
 from premia._shared import types
 from premia import config, db
 
@@ -16,24 +16,167 @@ accepted_timespans: list[types.Timespan] = [
     "month",
 ]
 
+BASE_URL = "https://api.twelvedata.com"
+# twelvedata.com accepts up to 120 comma-separated symbols per request and
+# returns at most 5000 values per symbol.
+MAX_SYMBOLS_PER_REQUEST = 120
+MAX_OUTPUT_SIZE = 5000
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Lowercased start of the error message for symbols without data in a range.
+NO_DATA_MESSAGE = "no data is available"
+
+
+class Client:
+    """
+    TwelveData client that reuses one HTTP session for all requests, batches
+    symbols into comma-separated requests and pages through long ranges with
+    `outputsize`.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        session: requests.Session | None = None,
+    ):
+        if api_key is None:
+            api_key = (
+                "replay"
+                if replay.is_replaying()
+                else config.get_provider_twelvedata()
+            )
+        self.api_key = api_key
+        # Requests are kept within the provider's rate limit and recorded or
+        # replayed if a replay mode is active.
+        self.session = replay.twelvedata_session(
+            ratelimit.twelvedata_session(session or requests.Session())
+        )
+
+    def time_series(
+        self,
+        symbols: list[str],
+        start: datetime,
+        end: datetime,
+        timespan: types.Timespan,
+    ) -> CandleBatch:
+        if timespan not in accepted_timespans:
+            raise ValueError(
+                f"Timespan '{timespan}' is not supported by twelvedata"
+            )
+
+        batches: list[CandleBatch] = []
+        for i in range(0, len(symbols), MAX_SYMBOLS_PER_REQUEST):
+            batches.extend(
+                self.time_series_pages(
+                    symbols[i : i + MAX_SYMBOLS_PER_REQUEST],
+                    start,
+                    end,
+                    timespan,
+                )
+            )
+
+        return CandleBatch.concat(batches)
+
+    def time_series_pages(
+        self,
+        symbols: list[str],
+        start: datetime,
+        end: datetime,
+        timespan: types.Timespan,
+    ) -> list[CandleBatch]:
+        """
+        Request the time series of up to 120 symbols at once. Values are
+        returned newest first, so every symbol that filled a whole page is
+        requested again with an end date right before its oldest value.
+        """
+        batches: list[CandleBatch] = []
+        pending_pages = [(symbols, end)]
+
+        while pending_pages:
+            page_symbols, page_end = pending_pages.pop()
+            series = self.get_time_series(
+                page_symbols, start, page_end, timespan
+            )
+
+            for data in series:
+                batch = values_to_batch(data)
+                batches.append(batch)
+
+                if len(batch) >= MAX_OUTPUT_SIZE:
+                    oldest_time = datetime.fromtimestamp(
+                        batch.time.min() / 1000, timezone.utc
+                    ).replace(tzinfo=None)
+                    pending_pages.append(
+                        (
+                            [data["meta"]["symbol"]],
+                            oldest_time - timedelta(seconds=1),
+                        )
+                    )
+
+        return batches
+
+    def get_time_series(
+        self,
+        symbols: list[str],
+        start: datetime,
+        end: datetime,
+        timespan: types.Timespan,
+    ) -> list[Any]:
+        timespan_code = types.timespan_info[timespan].twelvedata_code
+        query = {
+            "apikey": self.api_key,
+            "interval": f"1{timespan_code}",
+            "symbol": ",".join(symbols),
+            "start_date": start.strftime(DATETIME_FORMAT),
+            "end_date": end.strftime(DATETIME_FORMAT),
+            "outputsize": MAX_OUTPUT_SIZE,
+            "order": "DESC",
+            "timezone": "UTC",
+            "format": "JSON",
+        }
+
+        url = f"{BASE_URL}/time_series"
+        try:
+            response = self.session.get(url, params=query)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException as e:
+            raise DataError(f"Error fetching data from TwelveData: {e}")
+
+        # A single symbol is returned as one time series, multiple symbols
+        # as a time series per symbol.
+        series = [data] if "status" in data else list(data.values())
+
+        results = []
+        for time_series in series:
+            if time_series.get("status") == "error":
+                # Symbols without data in the range are reported as errors,
+                # other errors with the same code are real failures.
+                message = str(time_series.get("message", ""))
+                if (
+                    time_series.get("code") == 400
+                    and NO_DATA_MESSAGE in message.lower()
+                ):
+                    continue
+                raise DataError(
+                    f"Error fetching data from TwelveData: {time_series.get('message')}"
+                )
+            results.append(time_series)
+
+        return results
+
 
 def stocks(
-    symbol: str, start: datetime, end: datetime, persist=False
+    symbol: str | list[str], start: datetime, end: datetime, persist=False
 ) -> pd.DataFrame:
     stocks_config = config.get_db_instrument("stocks")
-    market_data_rows = get_aggregates(
-        symbol, start, end, stocks_config["timespan"]
-    )
-    rows_df = pd.DataFrame(market_data_rows)
+    symbols = [symbol] if isinstance(symbol, str) else symbol
+    rows_df = get_aggregates(
+        symbols, start, end, stocks_config["timespan"]
+    ).to_df()
 
     if persist:
         try:
-            rows_df.to_sql(
-                stocks_config["base_table"],
-                con=db.connect(),
-                if_exists="append",
-                index=False,
-            )
+            db.insert(stocks_config["base_table"], rows_df)
         except Exception as e:
             raise DataError(
                 f"Failed to copy twelvedata.com data to table '{stocks_config['base_table']}': {e}"
@@ -43,57 +186,44 @@ def stocks(
 
 
 def get_aggregates(
-    symbol: str, start: datetime, end: datetime, timespan: types.Timespan
-):
-    api_key = config.get_provider_twelvedata()
-
-    if timespan not in accepted_timespans:
-        raise ValueError(
-            f"Timespan '{timespan}' is not supported by twelvedata"
-        )
-
-    timespan_code = types.timespan_info[timespan].twelvedata_code
-    interval = f"1{timespan_code}"
-
-    query = {
-        "apikey": api_key,
-        "interval": interval,
-        "symbol": symbol,
-        "start_date": start.strftime("%Y-%m-%d %H:%M:%S"),
-        "end_date": end.strftime("%Y-%m-%d %H:%M:%S"),
-        "timezone": "UTC",
-        "format": "JSON",
-    }
-
-    url = f"https://api.twelvedata.com/time_series?{urlencode(query)}"
-
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return convert_to_market_data_rows(data)
-
-    except requests.RequestException as e:
-        raise DataError(f"Error fetching data from TwelveData: {e}")
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timespan: types.Timespan,
+    client: Client | None = None,
+) -> CandleBatch:
+    client = client or Client()
+    return cache.fetch(
+        "twelvedata",
+        symbols,
+        start,
+        end,
+        timespan,
+        lambda missing_symbols: client.time_series(
+            missing_symbols, start, end, timespan
+        ),
+    )
 
 
-def convert_to_market_data_rows(data: Any) -> list[MarketDataRow]:
-    candles: list[MarketDataRow] = []
-    for time_series_value in data["values"]:
-        t = datetime.strptime(
-            time_series_value["datetime"], "%Y-%m-%d %H:%M:%S"
-        )
-        candles.append(
-            MarketDataRow(
-                time=t,
-                symbol=data["meta"]["symbol"],
-                open=time_series_value["open"],
-                close=time_series_value["close"],
-                high=time_series_value["high"],
-                low=time_series_value["low"],
-                volume=time_series_value["volume"],
-                currency=data["meta"]["currency"],
-                data_provider="twelvedata.com",
-            )
-        )
-    return candles
+def values_to_batch(data: Any) -> CandleBatch:
+    """
+    Parse the values of a time series response into a candle batch with a
+    single vectorized datetime conversion.
+    """
+    values = pd.DataFrame(data.get("values", []))
+    if len(values) == 0:
+        return CandleBatch.empty()
+
+    volume = values.get("volume", pd.Series(0, index=values.index))
+
+    return CandleBatch.from_columns(
+        time=pd.to_datetime(values["datetime"], format="ISO8601"),
+        symbol=data["meta"]["symbol"],
+        open=values["open"].astype(np.float64),
+        close=values["close"].astype(np.float64),
+        high=values["high"].astype(np.float64),
+        low=values["low"].astype(np.float64),
+        volume=pd.to_numeric(volume),
+        currency=data["meta"].get("currency", "USD"),
+        data_provider="twelvedata.com",
+    )
@@ -1,3 +1,3 @@
-from ._internal.yfinance import stocks
+from ._internal.yfinance import stocks, download
 
-__all__ = ["stocks"]
+__all__ = ["stocks", "download"]
@@ -1,16 +1,12 @@
-import warnings
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from premia._shared import types
-from premia.data import DataError
+from premia.data import DataError, CandleBatch, cache, replay
 from premia import config, db
 
-# Pandas is creating a warning because we are not using SQLAlchemy
-# as a connector.
-warnings.simplefilter(action="ignore", category=UserWarning)
-
-
 accepted_timespans: list[types.Timespan] = [
     "minute",
     "hour",
@@ -19,60 +15,175 @@ accepted_timespans: list[types.Timespan] = [
     "month",
 ]
 
+SYMBOLS_PER_DOWNLOAD = 100
+PRICE_COLUMNS = ["Open", "Close", "High", "Low", "Volume"]
 
-def stocks(
-    symbol: str, start: datetime, end: datetime, persist=False
-) -> pd.DataFrame:
-    instrument_config = config.get_db_instrument("stocks")
-    if instrument_config["timespan"] not in accepted_timespans:
-        raise ValueError(
-            f"Timespan '{instrument_config['timespan']}' is not supported by yfinance"
-        )
-
-    timespan_code = types.timespan_info[
-        instrument_config["timespan"]
-    ].yfinance_code
-    interval = f"1{timespan_code}"
 
-    ticker = yf.Ticker(symbol)
-    ticker_history = ticker.history(
-        end=end.strftime("%Y-%m-%d"),
-        start=start.strftime("%Y-%m-%d"),
-        interval=interval,
-    )
+@dataclass
+class IntervalLimit:
+    """
+    Yahoo only serves intraday data for recent history and limits the range
+    of a single request. Ranges are split and clamped to fit these limits.
+    """
 
-    ticker_history = (
-        ticker_history.rename_axis("time")
-        .drop(columns=["Dividends", "Stock Splits"])
-        .rename(columns=str.lower)
-        .reset_index()
-    )
+    request_range: timedelta
+    lookback: timedelta
 
-    # ticker_history = (
-    #     ticker_history.stack(level=1)
-    #     .rename_axis(["Time", "Ticker"])
-    #     .reset_index(level=1)
-    #     .drop(columns=["Dividends", "Stock Splits"])
-    #     .rename(columns=str.lower)
-    #     .rename(columns={"ticker": "symbol"})
-    #     .rename_axis("time")
-    # )
 
-    ticker_history["symbol"] = symbol.upper()
-    ticker_history["currency"] = "USD"
-    ticker_history["data_provider"] = "yfinance"
+interval_limits: dict[str, IntervalLimit] = {
+    "1m": IntervalLimit(
+        request_range=timedelta(days=7), lookback=timedelta(days=30)
+    ),
+    "1h": IntervalLimit(
+        request_range=timedelta(days=730), lookback=timedelta(days=730)
+    ),
+}
+
+
+def stocks(
+    symbol: str | list[str], start: datetime, end: datetime, persist=False
+) -> pd.DataFrame:
+    instrument_config = config.get_db_instrument("stocks")
+    symbols = [symbol] if isinstance(symbol, str) else symbol
+    rows_df = download(
+        symbols, start, end, instrument_config["timespan"]
+    ).to_df()
 
     if persist:
+        # Rows with the same key would fail the unique index of the table.
+        rows_df = rows_df.drop_duplicates(["symbol", "time"])
         try:
-            ticker_history.to_sql(
-                instrument_config["base_table"],
-                con=db.connect(),
-                if_exists="append",
-                index=False,
-            )
+            db.insert(instrument_config["base_table"], rows_df)
         except Exception as e:
             raise DataError(
                 f"Failed to copy yfinance data to table '{instrument_config['base_table']}': {e}"
             )
 
-    return ticker_history
+    return rows_df
+
+
+def download(
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timespan: types.Timespan,
+) -> CandleBatch:
+    """
+    Download the history of many symbols with one `yf.download` call per
+    batch of symbols and date range. Ranges are split to fit the limits
+    Yahoo puts on the requested interval. Only the candles in [start, end)
+    are returned.
+    """
+    if timespan not in accepted_timespans:
+        raise ValueError(f"Timespan '{timespan}' is not supported by yfinance")
+
+    timespan_code = types.timespan_info[timespan].yfinance_code
+    interval = f"1{timespan_code}"
+    symbols = [symbol.upper() for symbol in symbols]
+
+    batches: list[CandleBatch] = []
+    for range_start, range_end in split_range(start, end, interval):
+        for i in range(0, len(symbols), SYMBOLS_PER_DOWNLOAD):
+            batches.append(
+                cache.fetch(
+                    "yfinance",
+                    symbols[i : i + SYMBOLS_PER_DOWNLOAD],
+                    range_start,
+                    range_end,
+                    timespan,
+                    lambda batch_symbols: history_to_batch(
+                        replay.yfinance_download(
+                            yf.download,
+                            batch_symbols,
+                            start=range_start.strftime("%Y-%m-%d"),
+                            end=range_end.strftime("%Y-%m-%d"),
+                            interval=interval,
+                            group_by="column",
+                            auto_adjust=True,
+                            threads=True,
+                            progress=False,
+                        ),
+                        batch_symbols,
+                    ),
+                )
+            )
+
+    batch = CandleBatch.concat(batches)
+    start_ms, end_ms = np.array([start, end], dtype="datetime64[ms]").astype(
+        np.int64
+    )
+    return batch.take((batch.time >= start_ms) & (batch.time < end_ms))
+
+
+def floor_day(value: datetime) -> datetime:
+    return datetime.combine(value.date(), time())
+
+
+def ceil_day(value: datetime) -> datetime:
+    day = floor_day(value)
+    return day if day == value else day + timedelta(days=1)
+
+
+def split_range(
+    start: datetime, end: datetime, interval: str
+) -> list[tuple[datetime, datetime]]:
+    """
+    Split a date range into ranges that can be requested at once. Yahoo is
+    queried by day with an exclusive end, so the range is widened to whole
+    days first and split into adjacent whole-day ranges, which are cached by
+    day as well. Intraday ranges starting before the available history are
+    clamped to its first whole day.
+    """
+    start, end = floor_day(start), ceil_day(end)
+    limit = interval_limits.get(interval)
+    if limit is None:
+        return [(start, end)]
+
+    earliest_start = ceil_day(datetime.now() - limit.lookback)
+    range_start = max(start, earliest_start)
+
+    ranges = []
+    while range_start < end:
+        range_end = min(range_start + limit.request_range, end)
+        ranges.append((range_start, range_end))
+        range_start = range_end
+
+    return ranges
+
+
+def history_to_batch(history: pd.DataFrame, symbols: list[str]) -> CandleBatch:
+    """
+    Reshape the wide result of `yf.download`, with a column per price field
+    and symbol, into long candle rows. Every field is flattened row-major into
+    (time, symbol) order, so the reshape is a single array operation per
+    field. Rows of symbols without data at a time are dropped.
+    """
+    if history is None or history.empty:
+        return CandleBatch.empty()
+
+    if isinstance(history.columns, pd.MultiIndex):
+        tickers = history.columns.get_level_values(1).unique()
+        fields = {
+            field: history[field].reindex(columns=tickers).to_numpy().ravel()
+            for field in PRICE_COLUMNS
+        }
+    else:
+        tickers = pd.Index(symbols[:1])
+        fields = {field: history[field].to_numpy() for field in PRICE_COLUMNS}
+
+    time = history.index.repeat(len(tickers))
+    symbol = pd.Categorical.from_codes(
+        np.tile(np.arange(len(tickers)), len(history)), categories=tickers
+    )
+    has_data = ~pd.isna(fields["Close"])
+
+    return CandleBatch.from_columns(
+        time=time[has_data],
+        symbol=symbol[has_data],
+        open=fields["Open"][has_data],
+        close=fields["Close"][has_data],
+        high=fields["High"][has_data],
+        low=fields["Low"][has_data],
+        volume=fields["Volume"][has_data],
+        data_provider="yfinance",
+    )
@@ -6,16 +6,53 @@ from ._internal.migration import (
     set_instrument,
     remove_instrument,
     connect,
+    columns,
+)
+from ._internal.writer import (
+    copy_csv,
+    copy_from,
+    insert,
+    upsert,
+    upsert_csv,
+    upsert_from,
+    sql_literal,
+    InsertResult,
+    OnConflict,
+)
+from ._internal.coverage import coverage, scan_coverage, record_coverage
+from ._internal.bulk import bulk_load, rebuild_index
+from ._internal.checkpoint import (
+    checkpoints,
+    record_checkpoints,
+    clear_checkpoints,
 )
 
 __all__ = [
     "set_instrument",
+    "bulk_load",
+    "checkpoints",
+    "clear_checkpoints",
     "connect",
+    "columns",
+    "copy_csv",
+    "copy_from",
+    "coverage",
     "features",
+    "insert",
     "purge",
+    "record_checkpoints",
+    "rebuild_index",
+    "record_coverage",
     "schema",
     "table",
     "tables",
     "remove_instrument",
+    "upsert",
+    "upsert_csv",
+    "upsert_from",
+    "InsertResult",
+    "OnConflict",
     "reset",
+    "scan_coverage",
+    "sql_literal",
 ]
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from typing import Iterator
+import duckdb
+from premia._shared import errors
+from .migration import connect
+
+# Number of duplicate keys shown when a table can't be indexed.
+DUPLICATE_EXAMPLES = 5
+
+
+def index_name(table: str) -> str:
+    return f"{table}_symbol_time_idx"
+
+
+def index_sql(table: str, con: duckdb.DuckDBPyConnection) -> str | None:
+    """
+    Return the statement that created the unique (symbol, time) index of a
+    candle table or None if the table doesn't have the index.
+    """
+    with con.cursor() as cursor:
+        cursor.execute(
+            "SELECT sql FROM duckdb_indexes() WHERE index_name = ? AND table_name = ?;",
+            (index_name(table), table),
+        )
+        result = cursor.fetchone()
+
+    return result[0] if result else None
+
+
+def duplicate_keys(
+    table: str, con: duckdb.DuckDBPyConnection
+) -> tuple[int, list[tuple]]:
+    """
+    Return the number of (symbol, time) keys that appear more than once in
+    a table together with a few of them.
+    """
+    with con.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT symbol, time
+            FROM {table}
+            GROUP BY symbol, time
+            HAVING count(*) > 1;
+            """
+        )
+        duplicates = cursor.fetchall()
+
+    return len(duplicates), duplicates[:DUPLICATE_EXAMPLES]
+
+
+def remove_duplicates(table: str, con: duckdb.DuckDBPyConnection) -> int:
+    """
+    Delete all but the first stored row of every (symbol, time) key.
+
+    Returns the number of deleted rows.
+    """
+    with con.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {table}
+            WHERE rowid IN (
+                SELECT rowid
+                FROM (
+                    SELECT
+                        rowid,
+                        row_number() OVER (
+                            PARTITION BY symbol, time ORDER BY rowid
+                        ) AS key_row
+                    FROM {table}
+                )
+                WHERE key_row > 1
+            );
+            """
+        )
+        return cursor.fetchone()[0]
+
+
+def rebuild_index(
+    table: str,
+    con: duckdb.DuckDBPyConnection | None = None,
+    sql: str | None = None,
+    dedupe=False,
+) -> int:
+    """
+    Create the unique (symbol, time) index of a candle table, replacing the
+    index if it exists. Building the index validates the uniqueness of the
+    keys in the same pass. With dedupe, duplicate keys are resolved by
+    keeping the first stored row, otherwise they raise an error and the
+    table is left without index until they are removed.
+
+    Returns the number of removed duplicate rows.
+    """
+    con = connect() if con is None else con
+    sql = (
+        sql
+        or index_sql(table, con)
+        or f"CREATE UNIQUE INDEX {index_name(table)} ON {table} (symbol, time DESC);"
+    )
+
+    with con.cursor() as cursor:
+        cursor.execute(f"DROP INDEX IF EXISTS {index_name(table)};")
+        try:
+            cursor.execute(sql)
+            return 0
+        except duckdb.ConstraintException:
+            pass
+
+        count, examples = duplicate_keys(table, con)
+        if not dedupe:
+            example_list = ", ".join(
+                f"{symbol} at {time}" for symbol, time in examples
+            )
+            raise errors.DbError(
+                f"Can't rebuild the index of '{table}', {count} (symbol, time) keys are stored more than once (e.g. {example_list}). Remove them with 'premia db index {table} --dedupe'."
+            )
+
+        removed = remove_duplicates(table, con)
+        cursor.execute(sql)
+        return removed
+
+
+@contextmanager
+def bulk_load(
+    table: str, con: duckdb.DuckDBPyConnection | None = None
+) -> Iterator[None]:
+    """
+    Defer the unique (symbol, time) index of a candle table while a large
+    import runs. The index is dropped before the import, so appends don't
+    have to maintain it row by row, and is built once in bulk afterwards.
+    Duplicate keys, which the index would have rejected one write at a time,
+    fail the rebuild instead. If the import fails, the index is rebuilt
+    before its error is raised, a failed rebuild is noted on that error.
+
+    Tables without the index are loaded as they are. Small incremental
+    appends should keep the index, since checking their keys is cheap.
+    """
+    con = connect() if con is None else con
+
+    sql = index_sql(table, con)
+    if sql is None:
+        yield
+        return
+
+    with con.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {index_name(table)};")
+
+    try:
+        yield
+    except BaseException as e:
+        try:
+            rebuild_index(table, con, sql)
+        except Exception as rebuild_error:
+            e.add_note(
+                f"The index of '{table}' couldn't be rebuilt either: {rebuild_error}"
+            )
+        raise
+
+    rebuild_index(table, con, sql)
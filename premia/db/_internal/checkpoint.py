@@ -0,0 +1,66 @@
+import duckdb
+from .migration import connect
+
+
+def create_checkpoint_table(con: duckdb.DuckDBPyConnection) -> None:
+    with con.cursor() as cursor:
+        cursor.execute(
+            """
+            CREATE SCHEMA IF NOT EXISTS premia;
+            CREATE TABLE IF NOT EXISTS premia.checkpoints (
+                job VARCHAR NOT NULL,
+                chunk VARCHAR NOT NULL,
+                completed_at TIMESTAMPTZ NOT NULL DEFAULT current_timestamp
+            );
+            """
+        )
+
+
+def checkpoints(
+    job: str, con: duckdb.DuckDBPyConnection | None = None
+) -> set[str]:
+    """
+    Return the chunks of a job that have been completed.
+    """
+    con = connect() if con is None else con
+    create_checkpoint_table(con)
+
+    with con.cursor() as cursor:
+        cursor.execute(
+            "SELECT chunk FROM premia.checkpoints WHERE job = ?;", (job,)
+        )
+        return {chunk for (chunk,) in cursor.fetchall()}
+
+
+def record_checkpoints(
+    job: str,
+    chunks: list[str],
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> None:
+    """
+    Record chunks of a job as completed.
+    """
+    con = connect() if con is None else con
+    create_checkpoint_table(con)
+
+    if not chunks:
+        return
+
+    with con.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO premia.checkpoints (job, chunk) VALUES (?, ?);",
+            [(job, chunk) for chunk in chunks],
+        )
+
+
+def clear_checkpoints(
+    job: str, con: duckdb.DuckDBPyConnection | None = None
+) -> None:
+    """
+    Remove the recorded chunks of a job, so it runs from the start again.
+    """
+    con = connect() if con is None else con
+    create_checkpoint_table(con)
+
+    with con.cursor() as cursor:
+        cursor.execute("DELETE FROM premia.checkpoints WHERE job = ?;", (job,))
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+import duckdb
+from .migration import connect
+
+Interval = tuple[datetime, datetime]
+
+
+def create_coverage_table(con: duckdb.DuckDBPyConnection) -> None:
+    with con.cursor() as cursor:
+        cursor.execute(
+            """
+            CREATE SCHEMA IF NOT EXISTS premia;
+            CREATE TABLE IF NOT EXISTS premia.coverage (
+                table_name VARCHAR NOT NULL,
+                symbol VARCHAR NOT NULL,
+                start TIMESTAMP NOT NULL,
+                "end" TIMESTAMP NOT NULL,
+                synced_at TIMESTAMPTZ NOT NULL DEFAULT current_timestamp
+            );
+            """
+        )
+
+
+def coverage(
+    table_name: str,
+    symbols: list[str],
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> dict[str, list[Interval]]:
+    """
+    Return the recorded coverage of the symbols in a table as sorted lists of
+    [start, end) intervals in UTC. Symbols without recorded coverage are
+    missing from the result.
+    """
+    con = connect() if con is None else con
+    create_coverage_table(con)
+
+    with con.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT symbol, start, "end"
+            FROM premia.coverage
+            WHERE table_name = ? AND list_contains(?, symbol)
+            ORDER BY symbol, start;
+            """,
+            (table_name, symbols),
+        )
+        result: dict[str, list[Interval]] = {}
+        for symbol, start, end in cursor.fetchall():
+            result.setdefault(symbol, []).append((start, end))
+
+        return result
+
+
+def scan_coverage(
+    table_name: str,
+    symbols: list[str],
+    duration: timedelta,
+    gap_tolerance: timedelta,
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> dict[str, list[Interval]]:
+    """
+    Derive the coverage of the symbols from the candles in a table. Bars that
+    are at most duration + gap_tolerance apart are considered continuous, a
+    larger distance between two bars is a gap. Every continuous run of bars
+    covers [first bar, last bar + duration).
+    """
+    con = connect() if con is None else con
+
+    with con.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH bars AS (
+                SELECT
+                    symbol,
+                    timezone('UTC', time) AS time,
+                    timezone('UTC', time) - lag(timezone('UTC', time)) OVER (
+                        PARTITION BY symbol ORDER BY time
+                    ) > ? AS is_gap
+                FROM {table_name}
+                WHERE list_contains(?, symbol)
+            ),
+            runs AS (
+                SELECT
+                    symbol,
+                    time,
+                    sum(CASE WHEN is_gap THEN 1 ELSE 0 END) OVER (
+                        PARTITION BY symbol ORDER BY time
+                    ) AS run
+                FROM bars
+            )
+            SELECT symbol, min(time), max(time) + ?
+            FROM runs
+            GROUP BY symbol, run
+            ORDER BY symbol, min(time);
+            """,
+            (duration + gap_tolerance, symbols, duration),
+        )
+        result: dict[str, list[Interval]] = {}
+        for symbol, start, end in cursor.fetchall():
+            result.setdefault(symbol, []).append((start, end))
+
+        return result
+
+
+def record_coverage(
+    table_name: str,
+    symbol: str,
+    intervals: list[Interval],
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> None:
+    """
+    Replace the recorded coverage of a symbol in a table.
+    """
+    con = connect() if con is None else con
+    create_coverage_table(con)
+
+    with con.cursor() as cursor:
+        cursor.execute("BEGIN TRANSACTION;")
+        cursor.execute(
+            "DELETE FROM premia.coverage WHERE table_name = ? AND symbol = ?;",
+            (table_name, symbol),
+        )
+        if intervals:
+            cursor.executemany(
+                """
+                INSERT INTO premia.coverage (table_name, symbol, start, "end")
+                VALUES (?, ?, ?, ?);
+                """,
+                [(table_name, symbol, start, end) for start, end in intervals],
+            )
+        cursor.execute("COMMIT;")
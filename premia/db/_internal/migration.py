@@ -138,19 +138,6 @@ def reset() -> None:
     create(connect(create_if_missing=True))
 
 
-def copy_csv(
-    csv_path: str, table: str, con: duckdb.DuckDBPyConnection | None = None
-) -> None:
-    """
-    Copy the contents of a CSV file to the designated PostgreSQL table.
-    """
-
-    con = connect() if con is None else con
-    with con.cursor() as cursor:
-        cursor.sql(f"COPY {table} FROM '{csv_path}' DELIMITER ',' CSV HEADER;")
-        con.commit()
-
-
 def purge(con: duckdb.DuckDBPyConnection | None = None):
     con = connect() if con is None else con
     with con.cursor() as cursor:
@@ -0,0 +1,416 @@
+import uuid
+from dataclasses import dataclass
+from typing import Any, Literal, TypeAlias
+import duckdb
+import pandas as pd
+from premia._shared import errors
+from .migration import connect
+from .bulk import index_sql
+
+
+OnConflict: TypeAlias = Literal["error", "ignore", "update"]
+
+
+@dataclass
+class InsertResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+
+def sql_literal(value: str) -> str:
+    escaped_value = value.replace("'", "''")
+    return f"'{escaped_value}'"
+
+
+def read_csv_sql(csv_paths: str | list[str]) -> str:
+    """
+    Build a DuckDB `read_csv` table function call for one or more CSV files.
+    Compressed files (.gz, .zst) are detected by their extension and
+    decompressed on the fly. Multiple files are combined by column name.
+    """
+
+    if isinstance(csv_paths, str):
+        return f"read_csv({sql_literal(csv_paths)}, header = true, compression = 'auto')"
+
+    path_list = ", ".join(sql_literal(csv_path) for csv_path in csv_paths)
+    return f"read_csv([{path_list}], header = true, compression = 'auto', union_by_name = true)"
+
+
+def column_types(
+    table_name: str, con: duckdb.DuckDBPyConnection
+) -> dict[str, str]:
+    """
+    Return the columns of a table mapped to their data types, in the order of
+    the table definition.
+    """
+
+    with con.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_name = ?
+            ORDER BY ordinal_position;
+            """,
+            (table_name,),
+        )
+        return {
+            column_name: data_type
+            for column_name, data_type in cursor.fetchall()
+        }
+
+
+def cast_sql(column: str, source_type: str, target_type: str) -> str:
+    # DuckDB can't cast timestamps with a precision other than microseconds
+    # (e.g. pandas' nanosecond timestamps) to TIMESTAMPTZ directly.
+    if source_type in ("TIMESTAMP_NS", "TIMESTAMP_MS", "TIMESTAMP_S"):
+        return f'CAST(CAST("{column}" AS TIMESTAMP) AS {target_type})'
+
+    return f'CAST("{column}" AS {target_type})'
+
+
+def select_columns(
+    source: str,
+    table: str,
+    con: duckdb.DuckDBPyConnection,
+    ignore_unknown_columns=False,
+) -> tuple[list[str], str]:
+    """
+    Match the columns of a source to the columns of a table by name.
+
+    Returns the matching table columns and a select list that casts the
+    source columns to their types.
+    """
+    con.execute(f"DESCRIBE SELECT * FROM {source};")
+    source_columns = {
+        column_name: column_type
+        for column_name, column_type, *_ in con.fetchall()
+    }
+
+    table_columns = column_types(table, con)
+    if not table_columns:
+        raise errors.DbError(f"Table '{table}' doesn't exist.")
+
+    unknown_columns = [
+        column for column in source_columns if column not in table_columns
+    ]
+    if unknown_columns and not ignore_unknown_columns:
+        raise errors.DbError(
+            f"Table '{table}' has no columns named: {', '.join(unknown_columns)}"
+        )
+
+    insert_columns = [
+        column for column in table_columns if column in source_columns
+    ]
+    select_list = ", ".join(
+        f'{cast_sql(column, source_columns[column], table_columns[column])} AS "{column}"'
+        for column in insert_columns
+    )
+    return insert_columns, select_list
+
+
+def order_sql(order_by: tuple[str, ...] | None) -> str:
+    if not order_by:
+        return ""
+
+    return "ORDER BY " + ", ".join(f'"{column}"' for column in order_by)
+
+
+def copy_from(
+    source: str,
+    table: str,
+    con: duckdb.DuckDBPyConnection | None = None,
+    where: str | None = None,
+    parameters: list | None = None,
+    ignore_unknown_columns=False,
+    order_by: tuple[str, ...] | None = None,
+) -> int:
+    """
+    Insert the rows of a DuckDB table expression (e.g. a table function call or
+    a registered view) into the designated table with a single statement.
+    Columns are matched by name and cast to the types of the table, so their
+    order and types don't need to follow the table definition. Only the
+    columns the table needs are read from the source and the where clause is
+    pushed down to the scan by DuckDB. With order_by the rows are inserted
+    sorted by these columns.
+
+    Returns the number of inserted rows.
+    """
+
+    con = connect() if con is None else con
+
+    insert_columns, select_list = select_columns(
+        source, table, con, ignore_unknown_columns
+    )
+    column_list = ", ".join(f'"{column}"' for column in insert_columns)
+    where_clause = f"WHERE {where}" if where else ""
+    order_clause = order_sql(order_by)
+    con.execute(
+        f"INSERT INTO {table} ({column_list}) SELECT {select_list} FROM {source} {where_clause} {order_clause};",
+        parameters or [],
+    )
+    result = con.fetchone()
+
+    return result[0] if result else 0
+
+
+def upsert_from(
+    source: str,
+    table: str,
+    con: duckdb.DuckDBPyConnection | None = None,
+    on_conflict: OnConflict = "ignore",
+    key_columns: tuple[str, ...] = ("symbol", "time"),
+    where: str | None = None,
+    parameters: list | None = None,
+    ignore_unknown_columns=False,
+    order_by: tuple[str, ...] | None = None,
+) -> InsertResult:
+    """
+    Insert the rows of a DuckDB table expression into the designated table
+    like `copy_from`, but resolve rows whose key columns already exist in the
+    table in bulk instead of failing the whole insert:
+
+    - error: fail like a plain insert
+    - ignore: keep the stored rows and skip the new ones
+    - update: overwrite the stored rows with the new ones
+
+    Of several rows with the same key in the source only one is written, the
+    others are skipped. The rows are staged once and written in one
+    transaction. Tables with a unique (symbol, time) index resolve conflicts
+    with `INSERT ... ON CONFLICT`, which looks the staged keys up in the
+    index. Other tables, like candle tables during a bulk load, are updated
+    with a single `UPDATE ... FROM` and inserted with a single anti join,
+    which both scan the whole table.
+    """
+
+    con = connect() if con is None else con
+
+    if on_conflict == "error":
+        return InsertResult(
+            inserted=copy_from(
+                source,
+                table,
+                con,
+                where,
+                parameters,
+                ignore_unknown_columns,
+                order_by,
+            )
+        )
+
+    insert_columns, select_list = select_columns(
+        source, table, con, ignore_unknown_columns
+    )
+    missing_key_columns = [
+        column for column in key_columns if column not in insert_columns
+    ]
+    if missing_key_columns:
+        raise errors.DbError(
+            f"Can't match rows of '{table}' without the key columns: {', '.join(missing_key_columns)}"
+        )
+
+    column_list = ", ".join(f'"{column}"' for column in insert_columns)
+    key_list = ", ".join(f'"{column}"' for column in key_columns)
+    key_match = " AND ".join(
+        f'{table}."{column}" = staged."{column}"' for column in key_columns
+    )
+    where_clause = f"WHERE {where}" if where else ""
+    staged_table = f"upsert_staged_{uuid.uuid4().hex}"
+    update_columns = [
+        column for column in insert_columns if column not in key_columns
+    ]
+    update = on_conflict == "update" and len(update_columns) > 0
+    indexed = (
+        tuple(key_columns) == ("symbol", "time")
+        and index_sql(table, con) is not None
+    )
+
+    con.execute(
+        f"""
+        CREATE TEMP TABLE {staged_table} AS
+        SELECT
+            {select_list},
+            row_number() OVER (PARTITION BY {key_list}) AS upsert_row
+        FROM {source} {where_clause};
+        """,
+        parameters or [],
+    )
+    try:
+        con.execute(f"SELECT count(*) FROM {staged_table};")
+        total = con.fetchone()[0]
+
+        result = InsertResult()
+        con.begin()
+        try:
+            if indexed:
+                con.execute(f"SELECT count(*) FROM {table};")
+                stored = con.fetchone()[0]
+                if update:
+                    set_list = ", ".join(
+                        f'"{column}" = excluded."{column}"'
+                        for column in update_columns
+                    )
+                    conflict_action = f"DO UPDATE SET {set_list}"
+                else:
+                    conflict_action = "DO NOTHING"
+                con.execute(
+                    f"""
+                    INSERT INTO {table} ({column_list})
+                    SELECT {column_list}
+                    FROM {staged_table}
+                    WHERE upsert_row = 1
+                    {order_sql(order_by)}
+                    ON CONFLICT ({key_list}) {conflict_action};
+                    """
+                )
+                written = con.fetchone()[0]
+                # Counting a table reads its metadata, so the growth of the
+                # table tells inserted and updated rows apart cheaply.
+                con.execute(f"SELECT count(*) FROM {table};")
+                result.inserted = con.fetchone()[0] - stored
+                result.updated = written - result.inserted
+            else:
+                if update:
+                    set_list = ", ".join(
+                        f'"{column}" = staged."{column}"'
+                        for column in update_columns
+                    )
+                    con.execute(
+                        f"""
+                        UPDATE {table} SET {set_list}
+                        FROM {staged_table} AS staged
+                        WHERE staged.upsert_row = 1 AND {key_match};
+                        """
+                    )
+                    result.updated = con.fetchone()[0]
+
+                con.execute(
+                    f"""
+                    INSERT INTO {table} ({column_list})
+                    SELECT {column_list}
+                    FROM {staged_table} AS staged
+                    ANTI JOIN {table} USING ({key_list})
+                    WHERE staged.upsert_row = 1
+                    {order_sql(order_by)};
+                    """
+                )
+                result.inserted = con.fetchone()[0]
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+    finally:
+        con.execute(f"DROP TABLE IF EXISTS {staged_table};")
+
+    result.skipped = total - result.inserted - result.updated
+    return result
+
+
+def copy_csv(
+    csv_paths: str | list[str],
+    table: str,
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> int:
+    """
+    Copy the contents of one or more CSV files to the designated table with
+    DuckDB's parallel CSV reader in a single transaction. Columns are matched
+    by the names in the CSV header, so their order doesn't need to follow the
+    table definition.
+
+    Returns the number of inserted rows.
+    """
+
+    con = connect() if con is None else con
+
+    with con.cursor() as cursor:
+        rows = copy_from(read_csv_sql(csv_paths), table, cursor)
+        con.commit()
+
+    return rows
+
+
+def upsert_csv(
+    csv_paths: str | list[str],
+    table: str,
+    con: duckdb.DuckDBPyConnection | None = None,
+    on_conflict: OnConflict = "ignore",
+    order_by: tuple[str, ...] | None = None,
+) -> InsertResult:
+    """
+    Copy the contents of one or more CSV files to the designated table like
+    `copy_csv`, resolving rows that already exist according to on_conflict.
+    """
+
+    con = connect() if con is None else con
+
+    with con.cursor() as cursor:
+        return upsert_from(
+            read_csv_sql(csv_paths),
+            table,
+            cursor,
+            on_conflict=on_conflict,
+            order_by=order_by,
+        )
+
+
+def insert(
+    table: str,
+    data: pd.DataFrame | Any,
+    con: duckdb.DuckDBPyConnection | None = None,
+) -> int:
+    """
+    Insert a pandas DataFrame or a pyarrow Table into the designated table.
+    The data is registered with DuckDB without copying it and written with a
+    single vectorized `INSERT ... SELECT`, with its columns reordered and cast
+    to match the table.
+
+    Returns the number of inserted rows.
+    """
+
+    con = connect() if con is None else con
+
+    if len(data) == 0:
+        return 0
+
+    view_name = f"insert_source_{uuid.uuid4().hex}"
+    con.register(view_name, data)
+    try:
+        return copy_from(view_name, table, con)
+    finally:
+        con.unregister(view_name)
+
+
+def upsert(
+    table: str,
+    data: pd.DataFrame | Any,
+    con: duckdb.DuckDBPyConnection | None = None,
+    on_conflict: OnConflict = "ignore",
+    key_columns: tuple[str, ...] = ("symbol", "time"),
+    order_by: tuple[str, ...] | None = None,
+) -> InsertResult:
+    """
+    Insert a pandas DataFrame or a pyarrow Table into the designated table
+    like `insert`, resolving rows whose key columns already exist in the
+    table according to on_conflict. With order_by the rows are inserted
+    sorted by these columns.
+    """
+
+    con = connect() if con is None else con
+
+    if len(data) == 0:
+        return InsertResult()
+
+    view_name = f"upsert_source_{uuid.uuid4().hex}"
+    con.register(view_name, data)
+    try:
+        return upsert_from(
+            view_name,
+            table,
+            con,
+            on_conflict=on_conflict,
+            key_columns=key_columns,
+            order_by=order_by,
+        )
+    finally:
+        con.unregister(view_name)
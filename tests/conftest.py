@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+
+# The config paths are resolved when premia is imported, so the tests point
+# the home directory to a temporary one first.
+os.environ["HOME"] = tempfile.mkdtemp(prefix="premia-tests-")
+
+import pytest  # noqa: E402
+import premia  # noqa: E402
+from premia.config._internal import config  # noqa: E402
+from premia.db._internal import migration  # noqa: E402
+
+
+@pytest.fixture
+def premia_db(monkeypatch, tmp_path):
+    """
+    Set up an empty config and database with minute stocks. Every test gets
+    its own database file, since DuckDB shares the instance of a file with
+    connections that are still open.
+    """
+    shutil.rmtree(config.CONFIG_DIR_PATH, ignore_errors=True)
+    monkeypatch.chdir(os.environ["HOME"])
+    premia.config.setup()
+    con = premia.db.connect(
+        create_if_missing=True, path=str(tmp_path / "securities.db")
+    )
+    migration.create(con)
+    con.close()
+    config_file_data = config.get_config()
+    config_file_data["db"]["instruments"] = {}
+    config.save_config_file(config_file_data)
+    premia.db.set_instrument("stocks", "minute", set(), set())
+
+    con = premia.db.connect()
+    yield con
+    con.close()
@@ -0,0 +1,68 @@
+import duckdb
+import pytest
+from premia import db
+from premia._shared import errors
+from premia.db._internal import bulk
+
+TABLE = "stocks_1_minute_candles"
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            time TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL
+        );
+        """
+    )
+    db.rebuild_index(TABLE, con)
+    yield con
+    con.close()
+
+
+def insert_minute(con) -> None:
+    con.execute(
+        f"INSERT INTO {TABLE} VALUES ('2024-03-05 14:30:00+00', 'AAPL');"
+    )
+
+
+def is_indexed(con) -> bool:
+    return bulk.index_sql(TABLE, con) is not None
+
+
+def test_bulk_load_rebuilds_the_index(con):
+    with db.bulk_load(TABLE, con):
+        assert not is_indexed(con)
+        insert_minute(con)
+
+    assert is_indexed(con)
+
+
+def test_bulk_load_rebuilds_the_index_before_raising(con):
+    with pytest.raises(ValueError, match="import failed"):
+        with db.bulk_load(TABLE, con):
+            insert_minute(con)
+            raise ValueError("import failed")
+
+    assert is_indexed(con)
+
+
+def test_bulk_load_keeps_the_error_when_the_rebuild_fails(con):
+    with pytest.raises(ValueError, match="import failed") as error:
+        with db.bulk_load(TABLE, con):
+            insert_minute(con)
+            insert_minute(con)
+            raise ValueError("import failed")
+
+    assert "couldn't be rebuilt" in error.value.__notes__[0]
+    assert not is_indexed(con)
+
+
+def test_bulk_load_raises_duplicate_keys(con):
+    with pytest.raises(errors.DbError, match="stored more than once"):
+        with db.bulk_load(TABLE, con):
+            insert_minute(con)
+            insert_minute(con)
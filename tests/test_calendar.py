@@ -0,0 +1,120 @@
+from datetime import date, datetime, timedelta
+import pytest
+from premia.data import calendar
+
+
+def session(day: date) -> calendar.Session:
+    sessions = calendar.sessions(
+        datetime.combine(day, datetime.min.time()) + timedelta(hours=12),
+        datetime.combine(day, datetime.min.time()) + timedelta(hours=13),
+    )
+    assert [session.date for session in sessions] == [day]
+    return sessions[0]
+
+
+@pytest.mark.parametrize(
+    "day, name",
+    [
+        (date(2024, 3, 29), "Good Friday"),
+        (date(2024, 6, 19), "Juneteenth"),
+        # Christmas Day on a Sunday is observed on Monday.
+        (date(2022, 12, 26), "Christmas Day"),
+        (date(2025, 1, 9), "Day of Mourning for Jimmy Carter"),
+    ],
+)
+def test_holidays(day, name):
+    assert calendar.holidays(day.year)[day] == name
+    assert not calendar.is_trading_day(day)
+
+
+def test_new_year_on_a_saturday_isnt_observed():
+    assert date(2021, 12, 31) not in calendar.holidays(2021)
+    assert date(2021, 12, 31) not in calendar.holidays(2022)
+    assert calendar.is_trading_day(date(2021, 12, 31))
+
+
+def test_holidays_have_no_session():
+    # Good Friday.
+    start, end = datetime(2024, 3, 29), datetime(2024, 3, 30)
+    assert calendar.sessions(start, end) == []
+
+
+def test_session_bounds_of_a_regular_day():
+    # Eastern Standard Time, UTC-5.
+    winter = session(date(2024, 3, 5))
+    assert winter.extended_open == datetime(2024, 3, 5, 9)
+    assert winter.open == datetime(2024, 3, 5, 14, 30)
+    assert winter.close == datetime(2024, 3, 5, 21)
+    assert winter.extended_close == datetime(2024, 3, 6, 1)
+    assert not winter.early_close
+
+    # Eastern Daylight Time, UTC-4.
+    summer = session(date(2024, 3, 11))
+    assert summer.extended_open == datetime(2024, 3, 11, 8)
+    assert summer.open == datetime(2024, 3, 11, 13, 30)
+    assert summer.close == datetime(2024, 3, 11, 20)
+    assert summer.extended_close == datetime(2024, 3, 12)
+
+
+@pytest.mark.parametrize(
+    "day, close, extended_close",
+    [
+        # The day after Thanksgiving, in EST.
+        (
+            date(2024, 11, 29),
+            datetime(2024, 11, 29, 18),
+            datetime(2024, 11, 29, 22),
+        ),
+        # The day before Independence Day, in EDT.
+        (date(2024, 7, 3), datetime(2024, 7, 3, 17), datetime(2024, 7, 3, 21)),
+        (
+            date(2024, 12, 24),
+            datetime(2024, 12, 24, 18),
+            datetime(2024, 12, 24, 22),
+        ),
+    ],
+)
+def test_session_bounds_of_a_half_day(day, close, extended_close):
+    half_day = session(day)
+
+    assert half_day.early_close
+    assert half_day.close == close
+    assert half_day.extended_close == extended_close
+
+
+def test_early_closes_skip_weekends():
+    # July 4th 2021 is a Sunday, so July 3rd is a Saturday.
+    assert date(2021, 7, 3) not in calendar.early_closes(2021)
+
+
+def test_prune_cuts_intraday_ranges_to_extended_hours():
+    # From after the post-market of Monday until before the pre-market of
+    # Thursday.
+    assert calendar.prune(
+        datetime(2024, 3, 5, 2), datetime(2024, 3, 7, 6), "minute"
+    ) == (datetime(2024, 3, 5, 9), datetime(2024, 3, 7, 1))
+
+
+def test_prune_skips_ranges_within_closed_hours():
+    # After the post-market of the Thursday before Good Friday until the
+    # pre-market of the following Monday.
+    start, end = datetime(2024, 3, 29), datetime(2024, 4, 1, 8)
+    assert calendar.prune(start, end, "minute") is None
+    assert calendar.prune(start, end, "day") is None
+
+
+def test_next_open_skips_the_weekend():
+    assert calendar.next_open(datetime(2024, 3, 2, 2)) == datetime(
+        2024, 3, 4, 9
+    )
+    assert calendar.next_open(datetime(2024, 3, 4, 10)) == datetime(
+        2024, 3, 4, 10
+    )
+
+
+def test_advance_skips_closed_hours_of_a_half_day():
+    # The half day after Thanksgiving ends its post-market at 22:00 UTC, the
+    # remaining hour is traded in the pre-market of the next Monday.
+    assert calendar.advance(
+        datetime(2024, 11, 29, 20), timedelta(hours=3)
+    ) == datetime(2024, 12, 2, 10)
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+import pytest
+from premia.data import contracts
+
+
+def parse(symbol: str) -> dict | None:
+    rows = contracts.parse_symbols([symbol]).to_dict("records")
+    return rows[0] if rows else None
+
+
+@pytest.mark.parametrize(
+    "symbol, company_symbol, contract_type, strike_price",
+    [
+        ("AMZN240202C00080000", "AMZN", "call", 80.0),
+        ("O:AMZN240202C00080000", "AMZN", "call", 80.0),
+        ("SPY   240202P00512500", "SPY", "put", 512.5),
+        ("BRK.B 240202C00400000", "BRK.B", "call", 400.0),
+        ("BRK.B240202C00400000", "BRK.B", "call", 400.0),
+        ("GOOGL1240202P00000500", "GOOGL1", "put", 0.5),
+    ],
+)
+def test_parse_symbols(symbol, company_symbol, contract_type, strike_price):
+    contract = parse(symbol)
+
+    assert contract["symbol"] == symbol
+    assert contract["company_symbol"] == company_symbol
+    assert contract["contract_type"] == contract_type
+    assert contract["strike_price"] == strike_price
+    assert contract["shares_per_contract"] == 100
+    assert contract["expiration_date"].to_pydatetime() == datetime(
+        2024, 2, 2, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.parametrize(
+    "symbol",
+    [
+        "AMZN",
+        "amzn240202C00080000",
+        "AMZN240202X00080000",
+        "AMZN24022C00080000",
+        "AMZN240202C0008000",
+        "AMZN240202C000800000",
+        "AMZN241302C00080000",
+        "AMZN240230C00080000",
+        "TOOLONG240202C00080000",
+        "X:AMZN240202C00080000",
+        " AMZN240202C00080000",
+        "",
+    ],
+)
+def test_parse_symbols_leaves_out_malformed_symbols(symbol):
+    assert parse(symbol) is None
+
+
+def test_parse_symbols_keeps_valid_symbols_next_to_malformed_ones():
+    parsed = contracts.parse_symbols(
+        ["AMZN241302C00080000", "AMZN240202C00080000"]
+    )
+
+    assert parsed["symbol"].tolist() == ["AMZN240202C00080000"]
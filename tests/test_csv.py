@@ -0,0 +1,52 @@
+import pytest
+from premia.data import csv
+
+TABLE = "stocks_1_minute_candles"
+HEADER = "time,symbol,close,currency,data_provider\n"
+
+
+def write_files(tmp_path, count: int) -> list[str]:
+    """
+    Write files whose minutes overlap with the next file, every file's
+    closes are its number.
+    """
+    paths = []
+    for number in range(count):
+        path = tmp_path / f"{number:02}.csv"
+        path.write_text(
+            HEADER
+            + "".join(
+                f"2024-03-05 14:{minute:02}:00+00,AAPL,{number},USD,csv\n"
+                for minute in (number, number + 1)
+            )
+        )
+        paths.append(str(path))
+
+    return paths
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["indexed", "bulk"])
+@pytest.mark.parametrize(
+    "on_conflict, expected_closes",
+    [("ignore", [0] + list(range(9))), ("update", list(range(9)) + [8])],
+)
+def test_copy_many_writes_overlapping_files_with_workers(
+    premia_db, tmp_path, bulk, on_conflict, expected_closes
+):
+    paths = write_files(tmp_path, 9)
+
+    report = csv.copy_many(
+        [str(tmp_path)],
+        TABLE,
+        workers=4,
+        batch_size=2,
+        on_conflict=on_conflict,
+        bulk=bulk,
+    )
+
+    assert report.failures == {}
+    assert report.rows == 10
+    with premia_db.cursor() as cursor:
+        cursor.execute(f"SELECT close FROM {TABLE} ORDER BY time;")
+        assert [row[0] for row in cursor.fetchall()] == expected_closes
+    assert len(paths) == report.completed
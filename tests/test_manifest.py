@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+from premia import db
+from premia.data._internal import manifest, sync
+from test_sync import FrozenDatetime, fake_fetch, stored_times
+
+TABLE = "stocks_1_minute_candles"
+MINUTE = timedelta(minutes=1)
+
+
+@pytest.fixture
+def frozen_manifest(premia_db, monkeypatch):
+    monkeypatch.setattr(manifest, "datetime", FrozenDatetime)
+    monkeypatch.setitem(sync.fetchers, "polygon", fake_fetch)
+    return premia_db
+
+
+def test_chunks_after_the_last_closed_bar_arent_checkpointed(frozen_manifest):
+    FrozenDatetime.now_utc = datetime(2024, 3, 5, 15, 10, 50)
+    start = datetime(2024, 3, 5, 14)
+    db.record_coverage(TABLE, "AAPL", [(start - timedelta(hours=1), start)])
+    job = manifest.ManifestJob(
+        name="minutes",
+        instrument="stocks",
+        provider="polygon",
+        symbols=["AAPL"],
+        start=start,
+        end=datetime(2024, 3, 5, 16),
+        chunk_days=1 / 48,
+    )
+
+    manifest.run_job("test", job)
+
+    closed_end = datetime(2024, 3, 5, 15, 10)
+    assert stored_times(frozen_manifest) == [
+        start + i * MINUTE for i in range(70)
+    ]
+    assert db.coverage(TABLE, ["AAPL"]) == {
+        "AAPL": [(start - timedelta(hours=1), closed_end)]
+    }
+    assert db.checkpoints("test/minutes") == {
+        str(chunk) for chunk in job.chunks()[:2]
+    }
@@ -0,0 +1,47 @@
+import threading
+import time
+from datetime import datetime
+import pytest
+from premia.data import CandleBatch, run_pipeline
+
+
+def candle(task: int) -> CandleBatch:
+    return CandleBatch.from_columns(
+        time=[datetime(2024, 3, 5, 14, task)],
+        symbol="AAPL",
+        open=[1.0],
+        close=[1.0],
+        high=[1.0],
+        low=[1.0],
+        volume=[1],
+        data_provider="test",
+    )
+
+
+def test_workers_stop_when_the_writer_fails(premia_db):
+    def fail_on_write(tasks):
+        raise RuntimeError("writer failed")
+
+    fetched = []
+    threads_before = set(threading.enumerate())
+
+    def fetch(task: int) -> CandleBatch:
+        fetched.append(task)
+        return candle(task)
+
+    with pytest.raises(RuntimeError, match="writer failed"):
+        run_pipeline(
+            range(50),
+            fetch,
+            "stocks_1_minute_candles",
+            workers=4,
+            queue_depth=1,
+            batch_size=1,
+            on_written=fail_on_write,
+        )
+
+    deadline = time.monotonic() + 5
+    while set(threading.enumerate()) - threads_before:
+        assert time.monotonic() < deadline, "workers are still running"
+        time.sleep(0.01)
+    assert len(fetched) < 50
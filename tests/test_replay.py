@@ -0,0 +1,20 @@
+import pandas as pd
+from premia.data.replay._internal import replay
+
+
+def test_history_round_trips_through_quoted_paths(tmp_path):
+    history = pd.DataFrame(
+        {("Close", "AAPL"): [1.0, 2.0], ("Close", "MSFT"): [3.0, 4.0]},
+        index=pd.date_range(
+            "2024-03-05 14:30", periods=2, freq="min", tz="UTC"
+        ),
+    )
+    directory = tmp_path / "o'clock"
+    directory.mkdir()
+    path = str(directory / "history.parquet")
+
+    replay.write_history(history, path)
+
+    stored = replay.read_history(path)
+    assert stored.columns.equals(history.columns)
+    assert stored.to_numpy().tolist() == history.to_numpy().tolist()
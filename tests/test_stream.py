@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http import HTTPStatus
+import numpy as np
+import pytest
+import websockets
+from premia import config
+from premia.data import CandleBatch
+from premia.data.polygon._internal import stream
+
+BAR_MS = 60_000
+FIRST_BAR = int(np.datetime64(datetime(2024, 3, 5, 14, 30), "ms").astype(int))
+
+
+def bar_message(index: int) -> dict:
+    return {
+        "ev": "AM",
+        "sym": "AAPL",
+        "s": FIRST_BAR + index * BAR_MS,
+        "o": 1.0,
+        "c": 1.0,
+        "h": 1.0,
+        "l": 1.0,
+        "v": 100,
+    }
+
+
+class StandIn:
+    """
+    Local stand-in for polygon.io's websocket server. Every connection is
+    served by the next script, a list of frames of bar messages that are
+    sent after the client subscribed before the connection is dropped. A
+    script of None rejects the handshake. Connections after the last script
+    are kept open.
+    """
+
+    def __init__(self, scripts: list):
+        self.scripts = scripts
+        self.connections = 0
+        self.script: list | None = []
+        self.auth_params: list[str] = []
+        self.subscriptions: list[str] = []
+        self.url = ""
+
+    async def process_request(self, path, headers):
+        self.connections += 1
+        if self.connections > len(self.scripts):
+            self.script = None
+            return None
+
+        self.script = self.scripts[self.connections - 1]
+        if self.script is None:
+            return HTTPStatus.SERVICE_UNAVAILABLE, [], b""
+
+    async def handler(self, websocket):
+        script = self.script
+        await websocket.send(
+            json.dumps([{"ev": "status", "status": "connected"}])
+        )
+        self.auth_params.append(json.loads(await websocket.recv())["params"])
+        await websocket.send(
+            json.dumps([{"ev": "status", "status": "auth_success"}])
+        )
+        self.subscriptions.append(json.loads(await websocket.recv())["params"])
+
+        if script is None:
+            await websocket.wait_closed()
+            return
+
+        for messages in script:
+            await websocket.send(json.dumps(messages))
+            await asyncio.sleep(0.05)
+        await websocket.close()
+
+
+@contextmanager
+def serve(stand_in: StandIn):
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    stopped = loop.create_future()
+
+    async def run_server():
+        async with websockets.serve(
+            stand_in.handler,
+            "127.0.0.1",
+            0,
+            process_request=stand_in.process_request,
+        ) as server:
+            port = server.sockets[0].getsockname()[1]
+            stand_in.url = f"ws://127.0.0.1:{port}"
+            started.set()
+            await stopped
+
+    thread = threading.Thread(
+        target=loop.run_until_complete, args=(run_server(),), daemon=True
+    )
+    thread.start()
+    started.wait()
+    try:
+        yield stand_in
+    finally:
+        loop.call_soon_threadsafe(stopped.set_result, None)
+        thread.join()
+        loop.close()
+
+
+@pytest.fixture
+def streamed_stocks(premia_db, monkeypatch):
+    config.set_provider_polygon("KEY")
+    monkeypatch.setattr(stream, "MAX_RECONNECT_DELAY", 0.1)
+    return premia_db
+
+
+@contextmanager
+def running(stand_in: StandIn, **kwargs):
+    polygon_stream = stream.Stream(
+        "stocks", ["AAPL"], url=stand_in.url, client=object(), **kwargs
+    )
+    thread = threading.Thread(target=polygon_stream.run)
+    thread.start()
+    try:
+        yield polygon_stream
+    finally:
+        polygon_stream.stop_event.set()
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+
+
+def wait_for(condition, timeout=5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def stored_bars(con) -> int:
+    with con.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM stocks_1_minute_candles;")
+        return cursor.fetchone()[0]
+
+
+def test_stream_flushes_by_row_count(streamed_stocks):
+    flushes = []
+    script = [[bar_message(0)], [bar_message(1)], [bar_message(2)]]
+
+    with serve(StandIn([script])) as stand_in, running(
+        stand_in,
+        flush_rows=2,
+        flush_interval=60_000,
+        on_flush=lambda report: flushes.append(report.rows),
+    ):
+        wait_for(lambda: len(flushes) > 0)
+
+        assert flushes[0] == 2
+        assert stand_in.auth_params[0] == "KEY"
+        assert stand_in.subscriptions[0] == "AM.AAPL"
+
+
+def test_stream_flushes_by_interval(streamed_stocks):
+    flushes = []
+
+    with serve(StandIn([[[bar_message(0)]]])) as stand_in, running(
+        stand_in,
+        flush_rows=100,
+        flush_interval=50,
+        on_flush=lambda report: flushes.append(report.rows),
+    ):
+        wait_for(lambda: len(flushes) > 0)
+
+    assert flushes[0] == 1
+    assert stored_bars(streamed_stocks) == 1
+
+
+def test_stream_reconnects_and_backfills(streamed_stocks, monkeypatch):
+    backfills = []
+
+    def fake_fetch(symbols, start, end, timespan, client):
+        backfills.append(start)
+        return CandleBatch.from_columns(
+            time=[FIRST_BAR + i * BAR_MS for i in range(1, 4)],
+            symbol="AAPL",
+            open=np.ones(3),
+            close=np.ones(3),
+            high=np.ones(3),
+            low=np.ones(3),
+            volume=np.ones(3),
+            data_provider="polygon.io",
+        )
+
+    monkeypatch.setattr(stream, "fetch", fake_fetch)
+    # The first handshake fails, the first connection drops after two bars
+    # and the last one stays open.
+    scripts = [None, [[bar_message(0), bar_message(1)]]]
+
+    with serve(StandIn(scripts)) as stand_in, running(
+        stand_in, flush_rows=100, flush_interval=100
+    ) as polygon_stream:
+        wait_for(lambda: polygon_stream.report.completed == 2)
+
+        assert backfills == [datetime(2024, 3, 5, 14, 31)]
+        assert polygon_stream.report.rows == 4
+        assert polygon_stream.report.skipped == 1
+        assert stored_bars(streamed_stocks) == 4
+        assert stand_in.connections == 3
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from premia import db
+from premia.data import CandleBatch
+from premia.data._internal import sync
+
+MINUTE = timedelta(minutes=1)
+
+
+class FrozenDatetime(datetime):
+    now_utc = datetime(2024, 3, 5, 15, 0, 50)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_utc
+
+
+def fake_fetch(symbols, start, end, timespan):
+    """
+    Return every bar that has started between the start of the bar at start
+    and end, including the unfinished current bar, like the providers do.
+    """
+    first = start.replace(second=0, microsecond=0)
+    last = min(end, FrozenDatetime.now_utc)
+    count = int((last - first) // MINUTE) + 1
+    times = [first + i * MINUTE for i in range(count)]
+    rows = [(symbol, time) for symbol in symbols for time in times]
+
+    return CandleBatch.from_columns(
+        time=[time for _, time in rows],
+        symbol=[symbol for symbol, _ in rows],
+        open=np.ones(len(rows)),
+        close=np.ones(len(rows)),
+        high=np.ones(len(rows)),
+        low=np.ones(len(rows)),
+        volume=np.ones(len(rows), dtype=np.int64),
+        data_provider="test",
+    )
+
+
+@pytest.fixture
+def frozen_sync(premia_db, monkeypatch):
+    monkeypatch.setattr(sync, "datetime", FrozenDatetime)
+    monkeypatch.setitem(sync.fetchers, "polygon", fake_fetch)
+    return premia_db
+
+
+def stored_times(con) -> list[datetime]:
+    with con.cursor() as cursor:
+        cursor.execute(
+            "SELECT time FROM stocks_1_minute_candles ORDER BY time;"
+        )
+        return [row[0].replace(tzinfo=None) for row in cursor.fetchall()]
+
+
+def test_closed_until_aligns_intraday_bars():
+    moment = datetime(2024, 3, 5, 15, 0, 50)
+
+    assert sync.closed_until(moment, "minute") == datetime(2024, 3, 5, 15)
+    assert sync.closed_until(moment, "hour") == datetime(2024, 3, 5, 15)
+    assert sync.closed_until(moment, "day") == datetime(2024, 3, 4, 15, 0, 50)
+
+
+def test_repeated_syncs_keep_every_bar(frozen_sync, monkeypatch):
+    start = datetime(2024, 3, 5, 14, 30)
+
+    FrozenDatetime.now_utc = datetime(2024, 3, 5, 15, 0, 50)
+    sync.sync("stocks", ["AAPL"], start, datetime(2024, 3, 5, 15, 0, 30))
+
+    # The unfinished 15:00 bar is neither stored nor covered.
+    assert stored_times(frozen_sync) == [start + i * MINUTE for i in range(30)]
+    assert db.coverage("stocks_1_minute_candles", ["AAPL"]) == {
+        "AAPL": [(start, datetime(2024, 3, 5, 15))]
+    }
+
+    FrozenDatetime.now_utc = datetime(2024, 3, 5, 16, 5)
+    end = datetime(2024, 3, 5, 16)
+    sync.sync("stocks", ["AAPL"], start, end)
+    sync.sync("stocks", ["AAPL"], start, end)
+
+    assert stored_times(frozen_sync) == [start + i * MINUTE for i in range(90)]
+    assert db.coverage("stocks_1_minute_candles", ["AAPL"]) == {
+        "AAPL": [(start, end)]
+    }
+
+
+def test_plan_sync_doesnt_record_coverage(frozen_sync):
+    FrozenDatetime.now_utc = datetime(2024, 3, 5, 16, 5)
+    start = datetime(2024, 3, 5, 14, 30)
+    end = datetime(2024, 3, 5, 15)
+
+    ranges, _, scanned = sync.plan_sync("stocks", ["AAPL"], start, end)
+
+    assert [str(sync_range) for sync_range in ranges] == [
+        str(sync.SyncRange(["AAPL"], start, end))
+    ]
+    assert scanned == {"AAPL": []}
+    assert db.coverage("stocks_1_minute_candles", ["AAPL"]) == {}
+
+
+def store_minutes(con, start: datetime, end: datetime, skip=()) -> None:
+    count = int((end - start) // MINUTE)
+    times = [start + i * MINUTE for i in range(count)]
+    batch = fake_fetch(["AAPL"], start, end, "minute")
+    batch = batch.take(
+        np.isin(
+            batch.time,
+            [sync.to_epoch_ms(time) for time in times if time not in skip],
+        )
+    )
+    db.upsert("stocks_1_minute_candles", batch.to_df(), con)
+
+
+def test_plan_sync_reports_intraday_holes(frozen_sync):
+    FrozenDatetime.now_utc = datetime(2024, 3, 6)
+    start = datetime(2024, 3, 5, 14, 30)
+    end = datetime(2024, 3, 5, 16)
+    hole = [datetime(2024, 3, 5, 15) + i * MINUTE for i in range(10)]
+    store_minutes(frozen_sync, start, end, skip=hole)
+
+    ranges, _, _ = sync.plan_sync("stocks", ["AAPL"], start, end)
+
+    assert [(r.start, r.end) for r in ranges] == [(hole[0], hole[-1] + MINUTE)]
+
+
+def test_plan_sync_skips_holes_without_trading_time(frozen_sync):
+    FrozenDatetime.now_utc = datetime(2024, 4, 2)
+    # Extended hours of Thursday and Monday around Good Friday and a weekend
+    # in EDT, 04:00 to 20:00 in New York.
+    thursday = datetime(2024, 3, 28, 8)
+    monday = datetime(2024, 4, 1, 8)
+    store_minutes(frozen_sync, thursday, thursday + timedelta(hours=16))
+    store_minutes(frozen_sync, monday, monday + timedelta(hours=1))
+
+    ranges, _, scanned_coverage = sync.plan_sync(
+        "stocks", ["AAPL"], thursday, monday + timedelta(hours=1)
+    )
+
+    assert ranges == []
+    assert scanned_coverage == {
+        "AAPL": [(thursday, monday + timedelta(hours=1))]
+    }
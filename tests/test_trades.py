@@ -0,0 +1,98 @@
+from datetime import datetime
+import numpy as np
+from premia.data import trades
+from premia.data.polygon._internal import polygon
+from premia.data.polygon._internal import trades as polygon_trades
+
+MINUTE_NS = 60 * 10**9
+# 2024-03-05 15:00 UTC in nanoseconds since the epoch.
+BAR_NS = 1_709_650_800 * 10**9
+
+
+def candle_rows(batch) -> list[tuple]:
+    return list(
+        zip(
+            batch.open.tolist(),
+            batch.high.tolist(),
+            batch.low.tolist(),
+            batch.close.tolist(),
+            batch.volume.tolist(),
+        )
+    )
+
+
+def test_trades_to_candles_follows_conditions():
+    time_ns = BAR_NS + np.array([0, 1, 2, 3, MINUTE_NS])
+    price = np.array([10.0, 50.0, 12.0, 1.0, 20.0])
+    size = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    # An odd lot sets neither the high and low nor the open and close, an
+    # out of sequence trade only the high and low.
+    is_trade, updates_high_low, updates_open_close = trades.condition_updates(
+        [[], [37], [32], [2], [37]]
+    )
+
+    batch = trades.trades_to_candles(
+        time_ns,
+        price,
+        size,
+        "AAPL",
+        "minute",
+        "test",
+        updates_high_low,
+        updates_open_close,
+    )
+
+    assert is_trade.all()
+    # The second bar has no trade that sets its price and is left out.
+    assert candle_rows(batch) == [(10.0, 12.0, 10.0, 10.0, 10.0)]
+
+
+def test_condition_updates_drops_non_trades():
+    is_trade, _, _ = trades.condition_updates([[15], [38], [14, 41]])
+
+    assert is_trade.tolist() == [False, False, True]
+
+
+def test_copy_breaks_ties_by_sequence(premia_db, tmp_path):
+    path = tmp_path / "trades.csv"
+    path.write_text(
+        "sip_timestamp,symbol,price,size,sequence_number\n"
+        f"{BAR_NS},AAPL,3.0,1,3\n"
+        f"{BAR_NS},AAPL,1.0,1,1\n"
+        f"{BAR_NS},AAPL,2.0,1,2\n"
+    )
+
+    trades.copy(str(path), "stocks")
+
+    with premia_db.cursor() as cursor:
+        cursor.execute("SELECT open, close FROM stocks_1_minute_candles;")
+        assert cursor.fetchall() == [(1.0, 3.0)]
+
+
+def test_fetch_trades_window_orders_and_filters_trades(monkeypatch):
+    pages = [
+        [
+            {"sip_timestamp": BAR_NS, "price": 5.0, "sequence_number": 2},
+            {"sip_timestamp": BAR_NS + 1, "price": 9.0, "correction": 1},
+        ],
+        [
+            # Reported on the next page, but first in the sequence.
+            {"sip_timestamp": BAR_NS, "price": 4.0, "sequence_number": 1},
+            {
+                "sip_timestamp": BAR_NS + 2,
+                "price": 6.0,
+                "sequence_number": 3,
+                "conditions": [16],
+            },
+        ],
+    ]
+    monkeypatch.setattr(
+        polygon_trades, "iter_trade_pages", lambda *args: iter(pages)
+    )
+    window = polygon.FetchWindow(
+        "AAPL", datetime(2024, 3, 5, 15), datetime(2024, 3, 5, 16)
+    )
+
+    batch = polygon_trades.fetch_trades_window(object(), window, "minute")
+
+    assert candle_rows(batch) == [(4.0, 5.0, 4.0, 5.0, 0.0)]
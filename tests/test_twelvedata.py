@@ -0,0 +1,121 @@
+import json
+from datetime import datetime
+import pytest
+import requests
+from premia.data import DataError
+from premia.data.twelvedata._internal import twelvedata
+
+START = datetime(2024, 3, 5, 14, 30)
+END = datetime(2024, 3, 5, 14, 40)
+
+
+def time_series(symbol: str, minutes: list[int]) -> dict:
+    return {
+        "meta": {"symbol": symbol, "currency": "USD"},
+        "values": [
+            {
+                "datetime": f"2024-03-05 14:{minute:02}:00",
+                "open": "1.0",
+                "high": "1.0",
+                "low": "1.0",
+                "close": str(minute),
+                "volume": "10",
+            }
+            for minute in sorted(minutes, reverse=True)
+        ],
+        "status": "ok",
+    }
+
+
+def error(code: int, message: str) -> dict:
+    return {"code": code, "message": message, "status": "error"}
+
+
+class FakeSession:
+    """
+    Answer time series requests with the bodies of responses by the
+    requested symbols and end date.
+    """
+
+    def __init__(self, responses: dict[tuple[str, str], dict]):
+        self.responses = responses
+        self.requests: list[tuple[str, str]] = []
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        key = (params["symbol"], params["end_date"])
+        self.requests.append(key)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(self.responses[key]).encode()
+        return response
+
+
+def stored_closes(batch) -> list[tuple[str, float]]:
+    return sorted(zip(batch.symbol.tolist(), batch.close.tolist()))
+
+
+def test_time_series_skips_symbols_without_data():
+    session = FakeSession(
+        {
+            ("AAPL,NODATA,MSFT", "2024-03-05 14:40:00"): {
+                "AAPL": time_series("AAPL", [30, 31]),
+                "NODATA": error(
+                    400,
+                    "No data is available on the specified dates. Try setting different start/end dates.",
+                ),
+                "MSFT": time_series("MSFT", [30]),
+            }
+        }
+    )
+
+    batch = twelvedata.Client("KEY", session).time_series(
+        ["AAPL", "NODATA", "MSFT"], START, END, "minute"
+    )
+
+    assert stored_closes(batch) == [
+        ("AAPL", 30.0),
+        ("AAPL", 31.0),
+        ("MSFT", 30.0),
+    ]
+
+
+def test_time_series_raises_other_symbol_errors():
+    session = FakeSession(
+        {
+            ("AAPL,INVALID", "2024-03-05 14:40:00"): {
+                "AAPL": time_series("AAPL", [30]),
+                "INVALID": error(
+                    400,
+                    "**symbol** not found: INVALID. Please specify it correctly.",
+                ),
+            }
+        }
+    )
+
+    with pytest.raises(DataError, match="INVALID"):
+        twelvedata.Client("KEY", session).time_series(
+            ["AAPL", "INVALID"], START, END, "minute"
+        )
+
+
+def test_time_series_pages_through_full_responses(monkeypatch):
+    monkeypatch.setattr(twelvedata, "MAX_OUTPUT_SIZE", 3)
+    session = FakeSession(
+        {
+            ("AAPL,MSFT", "2024-03-05 14:40:00"): {
+                "AAPL": time_series("AAPL", [37, 38, 39]),
+                "MSFT": time_series("MSFT", [39]),
+            },
+            ("AAPL", "2024-03-05 14:36:59"): time_series("AAPL", [34, 35, 36]),
+            ("AAPL", "2024-03-05 14:33:59"): time_series("AAPL", [33]),
+        }
+    )
+
+    batch = twelvedata.Client("KEY", session).time_series(
+        ["AAPL", "MSFT"], START, END, "minute"
+    )
+
+    assert stored_closes(batch) == [
+        ("AAPL", float(minute)) for minute in range(33, 40)
+    ] + [("MSFT", 39.0)]
+    assert len(session.requests) == 3
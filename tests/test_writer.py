@@ -0,0 +1,88 @@
+import duckdb
+import pandas as pd
+import pytest
+from premia import db
+
+TABLE = "stocks_1_minute_candles"
+
+
+@pytest.fixture(params=[True, False], ids=["indexed", "bulk"])
+def con(request):
+    con = duckdb.connect()
+    con.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            time TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            close DOUBLE NOT NULL
+        );
+        """
+    )
+    if request.param:
+        db.rebuild_index(TABLE, con)
+    yield con
+    con.close()
+
+
+def candles(closes: dict[str, float]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "time": pd.to_datetime(list(closes), utc=True),
+            "symbol": "AAPL",
+            "close": list(closes.values()),
+        }
+    )
+
+
+def stored_closes(con) -> list[float]:
+    return [
+        row[0]
+        for row in con.execute(
+            f"SELECT close FROM {TABLE} ORDER BY time;"
+        ).fetchall()
+    ]
+
+
+@pytest.mark.parametrize(
+    "on_conflict, expected_closes, expected_result",
+    [
+        ("ignore", [1.0, 2.0, 5.0], db.InsertResult(inserted=1, skipped=2)),
+        ("update", [3.0, 4.0, 5.0], db.InsertResult(inserted=1, updated=2)),
+    ],
+)
+def test_upsert_resolves_existing_keys(
+    con, on_conflict, expected_closes, expected_result
+):
+    db.upsert(
+        TABLE, candles({"2024-03-05 14:30": 1.0, "2024-03-05 14:31": 2.0}), con
+    )
+
+    result = db.upsert(
+        TABLE,
+        candles(
+            {
+                "2024-03-05 14:30": 3.0,
+                "2024-03-05 14:31": 4.0,
+                "2024-03-05 14:32": 5.0,
+            }
+        ),
+        con,
+        on_conflict=on_conflict,
+    )
+
+    assert result == expected_result
+    assert stored_closes(con) == expected_closes
+
+
+def test_upsert_skips_duplicate_keys_of_the_source(con):
+    data = pd.concat(
+        [
+            candles({"2024-03-05 14:30": 1.0}),
+            candles({"2024-03-05 14:30": 2.0}),
+        ]
+    )
+
+    result = db.upsert(TABLE, data, con, on_conflict="update")
+
+    assert result == db.InsertResult(inserted=1, skipped=1)
+    assert len(stored_closes(con)) == 1
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+import yfinance as yf
+from premia.data.yfinance._internal import yfinance
+
+NOW = datetime(2026, 10, 17, 15, 42)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+@pytest.fixture(autouse=True)
+def frozen_now(monkeypatch):
+    monkeypatch.setattr(yfinance, "datetime", FrozenDatetime)
+
+
+def test_split_range_returns_adjacent_whole_days_within_the_limits():
+    ranges = yfinance.split_range(
+        datetime(2026, 9, 1, 13, 30), datetime(2026, 10, 17, 15), "1m"
+    )
+
+    assert ranges[0][0] == datetime(2026, 9, 18)
+    assert ranges[-1][1] == datetime(2026, 10, 18)
+    for range_start, range_end in ranges:
+        assert range_start.time() == range_end.time() == datetime.min.time()
+        assert range_end - range_start <= timedelta(days=7)
+    for (_, previous_end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert previous_end == next_start
+
+
+def test_split_range_keeps_unlimited_intervals_whole():
+    assert yfinance.split_range(
+        datetime(2020, 1, 2, 14, 30), datetime(2020, 3, 4), "1d"
+    ) == [(datetime(2020, 1, 2), datetime(2020, 3, 4))]
+
+
+def test_download_requests_every_day_once(monkeypatch):
+    requests = []
+
+    def fake_download(tickers, start, end, interval, **kwargs):
+        requests.append((start, end))
+        index = pd.date_range(start, end, freq="h", inclusive="left")
+        columns = pd.MultiIndex.from_product([yfinance.PRICE_COLUMNS, tickers])
+        return pd.DataFrame(
+            1.0, index=index.tz_localize("UTC"), columns=columns
+        )
+
+    monkeypatch.setattr(yf, "download", fake_download)
+
+    batch = yfinance.download(
+        ["AAPL"],
+        datetime(2026, 9, 20, 13, 30),
+        datetime(2026, 10, 2, 20),
+        "minute",
+    )
+
+    assert requests == [
+        ("2026-09-20", "2026-09-27"),
+        ("2026-09-27", "2026-10-03"),
+    ]
+    df = batch.to_df()
+    assert not df.duplicated(["symbol", "time"]).any()
+    assert df["time"].min() == pd.Timestamp("2026-09-20 14:00", tz="UTC")
+    assert df["time"].max() == pd.Timestamp("2026-10-02 19:00", tz="UTC")